@@ -15,7 +15,7 @@ from loguru import logger
 from config import AppConfig, ensure_directories, DATA_DIR
 from version import APP_VERSION
 from database import Database
-from vector_db import VectorDB
+from vector_db import VectorDB, get_vector_db
 from core.state import AppState, app_state
 from core.ai_engine import AIEngine
 from core.event_bus import event_bus, Events
@@ -51,7 +51,8 @@ class SphereApp:
 
         # Базы данных
         self.db = Database()
-        self.vector_db = VectorDB()
+        # Векторная база открывается в initialize() — загрузка Chroma не задерживает конструктор
+        self.vector_db: VectorDB = None
 
         # AI Engine
         self.ai_engine = AIEngine(self.config)
@@ -78,7 +79,7 @@ class SphereApp:
         logger.info("Инициализация Sphere...")
         ensure_directories()
         self.db.initialize()
-        self.vector_db.initialize()
+        self.vector_db = get_vector_db()
 
         # Инициализируем модули
         self.chat_module = ChatModule(self.db, self.ai_engine, self.page, self.vector_db, self.config)
@@ -140,14 +141,24 @@ class SphereApp:
         if self.config.auto_update_on_start and is_git_repo():
             self.page.run_task(self._check_updates_async, show_only_if_available=True)
 
+        # Цикл событий UI — для пачек event_bus.emit_batched из рабочих потоков
+        self.page.run_task(self._bind_event_loop)
+
         # Периодическое обновление мониторинга ресурсов в хедере
         self.page.run_task(self._resource_monitor_loop)
 
+        # Напоминания о событиях календаря (если включено)
+        if self.config.event_reminders:
+            self.page.run_task(self.notifications_module.run_reminder_scheduler, self.db)
+
         # Если провайдер Ollama — проверить, что выбранная модель есть; иначе переключить на первую доступную
         self.page.run_task(self._ensure_ollama_model_async)
 
         logger.info("UI построен, приложение запущено")
 
+    async def _bind_event_loop(self):
+        event_bus.bind_loop(asyncio.get_running_loop())
+
     async def _resource_monitor_loop(self):
         """Раз в 2 сек обновлять CPU/RAM в хедере."""
         from utils.resource_monitor import get_cpu_percent, get_memory_info
@@ -157,8 +168,8 @@ class SphereApp:
                 cpu = get_cpu_percent()
                 ram_used, ram_total = get_memory_info()
                 if self.header and hasattr(self.header, "update_resources"):
+                    # Хедер сам перерисует строку мониторинга, если значения изменились
                     self.header.update_resources(cpu, ram_used, ram_total)
-                    self.header.update()
             except Exception:
                 pass
 
@@ -562,7 +573,7 @@ class SphereApp:
         if not self.config.telegram.bot_token or not self.config.telegram.chat_id:
             self.page.show_dialog(ft.SnackBar(content=ft.Text("Настройте Telegram в Настройках.")))
             return
-        path = export_data_to_json(self.db)
+        path = await asyncio.to_thread(export_data_to_json, self.db)
         if not path:
             self.page.show_dialog(ft.SnackBar(content=ft.Text("Ошибка создания бекапа.")))
             return
@@ -833,6 +844,15 @@ class SphereApp:
                             tg_token,
                             tg_chat_id,
 
+                            ft.Divider(height=24),
+                            ft.Text("Напоминания", size=16, weight=ft.FontWeight.W_600, color=ft.Colors.ON_SURFACE),
+                            ft.Switch(
+                                label="Напоминать о событиях календаря за 15 минут",
+                                label_text_style=ft.TextStyle(color=ft.Colors.ON_SURFACE),
+                                value=self.config.event_reminders,
+                                on_change=lambda e: self._set_event_reminders(e.control.value),
+                            ),
+
                             ft.Divider(height=24),
                             ft.Text("Данные", size=16, weight=ft.FontWeight.W_600, color=ft.Colors.ON_SURFACE),
                             ft.Row([backup_btn, export_btn], spacing=8),
@@ -882,6 +902,14 @@ class SphereApp:
             obj = getattr(obj, part)
         setattr(obj, parts[-1], value)
 
+    def _set_event_reminders(self, enabled: bool):
+        """Включить/выключить напоминания о событиях без перезапуска."""
+        self.config.event_reminders = enabled
+        if enabled and not self.notifications_module.reminders_running:
+            self.page.run_task(self.notifications_module.run_reminder_scheduler, self.db)
+        elif not enabled:
+            self.notifications_module.stop_reminders()
+
     def _save_settings(self, e):
         """Сохранить настройки."""
         self.config.save()
@@ -1029,7 +1057,7 @@ class SphereApp:
             # Предложить перезапуск
             def on_restart(_e):
                 from utils.updater import restart_app
-                restart_app()
+                restart_app(self.shutdown)
 
             restart_dlg = ft.AlertDialog(
                 modal=True,
@@ -1226,5 +1254,9 @@ class SphereApp:
         """Завершение работы приложения."""
         logger.info("Завершение Sphere...")
         self.config.save()
+        if self.chat_module is not None:
+            self.chat_module.close()
+        if self.vector_db is not None:
+            self.vector_db.close()
         self.db.close()
         logger.info("Sphere завершён")
@@ -16,6 +16,7 @@ ASSETS_DIR = BASE_DIR / "assets"
 # Директории данных
 DB_PATH = DATA_DIR / "sphere.db"
 CHROMA_DIR = DATA_DIR / "chroma"
+FAISS_DIR = DATA_DIR / "faiss"
 NOTES_DIR = DATA_DIR / "notes"
 KNOWLEDGE_DIR = DATA_DIR / "knowledge"
 EXPORTS_DIR = DATA_DIR / "exports"
@@ -23,6 +24,13 @@ BACKUPS_DIR = DATA_DIR / "backups"
 
 CONFIG_FILE = DATA_DIR / "config.yaml"
 
+# Хранилище векторов: chroma (по умолчанию) или faiss
+VECTOR_BACKEND = os.environ.get("SPHERE_VECTOR_BACKEND", "chroma").strip().lower()
+# Адрес сервера ChromaDB (http://host:port); пусто — встроенная база в CHROMA_DIR
+CHROMA_URL = os.environ.get("SPHERE_CHROMA_URL", "").strip()
+# FAISS: на больших коллекциях хранить векторы сжатыми (IVF-PQ + int8 для пересчёта)
+FAISS_QUANTIZE = os.environ.get("SPHERE_FAISS_QUANTIZE", "").strip().lower() in ("1", "true", "yes")
+
 
 @dataclass
 class AIConfig:
@@ -87,6 +95,8 @@ class AppConfig:
     auto_backup: bool = True
     backup_interval_hours: int = 24
     auto_update_on_start: bool = False
+    # Уведомления ОС за 15 минут до событий календаря
+    event_reminders: bool = False
 
     def save(self):
         """Сохранить конфигурацию в YAML файл."""
@@ -125,6 +135,7 @@ class AppConfig:
             "auto_backup": self.auto_backup,
             "backup_interval_hours": self.backup_interval_hours,
             "auto_update_on_start": self.auto_update_on_start,
+            "event_reminders": self.event_reminders,
         }
         with open(CONFIG_FILE, "w", encoding="utf-8") as f:
             yaml.dump(data, f, default_flow_style=False, allow_unicode=True)
@@ -161,6 +172,7 @@ class AppConfig:
             auto_backup=data.get("auto_backup", True),
             backup_interval_hours=data.get("backup_interval_hours", 24),
             auto_update_on_start=data.get("auto_update_on_start", False),
+            event_reminders=data.get("event_reminders", False),
         )
 
 
@@ -5,16 +5,37 @@ Sphere — Шина событий для межмодульного взаим
 """
 
 import asyncio
-from typing import Callable, Dict, List, Any
+import threading
+from typing import Callable, Dict, List, Any, Optional
 from loguru import logger
 
 
+# Окно (сек), в течение которого emit_batched копит события одного типа (~один кадр)
+BATCH_WINDOW = 0.016
+# Суффикс события, на которое emit_batched доставляет всю пачку одним списком
+BATCH_SUFFIX = ":batch"
+
+
+def batched(event: str) -> str:
+    """Имя события-пачки для emit_batched: обработчик получает список data."""
+    return event + BATCH_SUFFIX
+
+
 class EventBus:
     """Простая pub/sub шина событий."""
 
     def __init__(self):
         self._listeners: Dict[str, List[Callable]] = {}
         self._async_listeners: Dict[str, List[Callable]] = {}
+        # Накопленные данные emit_batched по событиям; сброс запланирован, пока ключ есть в словаре
+        self._pending: Dict[str, List[Any]] = {}
+        self._pending_lock = threading.Lock()
+        # Цикл событий UI: пачки emit_batched доставляются в нём, откуда бы ни пришёл вызов
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def bind_loop(self, loop: asyncio.AbstractEventLoop):
+        """Запомнить цикл событий приложения (для emit_batched из рабочих потоков)."""
+        self._loop = loop
 
     def on(self, event: str, callback: Callable):
         """Подписаться на событие (синхронный обработчик)."""
@@ -39,24 +60,80 @@ class EventBus:
 
     def emit(self, event: str, data: Any = None):
         """Испустить событие (синхронно)."""
-        logger.debug(f"Событие: {event}")
-        for cb in self._listeners.get(event, []):
+        listeners = self._listeners.get(event)
+        if not listeners:
+            # Холодное событие — один промах по словарю, без форматирования лога
+            return
+        logger.debug("Событие: {}", event)
+        for cb in tuple(listeners):
             try:
                 cb(data)
             except Exception as e:
                 logger.error(f"Ошибка обработчика {event}: {e}")
 
+    def emit_batched(self, event: str, data: Any = None):
+        """Испустить событие с коалесценцией: вызовы за BATCH_WINDOW копятся и доставляются
+        в цикле событий — обработчикам event по одному data (контракт как у emit),
+        обработчикам batched(event) одним вызовом со списком всех data.
+        Синхронные и асинхронные обработчики вызываются одинаково.
+        """
+        with self._pending_lock:
+            batch = self._pending.get(event)
+            if batch is not None:
+                batch.append(data)
+                return
+            self._pending[event] = [data]
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # Вызов из потока без цикла событий (синхронный обработчик Flet) — планируем в цикле UI
+            loop = self._loop
+            if loop is None or loop.is_closed():
+                self._flush_now(event)
+                return
+            loop.call_soon_threadsafe(loop.call_later, BATCH_WINDOW, self._flush, event)
+            return
+        self._loop = loop
+        loop.call_later(BATCH_WINDOW, self._flush, event)
+
+    def _take_batch(self, event: str) -> List[Any]:
+        with self._pending_lock:
+            return self._pending.pop(event, None) or []
+
+    def _flush(self, event: str):
+        """Доставить накопленную пачку событий (в цикле событий)."""
+        batch = self._take_batch(event)
+        if batch:
+            asyncio.ensure_future(self._deliver_batch(event, batch))
+
+    def _flush_now(self, event: str):
+        """Цикла событий нет — доставить пачку сразу синхронным обработчикам."""
+        batch = self._take_batch(event)
+        for data in batch:
+            self.emit(event, data)
+        if batch:
+            self.emit(batched(event), batch)
+
+    async def _deliver_batch(self, event: str, batch: List[Any]):
+        for data in batch:
+            await self.emit_async(event, data)
+        await self.emit_async(batched(event), batch)
+
     async def emit_async(self, event: str, data: Any = None):
         """Испустить событие (асинхронно)."""
-        logger.debug(f"Async событие: {event}")
+        listeners = self._listeners.get(event, ())
+        async_listeners = self._async_listeners.get(event, ())
+        if not listeners and not async_listeners:
+            return
+        logger.debug("Async событие: {}", event)
         # Синхронные обработчики
-        for cb in self._listeners.get(event, []):
+        for cb in tuple(listeners):
             try:
                 cb(data)
             except Exception as e:
                 logger.error(f"Ошибка обработчика {event}: {e}")
         # Асинхронные обработчики
-        for cb in self._async_listeners.get(event, []):
+        for cb in tuple(async_listeners):
             try:
                 await cb(data)
             except Exception as e:
@@ -6,7 +6,7 @@ import sqlite3
 import json
 from pathlib import Path
 from datetime import datetime
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Iterable
 
 from config import DB_PATH, DATA_DIR
 from loguru import logger
@@ -69,6 +69,8 @@ CREATE TABLE IF NOT EXISTS knowledge_documents (
     tags JSON DEFAULT '[]',
     processed BOOLEAN DEFAULT 0,
     chunk_count INTEGER DEFAULT 0,
+    content_hash TEXT,
+    chunk_source_id INTEGER,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
@@ -83,6 +85,18 @@ CREATE TABLE IF NOT EXISTS chat_history (
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Материализованный список сессий чата: поддерживается триггером на chat_history
+CREATE TABLE IF NOT EXISTS chat_sessions (
+    session_id TEXT PRIMARY KEY,
+    last_message_at TIMESTAMP
+);
+
+CREATE TRIGGER IF NOT EXISTS trg_chat_sessions_touch AFTER INSERT ON chat_history
+BEGIN
+    INSERT OR REPLACE INTO chat_sessions (session_id, last_message_at)
+    VALUES (NEW.session_id, NEW.created_at);
+END;
+
 CREATE TABLE IF NOT EXISTS search_history (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     query TEXT NOT NULL,
@@ -105,8 +119,60 @@ CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks(status);
 CREATE INDEX IF NOT EXISTS idx_tasks_due ON tasks(due_date);
 CREATE INDEX IF NOT EXISTS idx_calendar_start ON calendar_events(start_time);
 CREATE INDEX IF NOT EXISTS idx_chat_session ON chat_history(session_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_chat_sessions_last ON chat_sessions(last_message_at DESC);
+"""
+
+
+# Полнотекстовые индексы (FTS5, токенизатор trigram) поверх notes и tasks, синхронизируются
+# триггерами. trigram ищет подстроку, как прежний LIKE '%q%', но по индексу.
+# Отдельно от SCHEMA_SQL: сборка SQLite без FTS5 / trigram (< 3.34) не должна ломать инициализацию.
+FTS_SCHEMA_SQL = """
+CREATE VIRTUAL TABLE IF NOT EXISTS notes_fts USING fts5(
+    title, content, content='notes', content_rowid='id', tokenize='trigram'
+);
+
+CREATE TRIGGER IF NOT EXISTS notes_fts_ai AFTER INSERT ON notes BEGIN
+    INSERT INTO notes_fts (rowid, title, content) VALUES (NEW.id, NEW.title, NEW.content);
+END;
+
+CREATE TRIGGER IF NOT EXISTS notes_fts_ad AFTER DELETE ON notes BEGIN
+    INSERT INTO notes_fts (notes_fts, rowid, title, content) VALUES ('delete', OLD.id, OLD.title, OLD.content);
+END;
+
+CREATE TRIGGER IF NOT EXISTS notes_fts_au AFTER UPDATE OF title, content ON notes BEGIN
+    INSERT INTO notes_fts (notes_fts, rowid, title, content) VALUES ('delete', OLD.id, OLD.title, OLD.content);
+    INSERT INTO notes_fts (rowid, title, content) VALUES (NEW.id, NEW.title, NEW.content);
+END;
+
+CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts USING fts5(
+    title, description, content='tasks', content_rowid='id', tokenize='trigram'
+);
+
+CREATE TRIGGER IF NOT EXISTS tasks_fts_ai AFTER INSERT ON tasks BEGIN
+    INSERT INTO tasks_fts (rowid, title, description) VALUES (NEW.id, NEW.title, NEW.description);
+END;
+
+CREATE TRIGGER IF NOT EXISTS tasks_fts_ad AFTER DELETE ON tasks BEGIN
+    INSERT INTO tasks_fts (tasks_fts, rowid, title, description) VALUES ('delete', OLD.id, OLD.title, OLD.description);
+END;
+
+CREATE TRIGGER IF NOT EXISTS tasks_fts_au AFTER UPDATE OF title, description ON tasks BEGIN
+    INSERT INTO tasks_fts (tasks_fts, rowid, title, description) VALUES ('delete', OLD.id, OLD.title, OLD.description);
+    INSERT INTO tasks_fts (rowid, title, description) VALUES (NEW.id, NEW.title, NEW.description);
+END;
 """
 
+# Триграммный индекс находит только подстроки от трёх символов; короче — через LIKE
+FTS_MIN_QUERY = 3
+
+
+def _fts_query(query: str) -> str:
+    """Пользовательский запрос -> выражение MATCH: вся строка как одна подстрока
+    (та же семантика, что у LIKE '%q%'); пустая строка, если запрос короче FTS_MIN_QUERY."""
+    if len(query) < FTS_MIN_QUERY:
+        return ""
+    return '"' + query.replace('"', '""') + '"'
+
 
 class Database:
     """Менеджер SQLite базы данных."""
@@ -114,12 +180,19 @@ class Database:
     def __init__(self, db_path: Path = DB_PATH):
         self.db_path = db_path
         self._conn: Optional[sqlite3.Connection] = None
+        # Разобранные теги заметок: id -> (updated_at, list) — JSON парсится один раз на версию заметки
+        self._note_tags_cache: Dict[int, tuple] = {}
+        self._fts_available = False
+        # Список сессий чата (новые первыми); поддерживается в add_chat_message
+        self._sessions_cache: Optional[List[str]] = None
 
     def connect(self) -> sqlite3.Connection:
         """Подключиться к базе данных."""
         if self._conn is None:
             self.db_path.parent.mkdir(parents=True, exist_ok=True)
-            self._conn = sqlite3.connect(str(self.db_path))
+            # check_same_thread=False: модули читают БД из asyncio.to_thread,
+            # SQLite собран в serialized-режиме и сам сериализует доступ к соединению
+            self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
             self._conn.row_factory = sqlite3.Row
             self._conn.execute("PRAGMA journal_mode=WAL")
             self._conn.execute("PRAGMA foreign_keys=ON")
@@ -130,9 +203,50 @@ class Database:
         """Инициализировать схему базы данных."""
         conn = self.connect()
         conn.executescript(SCHEMA_SQL)
+        self._migrate(conn)
+        # Разовое заполнение chat_sessions для баз, созданных до появления триггера
+        if conn.execute("SELECT 1 FROM chat_sessions LIMIT 1").fetchone() is None:
+            conn.execute(
+                "INSERT OR IGNORE INTO chat_sessions (session_id, last_message_at) "
+                "SELECT session_id, MAX(created_at) FROM chat_history GROUP BY session_id"
+            )
+        self._init_fts(conn)
         conn.commit()
         logger.info("Схема БД инициализирована")
 
+    def _migrate(self, conn: sqlite3.Connection):
+        """Добавить колонки, появившиеся после создания схемы, в существующие базы."""
+        doc_columns = {r["name"] for r in conn.execute("PRAGMA table_info(knowledge_documents)")}
+        if "content_hash" not in doc_columns:
+            conn.execute("ALTER TABLE knowledge_documents ADD COLUMN content_hash TEXT")
+        if "chunk_source_id" not in doc_columns:
+            conn.execute("ALTER TABLE knowledge_documents ADD COLUMN chunk_source_id INTEGER")
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_documents_hash ON knowledge_documents(content_hash)"
+        )
+
+    def _init_fts(self, conn: sqlite3.Connection):
+        """Создать FTS5-индексы; при первом создании — проиндексировать существующие строки."""
+        row = conn.execute(
+            "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'notes_fts'"
+        ).fetchone()
+        existed = row is not None
+        if existed and "trigram" not in row["sql"]:
+            # Индексы по словам из прежних версий — пересоздаём с trigram
+            conn.execute("DROP TABLE notes_fts")
+            conn.execute("DROP TABLE IF EXISTS tasks_fts")
+            existed = False
+        try:
+            conn.executescript(FTS_SCHEMA_SQL)
+        except sqlite3.OperationalError as e:
+            logger.warning(f"FTS5 недоступен, поиск через LIKE: {e}")
+            self._fts_available = False
+            return
+        if not existed:
+            conn.execute("INSERT INTO notes_fts (notes_fts) VALUES ('rebuild')")
+            conn.execute("INSERT INTO tasks_fts (tasks_fts) VALUES ('rebuild')")
+        self._fts_available = True
+
     def close(self):
         """Закрыть подключение."""
         if self._conn:
@@ -140,6 +254,37 @@ class Database:
             self._conn = None
 
     # --- Заметки ---
+    def _executemany(self, sql: str, rows: Iterable[tuple]) -> int:
+        """executemany одной транзакцией; при ошибке пачка откатывается целиком."""
+        conn = self.connect()
+        try:
+            cur = conn.executemany(sql, rows)
+        except Exception:
+            conn.rollback()
+            raise
+        conn.commit()
+        return cur.rowcount
+
+    def _note_dict(self, row: sqlite3.Row) -> Dict:
+        """Строка заметки -> dict с уже разобранным списком tags."""
+        note = dict(row)
+        raw = note.get("tags")
+        if isinstance(raw, str):
+            note_id, updated_at = note.get("id"), note.get("updated_at")
+            cached = self._note_tags_cache.get(note_id)
+            if cached is not None and cached[0] == updated_at:
+                tags = cached[1]
+            else:
+                try:
+                    tags = json.loads(raw) if raw else []
+                except ValueError:
+                    tags = []
+                self._note_tags_cache[note_id] = (updated_at, tags)
+            note["tags"] = list(tags)
+        elif raw is None:
+            note["tags"] = []
+        return note
+
     def get_notes(self, folder: Optional[str] = None, limit: int = 100) -> List[Dict]:
         conn = self.connect()
         if folder:
@@ -152,12 +297,12 @@ class Database:
                 "SELECT * FROM notes ORDER BY is_pinned DESC, updated_at DESC LIMIT ?",
                 (limit,),
             ).fetchall()
-        return [dict(r) for r in rows]
+        return [self._note_dict(r) for r in rows]
 
     def get_note(self, note_id: int) -> Optional[Dict]:
         conn = self.connect()
         row = conn.execute("SELECT * FROM notes WHERE id = ?", (note_id,)).fetchone()
-        return dict(row) if row else None
+        return self._note_dict(row) if row else None
 
     def create_note(self, title: str, content: str = "", folder: str = "Inbox", tags: list = None) -> int:
         conn = self.connect()
@@ -168,19 +313,33 @@ class Database:
         conn.commit()
         return cur.lastrowid
 
+    def create_notes_bulk(self, notes: Iterable[Dict]) -> int:
+        """Вставить пачку заметок (ключи как у create_note) одной транзакцией."""
+        return self._executemany(
+            "INSERT INTO notes (title, content, folder, tags) VALUES (?, ?, ?, ?)",
+            (
+                (n.get("title", ""), n.get("content", ""), n.get("folder", "Inbox"),
+                 json.dumps(n.get("tags") or []))
+                for n in notes
+            ),
+        )
+
     def update_note(self, note_id: int, **kwargs):
         conn = self.connect()
         allowed = {"title", "content", "folder", "tags", "is_pinned", "vector_id"}
         fields = {k: v for k, v in kwargs.items() if k in allowed}
         if "tags" in fields and isinstance(fields["tags"], list):
             fields["tags"] = json.dumps(fields["tags"])
-        fields["updated_at"] = datetime.now().isoformat()
-        set_clause = ", ".join(f"{k} = ?" for k in fields)
+        # updated_at проставляет сама SQLite — без datetime.now() на каждую правку
+        set_clause = ", ".join([f"{k} = ?" for k in fields] + ["updated_at = CURRENT_TIMESTAMP"])
         values = list(fields.values()) + [note_id]
+        # CURRENT_TIMESTAMP с точностью до секунды — кеш тегов сбрасываем явно
+        self._note_tags_cache.pop(note_id, None)
         conn.execute(f"UPDATE notes SET {set_clause} WHERE id = ?", values)
         conn.commit()
 
     def delete_note(self, note_id: int):
+        self._note_tags_cache.pop(note_id, None)
         conn = self.connect()
         conn.execute("DELETE FROM notes WHERE id = ?", (note_id,))
         conn.commit()
@@ -200,6 +359,23 @@ class Database:
             ).fetchall()
         return [dict(r) for r in rows]
 
+    def get_tasks_board(self, per_status: int = 100) -> List[Dict]:
+        """Задачи для канбана одним запросом: не больше per_status на каждый статус."""
+        conn = self.connect()
+        rows = conn.execute(
+            "SELECT * FROM ("
+            "  SELECT *, ROW_NUMBER() OVER (PARTITION BY status ORDER BY priority ASC, due_date ASC) AS rn"
+            "  FROM tasks"
+            ") WHERE rn <= ? ORDER BY status, priority ASC, due_date ASC",
+            (per_status,),
+        ).fetchall()
+        return [dict(r) for r in rows]
+
+    def get_task(self, task_id: int) -> Optional[Dict]:
+        conn = self.connect()
+        row = conn.execute("SELECT * FROM tasks WHERE id = ?", (task_id,)).fetchone()
+        return dict(row) if row else None
+
     def create_task(self, title: str, description: str = "", status: str = "todo",
                     priority: int = 2, due_date: str = None, project: str = "") -> int:
         conn = self.connect()
@@ -210,12 +386,23 @@ class Database:
         conn.commit()
         return cur.lastrowid
 
+    def create_tasks_bulk(self, tasks: Iterable[Dict]) -> int:
+        """Вставить пачку задач (ключи как у create_task) одной транзакцией."""
+        return self._executemany(
+            "INSERT INTO tasks (title, description, status, priority, due_date, project) VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                (t.get("title", ""), t.get("description", ""), t.get("status", "todo"),
+                 t.get("priority", 2), t.get("due_date"), t.get("project", ""))
+                for t in tasks
+            ),
+        )
+
     def update_task(self, task_id: int, **kwargs):
         conn = self.connect()
         allowed = {"title", "description", "status", "priority", "due_date", "project", "parent_task_id"}
         fields = {k: v for k, v in kwargs.items() if k in allowed}
-        fields["updated_at"] = datetime.now().isoformat()
-        set_clause = ", ".join(f"{k} = ?" for k in fields)
+        # updated_at проставляет сама SQLite — без datetime.now() на каждую правку
+        set_clause = ", ".join([f"{k} = ?" for k in fields] + ["updated_at = CURRENT_TIMESTAMP"])
         values = list(fields.values()) + [task_id]
         conn.execute(f"UPDATE tasks SET {set_clause} WHERE id = ?", values)
         conn.commit()
@@ -244,6 +431,15 @@ class Database:
         rows = conn.execute(query, params).fetchall()
         return [dict(r) for r in rows]
 
+    def get_events_in_range(self, start_from: str, start_to: str, limit: int = 500) -> List[Dict]:
+        """События в полуинтервале [start_from, start_to) — один и тот же SQL для кеша выражений SQLite."""
+        conn = self.connect()
+        rows = conn.execute(
+            "SELECT * FROM calendar_events WHERE start_time >= ? AND start_time < ? ORDER BY start_time ASC LIMIT ?",
+            (start_from, start_to, limit),
+        ).fetchall()
+        return [dict(r) for r in rows]
+
     def create_event(self, title: str, start_time: str, end_time: str = None,
                      description: str = "", location: str = "", is_all_day: bool = False, color: str = "") -> int:
         conn = self.connect()
@@ -255,12 +451,25 @@ class Database:
         conn.commit()
         return cur.lastrowid
 
+    def create_events_bulk(self, events: Iterable[Dict]) -> int:
+        """Вставить пачку событий (ключи как у create_event) одной транзакцией."""
+        return self._executemany(
+            "INSERT INTO calendar_events (title, start_time, end_time, description, location, is_all_day, color) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (
+                (ev.get("title", ""), ev.get("start_time", ""), ev.get("end_time"),
+                 ev.get("description", ""), ev.get("location", ""),
+                 ev.get("is_all_day", False), ev.get("color", ""))
+                for ev in events
+            ),
+        )
+
     def update_event(self, event_id: int, **kwargs):
         conn = self.connect()
         allowed = {"title", "description", "start_time", "end_time", "location", "is_all_day", "color"}
         fields = {k: v for k, v in kwargs.items() if k in allowed}
-        fields["updated_at"] = datetime.now().isoformat()
-        set_clause = ", ".join(f"{k} = ?" for k in fields)
+        # updated_at проставляет сама SQLite — без datetime.now() на каждую правку
+        set_clause = ", ".join([f"{k} = ?" for k in fields] + ["updated_at = CURRENT_TIMESTAMP"])
         values = list(fields.values()) + [event_id]
         conn.execute(f"UPDATE calendar_events SET {set_clause} WHERE id = ?", values)
         conn.commit()
@@ -280,6 +489,12 @@ class Database:
             (session_id, role, content, provider, json.dumps(context or {}), tokens),
         )
         conn.commit()
+        # Write-through: сессия с новым сообщением становится первой в списке
+        cache = self._sessions_cache
+        if cache is not None and (not cache or cache[0] != session_id):
+            if session_id in cache:
+                cache.remove(session_id)
+            cache.insert(0, session_id)
 
     def get_chat_history(self, session_id: str = "default", limit: int = 50) -> List[Dict]:
         conn = self.connect()
@@ -290,22 +505,53 @@ class Database:
         return [dict(r) for r in rows]
 
     def get_chat_sessions(self) -> List[str]:
+        if self._sessions_cache is None:
+            conn = self.connect()
+            rows = conn.execute(
+                "SELECT session_id FROM chat_sessions ORDER BY last_message_at DESC"
+            ).fetchall()
+            self._sessions_cache = [r["session_id"] for r in rows]
+        return list(self._sessions_cache)
+
+    def get_max_session_suffix(self, date_prefix: str) -> Optional[int]:
+        """Максимальный числовой суффикс сессий вида «prefix» / «prefix.N».
+
+        Сессия без суффикса считается как -1; None — сессий с таким префиксом нет.
+        """
         conn = self.connect()
-        rows = conn.execute(
-            "SELECT session_id FROM chat_history GROUP BY session_id ORDER BY MAX(created_at) DESC"
-        ).fetchall()
-        return [r["session_id"] for r in rows]
+        start = len(date_prefix) + 2
+        row = conn.execute(
+            "SELECT MAX(CASE WHEN session_id = ? THEN -1 ELSE CAST(substr(session_id, ?) AS INTEGER) END) "
+            "FROM chat_sessions WHERE session_id = ? OR (session_id GLOB ? "
+            "AND substr(session_id, ?) != '' AND substr(session_id, ?) NOT GLOB '*[^0-9]*')",
+            (date_prefix, start, date_prefix, date_prefix + ".*", start, start),
+        ).fetchone()
+        return row[0]
 
     # --- База знаний ---
-    def add_document(self, filename: str, filepath: str, filetype: str, title: str = "") -> int:
+    def add_document(self, filename: str, filepath: str, filetype: str, title: str = "",
+                     content_hash: str = None) -> int:
         conn = self.connect()
         cur = conn.execute(
-            "INSERT INTO knowledge_documents (filename, filepath, filetype, title) VALUES (?, ?, ?, ?)",
-            (filename, filepath, filetype, title or filename),
+            "INSERT INTO knowledge_documents (filename, filepath, filetype, title, content_hash) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (filename, filepath, filetype, title or filename, content_hash),
         )
         conn.commit()
         return cur.lastrowid
 
+    def add_documents_bulk(self, documents: Iterable[Dict]) -> int:
+        """Вставить пачку метаданных документов (ключи как у add_document) одной транзакцией."""
+        return self._executemany(
+            "INSERT INTO knowledge_documents (filename, filepath, filetype, title, content_hash) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (
+                (d.get("filename", ""), d.get("filepath", ""), d.get("filetype", ""),
+                 d.get("title") or d.get("filename", ""), d.get("content_hash"))
+                for d in documents
+            ),
+        )
+
     def get_documents(self, limit: int = 100) -> List[Dict]:
         conn = self.connect()
         rows = conn.execute(
@@ -313,9 +559,31 @@ class Database:
         ).fetchall()
         return [dict(r) for r in rows]
 
+    def get_document(self, doc_id: int) -> Optional[Dict]:
+        conn = self.connect()
+        row = conn.execute("SELECT * FROM knowledge_documents WHERE id = ?", (doc_id,)).fetchone()
+        return dict(row) if row else None
+
+    def get_processed_document_by_hash(self, content_hash: str) -> Optional[Dict]:
+        """Уже обработанный документ с тем же содержимым (для повторного использования чанков)."""
+        conn = self.connect()
+        row = conn.execute(
+            "SELECT * FROM knowledge_documents WHERE content_hash = ? AND processed = 1 LIMIT 1",
+            (content_hash,),
+        ).fetchone()
+        return dict(row) if row else None
+
+    def count_chunk_references(self, source_id: int, exclude_id: int = None) -> int:
+        """Сколько документов используют чанки векторной базы, записанные под source_id."""
+        conn = self.connect()
+        return conn.execute(
+            "SELECT COUNT(*) FROM knowledge_documents WHERE (id = ? OR chunk_source_id = ?) AND id != ?",
+            (source_id, source_id, exclude_id if exclude_id is not None else -1),
+        ).fetchone()[0]
+
     def update_document(self, doc_id: int, **kwargs):
         conn = self.connect()
-        allowed = {"title", "summary", "tags", "processed", "chunk_count"}
+        allowed = {"title", "summary", "tags", "processed", "chunk_count", "chunk_source_id"}
         fields = {k: v for k, v in kwargs.items() if k in allowed}
         if "tags" in fields and isinstance(fields["tags"], list):
             fields["tags"] = json.dumps(fields["tags"])
@@ -339,22 +607,49 @@ class Database:
         conn.commit()
 
     # --- Поиск ---
-    def search_notes(self, query: str) -> List[Dict]:
+    def search_notes(self, query: str, snippet_chars: Optional[int] = None) -> List[Dict]:
+        """Поиск заметок. С snippet_chars — только id, title и snippet (substr в SQLite, без полного content)."""
         conn = self.connect()
-        rows = conn.execute(
-            "SELECT * FROM notes WHERE title LIKE ? OR content LIKE ? ORDER BY updated_at DESC LIMIT 20",
-            (f"%{query}%", f"%{query}%"),
-        ).fetchall()
-        return [dict(r) for r in rows]
+        columns = "n.id, n.title, substr(n.content, 1, ?) AS snippet" if snippet_chars else "n.*"
+        head = (snippet_chars,) if snippet_chars else ()
+        match = _fts_query(query) if self._fts_available else ""
+        if match:
+            rows = conn.execute(
+                f"SELECT {columns} FROM notes_fts f JOIN notes n ON n.id = f.rowid "
+                "WHERE notes_fts MATCH ? ORDER BY bm25(notes_fts) LIMIT 20",
+                head + (match,),
+            ).fetchall()
+        else:
+            rows = conn.execute(
+                f"SELECT {columns} FROM notes n WHERE n.title LIKE ? OR n.content LIKE ? "
+                "ORDER BY n.updated_at DESC LIMIT 20",
+                head + (f"%{query}%", f"%{query}%"),
+            ).fetchall()
+        if snippet_chars:
+            return [dict(r) for r in rows]
+        return [self._note_dict(r) for r in rows]
 
-    def search_tasks(self, query: str) -> List[Dict]:
+    def search_tasks(self, query: str, snippet_chars: Optional[int] = None) -> List[Dict]:
+        """Поиск задач. С snippet_chars — только id, title, status и snippet описания."""
         conn = self.connect()
-        rows = conn.execute(
-            "SELECT * FROM tasks WHERE title LIKE ? OR description LIKE ? ORDER BY updated_at DESC LIMIT 20",
-            (f"%{query}%", f"%{query}%"),
-        ).fetchall()
+        columns = (
+            "t.id, t.title, t.status, substr(t.description, 1, ?) AS snippet" if snippet_chars else "t.*"
+        )
+        head = (snippet_chars,) if snippet_chars else ()
+        match = _fts_query(query) if self._fts_available else ""
+        if match:
+            rows = conn.execute(
+                f"SELECT {columns} FROM tasks_fts f JOIN tasks t ON t.id = f.rowid "
+                "WHERE tasks_fts MATCH ? ORDER BY bm25(tasks_fts) LIMIT 20",
+                head + (match,),
+            ).fetchall()
+        else:
+            rows = conn.execute(
+                f"SELECT {columns} FROM tasks t WHERE t.title LIKE ? OR t.description LIKE ? "
+                "ORDER BY t.updated_at DESC LIMIT 20",
+                head + (f"%{query}%", f"%{query}%"),
+            ).fetchall()
         return [dict(r) for r in rows]
 
-
 # Глобальный экземпляр
 db = Database()
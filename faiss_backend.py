@@ -0,0 +1,326 @@
+"""
+Sphere — векторное хранилище на FAISS с интерфейсом коллекции ChromaDB.
+
+VectorDB работает с ним так же, как с коллекцией Chroma (add / query / delete / count),
+поэтому пакетная запись и кэши поиска остаются общими для обоих бэкендов.
+Векторы лежат в индексе FAISS, тексты и метаданные — в SQLite рядом с ним.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import faiss
+import numpy as np
+from loguru import logger
+
+# До скольких векторов точный перебор (IndexFlatIP) быстрее и точнее IVF
+FAISS_IVF_THRESHOLD = 100_000
+FAISS_IVF_NLIST = 100
+FAISS_IVF_NPROBE = 10
+# IVF-PQ (quantize=True): байт на вектор в коде PQ (по 8 бит на подвектор) и во сколько
+# раз больше кандидатов PQ пересчитывается по int8-копиям векторов (reorder-индекс)
+FAISS_PQ_MAX_M = 48
+FAISS_PQ_NBITS = 8
+FAISS_PQ_REFINE = 10
+# Во сколько раз больше кандидатов достаём при фильтре where (фильтр — после поиска)
+FAISS_WHERE_OVERFETCH = 10
+# Не чаще чем раз в столько секунд индекс переписывается на диск при записи;
+# тексты в SQLite фиксируются сразу, а недописанный индекс пересобирается при загрузке
+FAISS_PERSIST_INTERVAL = 60
+
+INDEX_FILE = "index.faiss"
+REORDER_FILE = "reorder.faiss"
+# Поколение записей docs, которому соответствует сохранённый индекс
+GENERATION_FILE = "index.gen"
+DOCS_FILE = "docs.sqlite"
+
+
+def _normalized(vectors) -> np.ndarray:
+    """float32-матрица с единичными строками: скалярное произведение = косинус."""
+    matrix = np.ascontiguousarray(vectors, dtype=np.float32)
+    if matrix.ndim == 1:
+        matrix = matrix[None, :]
+    faiss.normalize_L2(matrix)
+    return matrix
+
+
+def _matches(metadata: Dict, where: Optional[Dict]) -> bool:
+    """Простой фильтр where: равенство всех указанных полей."""
+    return not where or all(metadata.get(k) == v for k, v in where.items())
+
+
+class FAISSBackend:
+    """Коллекция поверх FAISS: косинусная метрика, как у sphere_main в Chroma."""
+
+    def __init__(self, persist_dir: Path, embedding_fn: Callable, quantize: bool = False):
+        self.persist_dir = persist_dir
+        self.quantize = quantize
+        self._embedding_fn = embedding_fn
+        self._index = None
+        # int8-копии векторов для пересчёта кандидатов IVF-PQ; только вместе с IndexIVFPQ
+        self._reorder = None
+        self._dirty = False
+        self._persisted_at = time.monotonic()
+        self._lock = threading.RLock()
+        persist_dir.mkdir(parents=True, exist_ok=True)
+        self._docs = sqlite3.connect(str(persist_dir / DOCS_FILE), check_same_thread=False)
+        self._docs.execute(
+            "CREATE TABLE IF NOT EXISTS docs ("
+            "id INTEGER PRIMARY KEY, ext_id TEXT UNIQUE NOT NULL, document TEXT, metadata TEXT)"
+        )
+        # Счётчик изменений docs растёт в той же транзакции, что и запись текстов:
+        # совпадение числа строк не гарантирует, что индекс видел те же строки
+        self._docs.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        self._docs.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('generation', 0)")
+        self._docs.commit()
+        self._generation = self._docs.execute(
+            "SELECT value FROM meta WHERE key = 'generation'"
+        ).fetchone()[0]
+        self._load()
+
+    # --- Индекс ---
+
+    def _stored_generation(self) -> Optional[int]:
+        try:
+            return int((self.persist_dir / GENERATION_FILE).read_text())
+        except (OSError, ValueError):
+            return None
+
+    def _load(self):
+        path = self.persist_dir / INDEX_FILE
+        stored = self._docs.execute("SELECT COUNT(*) FROM docs").fetchone()[0]
+        if path.exists():
+            try:
+                # Индекс меняется на месте (add/remove), поэтому читается в память, а не через IO_FLAG_MMAP
+                self._index = faiss.read_index(str(path))
+                if isinstance(self._index, faiss.IndexIVF):
+                    self._index.nprobe = FAISS_IVF_NPROBE
+                reorder_path = self.persist_dir / REORDER_FILE
+                if isinstance(self._index, faiss.IndexIVFPQ) and reorder_path.exists():
+                    self._reorder = faiss.read_index(str(reorder_path))
+            except RuntimeError as e:
+                logger.warning(f"Индекс FAISS не читается: {e}")
+                self._index = self._reorder = None
+            if self._index is not None:
+                reorder_ok = not isinstance(self._index, faiss.IndexIVFPQ) or (
+                    self._reorder is not None and self._reorder.ntotal == stored
+                )
+                if (self._stored_generation() == self._generation
+                        and self._index.ntotal == stored and reorder_ok):
+                    return
+            logger.warning("Индекс FAISS расходится с хранилищем текстов — пересборка")
+        elif not stored:
+            return
+        self._rebuild_from_docs()
+
+    def _rebuild_from_docs(self):
+        """Пересчитать векторы всех сохранённых текстов (после сбоя до сохранения индекса)."""
+        self._index = None
+        self._reorder = None
+        rows = self._docs.execute("SELECT id, document FROM docs ORDER BY id").fetchall()
+        for start in range(0, len(rows), 256):
+            part = rows[start:start + 256]
+            vectors = _normalized(self._embedding_fn([doc for _, doc in part]))
+            self._add_vectors(vectors, np.array([i for i, _ in part], dtype=np.int64))
+        self._dirty = True
+        self.persist()
+
+    def _new_index(self, dim: int, training: Optional[np.ndarray] = None):
+        """Точный перебор с внешними ID или, если дали обучающую выборку, IVF (ID хранит сам)."""
+        if training is None or len(training) < FAISS_IVF_THRESHOLD:
+            return faiss.IndexIDMap2(faiss.IndexFlatIP(dim))
+        quantizer = faiss.IndexFlatIP(dim)
+        if self.quantize:
+            # Число подвекторов должно делить размерность: для 384 — ровно 48
+            m = max(x for x in range(1, FAISS_PQ_MAX_M + 1) if dim % x == 0)
+            ivf = faiss.IndexIVFPQ(
+                quantizer, dim, FAISS_IVF_NLIST, m, FAISS_PQ_NBITS, faiss.METRIC_INNER_PRODUCT
+            )
+        else:
+            ivf = faiss.IndexIVFFlat(quantizer, dim, FAISS_IVF_NLIST, faiss.METRIC_INNER_PRODUCT)
+        ivf.train(training)
+        ivf.nprobe = FAISS_IVF_NPROBE
+        return ivf
+
+    def _add_vectors(self, vectors: np.ndarray, ids: np.ndarray):
+        if self._index is None:
+            self._index = self._new_index(vectors.shape[1])
+        self._index.add_with_ids(vectors, ids)
+        if self._reorder is not None:
+            self._reorder.add_with_ids(vectors, ids)
+        if self._index.ntotal >= FAISS_IVF_THRESHOLD and not isinstance(self._index, faiss.IndexIVF):
+            self._switch_to_ivf()
+
+    def _switch_to_ivf(self):
+        """Перейти с точного перебора на IVF: обучить кластеры на уже сохранённых векторах."""
+        flat = faiss.downcast_index(self._index.index)
+        vectors = flat.reconstruct_n(0, flat.ntotal)
+        ids = faiss.vector_to_array(self._index.id_map)
+        index = self._new_index(vectors.shape[1], vectors)
+        index.add_with_ids(vectors, ids)
+        if self.quantize:
+            reorder = faiss.IndexIDMap2(faiss.IndexScalarQuantizer(
+                vectors.shape[1], faiss.ScalarQuantizer.QT_8bit, faiss.METRIC_INNER_PRODUCT
+            ))
+            reorder.train(vectors)
+            reorder.add_with_ids(vectors, ids)
+            self._reorder = reorder
+        self._index = index
+        kind = "IVF-PQ" if self.quantize else "IVF"
+        logger.info(f"FAISS: {len(ids)} векторов, индекс переведён на {kind} (nlist={FAISS_IVF_NLIST})")
+
+    def _search(self, queries: np.ndarray, k: int):
+        """(сходства, ID) лучших k; для IVF-PQ — пересчёт k * FAISS_PQ_REFINE кандидатов по int8-копиям."""
+        if self._reorder is None:
+            return self._index.search(queries, k)
+        _, candidates = self._index.search(queries, min(self._index.ntotal, k * FAISS_PQ_REFINE))
+        scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        ids = np.full((len(queries), k), -1, dtype=np.int64)
+        for row, (query, found) in enumerate(zip(queries, candidates)):
+            found = found[found >= 0]
+            if not len(found):
+                continue
+            vectors = np.vstack([self._reorder.reconstruct(int(i)) for i in found])
+            exact = vectors @ query
+            best = np.argsort(-exact)[:k]
+            scores[row, :len(best)] = exact[best]
+            ids[row, :len(best)] = found[best]
+        return scores, ids
+
+    def persist(self):
+        """Записать индекс на диск, если он менялся."""
+        with self._lock:
+            if self._dirty and self._index is not None:
+                faiss.write_index(self._index, str(self.persist_dir / INDEX_FILE))
+                if self._reorder is not None:
+                    faiss.write_index(self._reorder, str(self.persist_dir / REORDER_FILE))
+                # Отметка пишется последней: при сбое посреди записи она старая — индекс пересоберётся
+                marker = self.persist_dir / GENERATION_FILE
+                tmp = marker.with_suffix(".tmp")
+                tmp.write_text(str(self._generation))
+                os.replace(tmp, marker)
+                self._dirty = False
+                self._persisted_at = time.monotonic()
+
+    def _maybe_persist(self):
+        if time.monotonic() - self._persisted_at >= FAISS_PERSIST_INTERVAL:
+            self.persist()
+
+    # --- Интерфейс коллекции Chroma ---
+
+    def add(self, documents: List[str], metadatas: List[Dict], ids: List[str],
+            embeddings: Optional[list] = None):
+        vectors = _normalized(embeddings if embeddings is not None else self._embedding_fn(documents))
+        with self._lock:
+            # Сначала SQLite: её ошибки (например, повтор ID в пачке) откатываются, не трогая индекс
+            try:
+                replaced = self._delete_rows(ids)
+                cursor = self._docs.cursor()
+                row_ids = []
+                for ext_id, document, metadata in zip(ids, documents, metadatas):
+                    cursor.execute(
+                        "INSERT INTO docs (ext_id, document, metadata) VALUES (?, ?, ?)",
+                        (ext_id, document, json.dumps(metadata or {}, ensure_ascii=False)),
+                    )
+                    row_ids.append(cursor.lastrowid)
+            except Exception:
+                self._docs.rollback()
+                raise
+            try:
+                self._remove_vectors(replaced)
+                self._add_vectors(vectors, np.array(row_ids, dtype=np.int64))
+            except Exception:
+                self._docs.rollback()
+                logger.error("Ошибка записи в индекс FAISS — пересборка из хранилища текстов")
+                self._rebuild_from_docs()
+                raise
+            self._commit_docs()
+            self._maybe_persist()
+
+    def query(self, n_results: int = 10, where: Optional[Dict] = None, include=None,
+              query_embeddings: Optional[list] = None, query_texts: Optional[List[str]] = None) -> Dict:
+        if query_embeddings is None:
+            query_embeddings = self._embedding_fn(query_texts)
+        queries = _normalized(query_embeddings)
+        result = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+        with self._lock:
+            if self._index is None or not self._index.ntotal:
+                for key in result:
+                    result[key] = [[] for _ in range(len(queries))]
+                return result
+            k = min(self._index.ntotal, n_results * (FAISS_WHERE_OVERFETCH if where else 1))
+            scores, row_ids = self._search(queries, k)
+            wanted = {int(i) for i in row_ids.ravel() if i >= 0}
+            rows = {
+                row[0]: row[1:]
+                for row in self._docs.execute(
+                    f"SELECT id, ext_id, document, metadata FROM docs WHERE id IN ({','.join('?' * len(wanted))})",
+                    tuple(wanted),
+                )
+            } if wanted else {}
+        for query_scores, query_ids in zip(scores, row_ids):
+            hits = []
+            for score, row_id in zip(query_scores, query_ids):
+                row = rows.get(int(row_id))
+                if row is None:
+                    continue
+                metadata = json.loads(row[2])
+                if _matches(metadata, where):
+                    hits.append((row[0], row[1], metadata, 1.0 - float(score)))
+                    if len(hits) == n_results:
+                        break
+            result["ids"].append([h[0] for h in hits])
+            result["documents"].append([h[1] for h in hits])
+            result["metadatas"].append([h[2] for h in hits])
+            result["distances"].append([h[3] for h in hits])
+        return result
+
+    def _delete_rows(self, ids: List[str]) -> List[int]:
+        """Удалить строки docs (без commit) и вернуть их ID в индексе."""
+        placeholders = ",".join("?" * len(ids))
+        row_ids = [
+            r[0] for r in self._docs.execute(f"SELECT id FROM docs WHERE ext_id IN ({placeholders})", ids)
+        ]
+        if row_ids:
+            self._docs.execute(f"DELETE FROM docs WHERE id IN ({','.join('?' * len(row_ids))})", row_ids)
+        return row_ids
+
+    def _remove_vectors(self, row_ids: List[int]):
+        if not row_ids:
+            return
+        if self._index is not None:
+            self._index.remove_ids(np.array(row_ids, dtype=np.int64))
+        if self._reorder is not None:
+            self._reorder.remove_ids(np.array(row_ids, dtype=np.int64))
+
+    def _commit_docs(self):
+        """Зафиксировать изменения docs вместе с новым поколением (под self._lock)."""
+        self._docs.execute("UPDATE meta SET value = value + 1 WHERE key = 'generation'")
+        self._docs.commit()
+        self._generation += 1
+        self._dirty = True
+
+    def delete(self, ids: List[str]):
+        if not ids:
+            return
+        with self._lock:
+            row_ids = self._delete_rows(ids)
+            if not row_ids:
+                return
+            self._remove_vectors(row_ids)
+            self._commit_docs()
+            self._maybe_persist()
+
+    def count(self) -> int:
+        with self._lock:
+            return self._index.ntotal if self._index is not None else 0
+
+    def close(self):
+        with self._lock:
+            self.persist()
+            self._docs.close()
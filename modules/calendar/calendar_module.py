@@ -2,6 +2,7 @@
 Sphere — Модуль календаря.
 """
 
+import asyncio
 import flet as ft
 from datetime import datetime, timedelta, date
 from typing import Optional, List, Dict
@@ -93,22 +94,31 @@ class CalendarModule:
         )
 
     def _load_events(self):
-        """Загрузить события за текущий месяц."""
-        first_day = self.current_date.replace(day=1)
-        if self.current_date.month == 12:
-            last_day = self.current_date.replace(year=self.current_date.year + 1, month=1, day=1)
-        else:
-            last_day = self.current_date.replace(month=self.current_date.month + 1, day=1)
+        """Загрузить события за текущий месяц (синхронно, для первичного build)."""
+        self.events_list.controls = self._build_event_controls(self.current_date)
+
+    async def _load_events_async(self):
+        """Загрузить события за текущий месяц вне UI-потока и применить результат."""
+        current = self.current_date
+        controls = await asyncio.to_thread(self._build_event_controls, current)
+        # Пока грузили, пользователь мог переключить месяц — устаревший результат отбрасываем
+        if current != self.current_date:
+            return
+        self.events_list.controls = controls
+        self.page.update()
 
-        events = self.db.get_events(
-            start_from=first_day.isoformat(),
-            start_to=last_day.isoformat(),
-        )
+    def _build_event_controls(self, current: date) -> List[ft.Control]:
+        """Запрос событий месяца и построение карточек (без обращения к странице)."""
+        first_day = current.replace(day=1)
+        if current.month == 12:
+            last_day = current.replace(year=current.year + 1, month=1, day=1)
+        else:
+            last_day = current.replace(month=current.month + 1, day=1)
 
-        self.events_list.controls.clear()
+        events = self.db.get_events_in_range(first_day.isoformat(), last_day.isoformat())
 
         if not events:
-            self.events_list.controls.append(
+            return [
                 ft.Container(
                     content=ft.Column(
                         [
@@ -125,8 +135,7 @@ class CalendarModule:
                     alignment=ft.Alignment.CENTER,
                     padding=ft.padding.all(40),
                 )
-            )
-            return
+            ]
 
         # Группируем по дням
         days = {}
@@ -136,6 +145,9 @@ class CalendarModule:
                 days[day_str] = []
             days[day_str].append(ev)
 
+        # Собираем контролы в локальный список и присваиваем разом — один diff для Flet
+        new_controls = []
+        append = new_controls.append
         for day_str in sorted(days.keys()):
             # Заголовок дня
             try:
@@ -146,7 +158,7 @@ class CalendarModule:
 
             is_today = day_str == date.today().isoformat()
 
-            self.events_list.controls.append(
+            append(
                 ft.Container(
                     content=ft.Text(
                         day_label + (" — Сегодня" if is_today else ""),
@@ -159,7 +171,9 @@ class CalendarModule:
             )
 
             for ev in days[day_str]:
-                self.events_list.controls.append(self._event_card(ev))
+                append(self._event_card(ev))
+
+        return new_controls
 
     def _event_card(self, event: dict) -> ft.Container:
         """Карточка события."""
@@ -219,29 +233,29 @@ class CalendarModule:
         ]
         return f"{months[d.month - 1]} {d.year}"
 
-    def _prev_month(self, e):
+    async def _prev_month(self, e):
         if self.current_date.month == 1:
             self.current_date = self.current_date.replace(year=self.current_date.year - 1, month=12)
         else:
             self.current_date = self.current_date.replace(month=self.current_date.month - 1)
         self.date_label.value = self._format_month(self.current_date)
-        self._load_events()
-        self.page.update()
+        self.date_label.update()
+        await self._load_events_async()
 
-    def _next_month(self, e):
+    async def _next_month(self, e):
         if self.current_date.month == 12:
             self.current_date = self.current_date.replace(year=self.current_date.year + 1, month=1)
         else:
             self.current_date = self.current_date.replace(month=self.current_date.month + 1)
         self.date_label.value = self._format_month(self.current_date)
-        self._load_events()
-        self.page.update()
+        self.date_label.update()
+        await self._load_events_async()
 
-    def _go_today(self, e):
+    async def _go_today(self, e):
         self.current_date = date.today()
         self.date_label.value = self._format_month(self.current_date)
-        self._load_events()
-        self.page.update()
+        self.date_label.update()
+        await self._load_events_async()
 
     def _on_view_change(self, e):
         selected = e.control.selected
@@ -285,8 +299,7 @@ class CalendarModule:
                     location=location_field.value or "",
                 )
             self.page.pop_dialog()
-            self._load_events()
-            self.page.update()
+            self.page.run_task(self._load_events_async)
             event_bus.emit(Events.EVENT_CREATED if not is_edit else Events.EVENT_UPDATED)
 
         dialog = ft.AlertDialog(
@@ -304,6 +317,5 @@ class CalendarModule:
 
     def _delete_event(self, event_id: int):
         self.db.delete_event(event_id)
-        self._load_events()
-        self.page.update()
+        self.page.run_task(self._load_events_async)
         event_bus.emit(Events.EVENT_DELETED, {"id": event_id})
@@ -4,8 +4,10 @@ Sphere — Модуль чата с ИИ.
 
 import flet as ft
 import asyncio
+import time
+from collections import OrderedDict
 from datetime import datetime
-from typing import Optional
+from typing import Optional, List
 
 from core.ai_engine import AIEngine
 from core.event_bus import event_bus, Events
@@ -14,6 +16,34 @@ from ui.layouts.chat_layout import ChatLayout
 from loguru import logger
 
 
+# Кеш контекста для _gather_context: размер LRU и время жизни записи (сек)
+CONTEXT_CACHE_SIZE = 128
+CONTEXT_CACHE_TTL = 60.0
+
+# Окно (сек), за которое векторные запросы из чата собираются в один батч
+VECTOR_BATCH_WINDOW = 0.05
+
+# События, после которых найденный ранее контекст мог устареть
+_CONTEXT_INVALIDATING_EVENTS = (
+    Events.NOTE_CREATED, Events.NOTE_UPDATED, Events.NOTE_DELETED,
+    Events.TASK_CREATED, Events.TASK_UPDATED, Events.TASK_DELETED,
+    Events.EVENT_CREATED, Events.EVENT_UPDATED, Events.EVENT_DELETED,
+    Events.DOCUMENT_PROCESSED, Events.DATA_CHANGED,
+)
+
+
+def _dedupe(items: List[dict], field: str) -> List[dict]:
+    """Убрать повторы по значению поля, сохранив порядок релевантности."""
+    seen = set()
+    unique = []
+    for item in items:
+        value = item.get(field)
+        if value not in seen:
+            seen.add(value)
+            unique.append(item)
+    return unique
+
+
 class ChatModule:
     """Модуль чата с ИИ-ассистентом. ИИ ищет по заметкам, задачам и документам пользователя."""
 
@@ -25,6 +55,16 @@ class ChatModule:
         self.config = config
         self.current_session = "default"
         self.layout: Optional[ChatLayout] = None
+        # (запрос, режим) -> (время записи, контекст)
+        self._context_cache: "OrderedDict[tuple, tuple]" = OrderedDict()
+        for event in _CONTEXT_INVALIDATING_EVENTS:
+            event_bus.on(event, self._invalidate_context_cache)
+        # Очередь (запрос, future) для пакетного векторного поиска; создаётся в цикле событий
+        self._vector_queue: Optional[asyncio.Queue] = None
+        self._vector_worker: Optional[asyncio.Task] = None
+        # Отформатированное «ЧЧ:ММ» для текущей минуты — strftime один раз в минуту
+        self._last_minute = -1
+        self._last_minute_str = ""
 
     def build(self) -> ChatLayout:
         """Построить интерфейс чата."""
@@ -53,10 +93,12 @@ class ChatModule:
         self.layout.clear_messages()
         messages = self.db.get_chat_history(self.current_session)
         for msg in messages:
+            ts = msg.get("created_at", "")
             self.layout.add_message(
                 role=msg["role"],
                 content=msg["content"],
-                timestamp=msg.get("created_at", "")[:16].replace("T", " "),
+                # «YYYY-MM-DD[T ]HH:MM…» -> «YYYY-MM-DD HH:MM» срезами, без replace
+                timestamp=f"{ts[:10]} {ts[11:16]}" if ts else "",
             )
         # Загрузить историю в AI Engine
         self.ai.load_history(messages)
@@ -70,6 +112,14 @@ class ChatModule:
             sessions.insert(0, "default")
         self.layout.set_sessions(sessions)
 
+    def _now_hhmm(self) -> str:
+        """Текущее время «ЧЧ:ММ», закешированное в пределах минуты."""
+        minute = int(time.time()) // 60
+        if minute != self._last_minute:
+            self._last_minute = minute
+            self._last_minute_str = datetime.now().strftime("%H:%M")
+        return self._last_minute_str
+
     def send_message(self, message: str):
         """Отправить сообщение программно (например, из поиска в хедере)."""
         if message and message.strip():
@@ -81,7 +131,7 @@ class ChatModule:
             return
 
         # Добавляем сообщение пользователя в UI
-        now = datetime.now().strftime("%H:%M")
+        now = self._now_hhmm()
         self.layout.add_message("user", message, now)
 
         # Сохраняем в БД
@@ -105,7 +155,7 @@ class ChatModule:
         try:
             # Собираем контекст в зависимости от режима
             mode = self.config.ai.search_mode if self.config else "hybrid"
-            context = self._gather_context(user_message=message, mode=mode)
+            context = await self._gather_context(user_message=message, mode=mode)
 
             # Получаем ответ
             response = await self.ai.chat(message, context, mode=mode)
@@ -114,7 +164,7 @@ class ChatModule:
             self.layout.show_typing(False)
 
             # Добавляем ответ в UI (только если это всё ещё активная сессия)
-            now = datetime.now().strftime("%H:%M")
+            now = self._now_hhmm()
             if self.current_session == target_session:
                 self.layout.add_message("assistant", response, now)
                 self.layout.update()
@@ -146,7 +196,7 @@ class ChatModule:
             )
             self.layout.update()
 
-    def _gather_context(self, user_message: str = "", mode: str = "hybrid") -> dict:
+    async def _gather_context(self, user_message: str = "", mode: str = "hybrid") -> dict:
         """Собрать контекст в зависимости от режима.
         knowledge — только база знаний (поиск по заметкам, задачам, документам)
         hybrid — база знаний + задачи/события + знания модели
@@ -155,68 +205,132 @@ class ChatModule:
         if mode == "model_only":
             return {}
 
-        context = {}
+        key = (user_message.strip().lower(), mode)
+        cached = self._context_cache.get(key)
+        if cached is not None and time.monotonic() - cached[0] < CONTEXT_CACHE_TTL:
+            self._context_cache.move_to_end(key)
+            return self._copy_context(cached[1])
+
+        context = await self._collect_context(user_message, mode)
+        self._context_cache[key] = (time.monotonic(), context)
+        if len(self._context_cache) > CONTEXT_CACHE_SIZE:
+            self._context_cache.popitem(last=False)
+        return self._copy_context(context)
+
+    def _invalidate_context_cache(self, data=None):
+        """Сбросить кеш контекста после изменения данных пользователя."""
+        self._context_cache.clear()
+
+    @staticmethod
+    def _copy_context(context: dict) -> dict:
+        """Копия контекста: вызывающий код не должен портить закешированные списки."""
+        return {k: list(v) if isinstance(v, list) else v for k, v in context.items()}
+
+    async def _collect_context(self, user_message: str, mode: str) -> dict:
+        """Выполнить запросы к БД и векторной базе для _gather_context.
+
+        Подзапросы независимы, поэтому идут параллельно в потоках:
+        общее время — максимум, а не сумма их задержек.
+        """
+        from datetime import date
+
+        subqueries = {}
         # Задачи и события — только в гибриде
         if mode == "hybrid":
-            try:
-                tasks = self.db.get_tasks(status="todo", limit=5)
-                if tasks:
-                    context["tasks"] = tasks
-            except Exception:
-                pass
-            try:
-                from datetime import date
-                today = date.today().isoformat()
-                events = self.db.get_events(start_from=today, limit=5)
-                if events:
-                    context["events"] = events
-            except Exception:
-                pass
+            subqueries["tasks"] = asyncio.to_thread(self.db.get_tasks, status="todo", limit=5)
+            subqueries["events"] = asyncio.to_thread(
+                self.db.get_events, start_from=date.today().isoformat(), limit=5
+            )
 
         # Поиск по данным пользователя — в knowledge и hybrid
         if user_message and len(user_message.strip()) >= 2:
             query = user_message.strip()
-            try:
-                notes = self.db.search_notes(query)
-                if notes:
-                    context["search_notes"] = notes
-            except Exception:
-                pass
-            try:
-                tasks_found = self.db.search_tasks(query)
-                if tasks_found:
-                    context["search_tasks"] = tasks_found
-            except Exception:
-                pass
+            subqueries["search_notes"] = asyncio.to_thread(self.db.search_notes, query)
+            subqueries["search_tasks"] = asyncio.to_thread(self.db.search_tasks, query)
             if self.vector_db and self.vector_db.is_available:
-                try:
-                    docs = self.vector_db.search(query, n_results=5)
-                    if docs:
-                        context["search_docs"] = docs
-                except Exception:
-                    pass
+                subqueries["search_docs"] = self._search_docs(query)
+
+        results = await asyncio.gather(*subqueries.values(), return_exceptions=True)
+        context = {}
+        for key, result in zip(subqueries, results):
+            if isinstance(result, Exception):
+                logger.debug(f"Контекст чата, {key}: {result}")
+                continue
+            if result:
+                context[key] = result
+
+        # Источники не пересекаются (в векторной базе только документы), поэтому списки
+        # не сливаются, а очищаются от повторов: одинаковые чанки разных документов
+        # заняли бы места в топ-5 промпта
+        if "search_docs" in context:
+            context["search_docs"] = _dedupe(context["search_docs"], "document")
         return context
 
+    async def _search_docs(self, query: str) -> List[dict]:
+        """Векторный поиск через общую очередь — запросы, пришедшие почти одновременно, идут одним батчем."""
+        if self._vector_queue is None:
+            self._vector_queue = asyncio.Queue()
+        if self._vector_worker is None or self._vector_worker.done():
+            self._vector_worker = asyncio.create_task(self._vector_batch_worker())
+        future = asyncio.get_running_loop().create_future()
+        await self._vector_queue.put((query, future))
+        return await future
+
+    def close(self):
+        """Остановить фоновый обработчик векторных запросов (можно звать из любого потока)."""
+        worker, self._vector_worker = self._vector_worker, None
+        if worker is None or worker.done():
+            return
+        loop = worker.get_loop()
+        if loop.is_closed():
+            return
+        try:
+            on_loop = asyncio.get_running_loop() is loop
+        except RuntimeError:
+            on_loop = False
+        if on_loop:
+            worker.cancel()
+        else:
+            loop.call_soon_threadsafe(worker.cancel)
+
+    async def _vector_batch_worker(self):
+        """Собирать запросы за VECTOR_BATCH_WINDOW и выполнять их одним проходом."""
+        while True:
+            pending = [await self._vector_queue.get()]
+            await asyncio.sleep(VECTOR_BATCH_WINDOW)
+            while not self._vector_queue.empty():
+                pending.append(self._vector_queue.get_nowait())
+
+            queries = list(dict.fromkeys(q for q, _ in pending))
+            search_batch = getattr(self.vector_db, "search_batch", None)
+            if search_batch is not None:
+                try:
+                    batch = await asyncio.to_thread(search_batch, queries, n_results=5)
+                except Exception as e:
+                    batch = [e] * len(queries)
+            else:
+                batch = await asyncio.gather(
+                    *(asyncio.to_thread(self.vector_db.search, q, n_results=5) for q in queries),
+                    return_exceptions=True,
+                )
+
+            by_query = dict(zip(queries, batch))
+            for query, future in pending:
+                if future.done():
+                    continue
+                result = by_query[query]
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+
     def _generate_session_id(self) -> str:
         """Сгенерировать ID сессии: dd.mm.yyyy или dd.mm.yyyy.N (первый чат за день — без суффикса)."""
         date_str = datetime.now().strftime("%d.%m.%Y")
-        sessions = self.db.get_chat_sessions()
-        today_sessions = [
-            s for s in sessions
-            if s == date_str or (s.startswith(date_str + ".") and s[len(date_str) + 1 :].isdigit())
-        ]
-        if not today_sessions:
+        last = self.db.get_max_session_suffix(date_str)
+        if last is None:
             return date_str
-        numbers = []
-        for s in today_sessions:
-            if s == date_str:
-                numbers.append(-1)
-            else:
-                suffix = s[len(date_str) + 1 :]
-                if suffix.isdigit():
-                    numbers.append(int(suffix))
-        next_num = max(numbers) + 1 if numbers else 0
-        return f"{date_str}.{next_num}"
+        return f"{date_str}.{last + 1}"
 
     def _on_new_session(self):
         """Создать новую сессию чата."""
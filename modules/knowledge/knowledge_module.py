@@ -2,21 +2,57 @@
 Sphere — Модуль базы знаний.
 """
 
+import asyncio
+import codecs
 import flet as ft
+import mmap
 import os
+import re
 import shutil
+from collections import OrderedDict
 from pathlib import Path
 from typing import Optional
 
 from core.ai_engine import AIEngine
-from core.event_bus import event_bus, Events
+from core.event_bus import batched, event_bus, Events
 from database import Database
 from vector_db import VectorDB
 from config import KNOWLEDGE_DIR
 from ui.layouts.knowledge_layout import KnowledgeLayout
+from utils.file_utils import file_sha256
 from loguru import logger
 
 
+_WORD_RE = re.compile(r"\S+")
+
+# Максимум закешированных результатов поиска для Q&A
+RAG_CACHE_SIZE = 256
+
+# RAG: сколько кандидатов достаём из векторной базы и сколько оставляем после реранкинга
+RAG_OVERFETCH = 20
+RAG_TOP_K = 3
+RERANKER_MODEL = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+
+# Размер пачки чанков, отправляемых в векторную базу за один вызов
+EMBED_BATCH_SIZE = 128
+
+# Текстовые файлы крупнее порога читаются через mmap с декодированием блоками
+MMAP_TEXT_THRESHOLD = 50_000_000
+MMAP_DECODE_STRIDE = 1 << 20
+
+
+def _read_text_mmap(filepath: str) -> str:
+    """Прочитать большой UTF-8 файл через mmap без промежуточной копии всего файла в bytes."""
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    parts = []
+    with open(filepath, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        for pos in range(0, len(mm), MMAP_DECODE_STRIDE):
+            # Инкрементальный декодер корректно склеивает символы, разрезанные границей блока
+            parts.append(decoder.decode(mm[pos:pos + MMAP_DECODE_STRIDE]))
+    parts.append(decoder.decode(b"", final=True))
+    return "".join(parts)
+
+
 class KnowledgeModule:
     """Модуль базы знаний — загрузка и Q&A по документам."""
 
@@ -26,6 +62,59 @@ class KnowledgeModule:
         self.ai = ai_engine
         self.page = page
         self.layout: Optional[KnowledgeLayout] = None
+        # Кеш вопрос -> (поколение записи, фрагменты); поколение растёт при любом изменении документов
+        self._rag_cache: "OrderedDict[str, tuple]" = OrderedDict()
+        self._rag_generation = 0
+        # Cross-encoder для реранкинга RAG — загружается при первом вопросе
+        self._reranker = None
+        self._reranker_failed = False
+        event_bus.on(Events.DOCUMENT_ADDED, self._bump_rag_generation)
+        # Пачка обработанных документов сбрасывает кэш RAG один раз
+        event_bus.on(batched(Events.DOCUMENT_PROCESSED), self._bump_rag_generation)
+
+    def _bump_rag_generation(self, data=None):
+        """Документы изменились — закешированные ответы поиска устарели."""
+        self._rag_generation += 1
+
+    async def _search_fragments(self, question: str) -> list:
+        """Поиск фрагментов для RAG с кешем по нормализованному вопросу."""
+        key = question.strip().lower()
+        cached = self._rag_cache.get(key)
+        if cached is not None:
+            if cached[0] == self._rag_generation:
+                self._rag_cache.move_to_end(key)
+                return cached[1]
+            del self._rag_cache[key]
+        generation = self._rag_generation
+        candidates = await asyncio.to_thread(self.vector_db.search, question, n_results=RAG_OVERFETCH)
+        results = await asyncio.to_thread(self._rerank, question, candidates)
+        self._rag_cache[key] = (generation, results)
+        if len(self._rag_cache) > RAG_CACHE_SIZE:
+            self._rag_cache.popitem(last=False)
+        return results
+
+    def _rerank(self, question: str, candidates: list) -> list:
+        """Переранжировать кандидатов cross-encoder'ом и оставить RAG_TOP_K лучших.
+
+        Без sentence-transformers — порядок векторного поиска как есть.
+        """
+        if len(candidates) <= RAG_TOP_K:
+            return candidates
+        if self._reranker is None and not self._reranker_failed:
+            try:
+                from sentence_transformers import CrossEncoder
+                self._reranker = CrossEncoder(RERANKER_MODEL)
+            except ImportError:
+                logger.warning("sentence-transformers не установлен, реранкинг RAG отключён")
+                self._reranker_failed = True
+            except Exception as e:
+                logger.warning(f"Не удалось загрузить реранкер {RERANKER_MODEL}: {e}")
+                self._reranker_failed = True
+        if self._reranker is None:
+            return candidates[:RAG_TOP_K]
+        scores = self._reranker.predict([(question, c["document"]) for c in candidates])
+        ranked = sorted(zip(scores, range(len(candidates))), reverse=True)
+        return [candidates[i] for _, i in ranked[:RAG_TOP_K]]
 
     def build(self) -> KnowledgeLayout:
         """Построить интерфейс базы знаний."""
@@ -66,6 +155,10 @@ class KnowledgeModule:
                 filename = f.name
                 filetype = filename.rsplit(".", 1)[-1].lower() if "." in filename else "txt"
 
+                # Хеш содержимого — тот же файл повторно не парсим и не эмбеддим
+                content_hash = file_sha256(src_path)
+                existing = self.db.get_processed_document_by_hash(content_hash)
+
                 # Копируем файл в директорию знаний
                 KNOWLEDGE_DIR.mkdir(parents=True, exist_ok=True)
                 dest_path = KNOWLEDGE_DIR / filename
@@ -77,10 +170,22 @@ class KnowledgeModule:
                     filepath=str(dest_path),
                     filetype=filetype,
                     title=filename.rsplit(".", 1)[0],
+                    content_hash=content_hash,
                 )
 
-                # Обрабатываем документ
-                self.page.run_task(self._process_document, doc_id, str(dest_path), filetype)
+                if existing:
+                    # Ссылаемся на уже записанные чанки исходного документа
+                    self.db.update_document(
+                        doc_id,
+                        processed=True,
+                        chunk_count=existing.get("chunk_count", 0),
+                        summary=existing.get("summary", ""),
+                        chunk_source_id=existing.get("chunk_source_id") or existing["id"],
+                    )
+                    event_bus.emit_batched(Events.DOCUMENT_PROCESSED, {"id": doc_id})
+                else:
+                    # Обрабатываем документ
+                    self.page.run_task(self._process_document, doc_id, str(dest_path), filetype)
 
                 logger.info(f"Документ загружен: {filename}")
                 event_bus.emit(Events.DOCUMENT_ADDED, {"id": doc_id, "filename": filename})
@@ -94,18 +199,49 @@ class KnowledgeModule:
     async def _process_document(self, doc_id: int, filepath: str, filetype: str):
         """Обработать документ — извлечь текст и создать эмбеддинги."""
         try:
-            text = self._extract_text(filepath, filetype)
+            # Парсинг, чанкинг и эмбеддинги блокируют — уводим их из цикла событий UI
+            text = await asyncio.to_thread(self._extract_text, filepath, filetype)
             if not text:
+                logger.warning(f"Документ {doc_id}: текст не извлечён, документ не обработан")
                 return
 
             # Разбиваем на чанки
-            chunks = self._split_text(text, chunk_size=500, overlap=50)
+            chunks = await asyncio.to_thread(self._split_text, text, 500, 50)
 
             # Добавляем в векторную базу
             if self.vector_db.is_available:
                 ids = [f"doc_{doc_id}_chunk_{i}" for i in range(len(chunks))]
                 metadatas = [{"doc_id": doc_id, "chunk_index": i} for i in range(len(chunks))]
-                self.vector_db.add_texts(chunks, metadatas=metadatas, ids=ids)
+                # Пачками в фоновом пуле векторной базы: запись одной пачки перекрывается
+                # эмбеддингами следующей
+                total = len(chunks)
+                futures = self.vector_db.add_texts_async(
+                    chunks, metadatas=metadatas, ids=ids, batch_size=EMBED_BATCH_SIZE
+                )
+                try:
+                    for k, future in enumerate(futures, 1):
+                        await asyncio.wrap_future(future)
+                        if self.layout:
+                            self.layout.set_progress(min(k * EMBED_BATCH_SIZE, total) / total)
+                            self.layout.update()
+                except Exception:
+                    # chunk_count в строке документа ещё 0 — по нему записанные пачки не удалить,
+                    # поэтому убираем все ID документа сейчас, дождавшись уже начатых пачек
+                    for future in futures:
+                        future.cancel()
+                    await asyncio.gather(
+                        *(asyncio.wrap_future(f) for f in futures if not f.cancelled()),
+                        return_exceptions=True,
+                    )
+                    try:
+                        await asyncio.to_thread(self.vector_db.delete, ids)
+                    except Exception as e:
+                        logger.error(f"Не удалось убрать чанки документа {doc_id}: {e}")
+                    raise
+                finally:
+                    if self.layout:
+                        self.layout.set_progress(None)
+                        self.layout.update()
 
             # Генерируем краткое содержание
             summary = text[:500] + "..." if len(text) > 500 else text
@@ -118,9 +254,14 @@ class KnowledgeModule:
                 summary=summary,
             )
 
-            self._load_documents()
-            self.layout.update()
-            event_bus.emit(Events.DOCUMENT_PROCESSED, {"id": doc_id})
+            # Меняется одна строка — патчим её, а не перечитываем весь список
+            if self.layout:
+                if not self.layout.update_document_row(
+                    doc_id, processed=True, chunk_count=len(chunks), summary=summary
+                ):
+                    self._load_documents()
+                self.layout.update()
+            event_bus.emit_batched(Events.DOCUMENT_PROCESSED, {"id": doc_id})
 
         except Exception as e:
             logger.error(f"Ошибка обработки документа: {e}")
@@ -129,6 +270,8 @@ class KnowledgeModule:
         """Извлечь текст из документа."""
         try:
             if filetype in ("txt", "md"):
+                if os.path.getsize(filepath) > MMAP_TEXT_THRESHOLD:
+                    return _read_text_mmap(filepath)
                 with open(filepath, "r", encoding="utf-8") as f:
                     return f.read()
             elif filetype == "pdf":
@@ -162,14 +305,19 @@ class KnowledgeModule:
 
     def _split_text(self, text: str, chunk_size: int = 500, overlap: int = 50) -> list:
         """Разбить текст на чанки с перекрытием."""
-        words = text.split()
-        chunks = []
-        start = 0
-        while start < len(words):
-            end = start + chunk_size
-            chunk = " ".join(words[start:end])
-            chunks.append(chunk)
-            start = end - overlap
+        # Один проход по тексту: позиции начала/конца слов, затем каждый чанк — один срез
+        # исходной строки, без split() и " ".join по сотням слов на чанк
+        starts = []
+        ends = []
+        for m in _WORD_RE.finditer(text):
+            starts.append(m.start())
+            ends.append(m.end())
+        n = len(starts)
+        stride = max(chunk_size - overlap, 1)
+        chunks = [
+            text[starts[i]:ends[min(i + chunk_size, n) - 1]]
+            for i in range(0, n, stride)
+        ]
         return chunks if chunks else [text]
 
     def _on_ask(self, question: str):
@@ -184,7 +332,7 @@ class KnowledgeModule:
         """Ответить на вопрос используя RAG."""
         try:
             # Ищем релевантные фрагменты
-            results = self.vector_db.search(question, n_results=3)
+            results = await self._search_fragments(question)
             if not results:
                 self.layout.set_answer("Не найдено релевантных документов. Загрузите документы для начала работы.")
                 self.layout.update()
@@ -213,29 +361,52 @@ class KnowledgeModule:
 
     def _on_delete(self, doc_id: int):
         """Удалить документ."""
-        # Удаляем чанки из векторной базы
+        self.page.run_task(self._delete_document, doc_id)
+
+    async def _delete_document(self, doc_id: int):
+        """Удалить строку документа и его чанки одной транзакцией, затем файл."""
+        # Выборка, DELETE и удаление из векторной базы блокируют — вне цикла событий
         try:
-            doc = None
-            for d in self.db.get_documents():
-                if d["id"] == doc_id:
-                    doc = d
-                    break
-            if doc:
-                chunk_count = doc.get("chunk_count", 0)
-                if chunk_count and self.vector_db.is_available:
-                    ids = [f"doc_{doc_id}_chunk_{i}" for i in range(chunk_count)]
-                    self.vector_db.delete(ids)
-                # Удаляем файл
-                filepath = doc.get("filepath", "")
-                if filepath and os.path.exists(filepath):
-                    os.remove(filepath)
+            doc = await asyncio.to_thread(self._delete_document_rows, doc_id)
         except Exception as e:
             logger.error(f"Ошибка удаления документа: {e}")
+            return
+        if not doc:
+            return
+        self._bump_rag_generation()
 
-        # Удаляем из БД (простой DELETE)
-        conn = self.db.connect()
-        conn.execute("DELETE FROM knowledge_documents WHERE id = ?", (doc_id,))
-        conn.commit()
+        # Удаляем файл (на сетевых ФС может блокировать — вне цикла событий)
+        filepath = doc.get("filepath", "")
+        if filepath:
+            try:
+                await asyncio.to_thread(self._remove_file, filepath)
+            except Exception as e:
+                logger.error(f"Ошибка удаления файла документа: {e}")
 
         self._load_documents()
         self.page.update()
+
+    def _delete_document_rows(self, doc_id: int) -> Optional[dict]:
+        """Удалить строку документа и его чанки одной транзакцией; вернуть удалённый документ."""
+        doc = self.db.get_document(doc_id)
+        if not doc:
+            return None
+        ids = []
+        chunk_count = doc.get("chunk_count", 0)
+        source_id = doc.get("chunk_source_id") or doc_id
+        # Чанки общие для документов с одинаковым содержимым — удаляем, когда ссылок не осталось
+        if chunk_count and self.vector_db.is_available:
+            if not self.db.count_chunk_references(source_id, exclude_id=doc_id):
+                ids = [f"doc_{source_id}_chunk_{i}" for i in range(chunk_count)]
+
+        # Если векторная база не удалила чанки — откатываем DELETE, чтобы не оставить сирот
+        with self.db.connect() as conn:
+            conn.execute("DELETE FROM knowledge_documents WHERE id = ?", (doc_id,))
+            if ids:
+                self.vector_db.delete(ids)
+        return doc
+
+    @staticmethod
+    def _remove_file(filepath: str):
+        if os.path.exists(filepath):
+            os.remove(filepath)
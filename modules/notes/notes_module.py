@@ -3,8 +3,7 @@ Sphere — Модуль заметок.
 """
 
 import flet as ft
-import json
-from typing import Optional, List
+from typing import Optional, List, Dict
 
 from core.event_bus import event_bus, Events
 from database import Database
@@ -21,6 +20,8 @@ class NotesModule:
         self.page = page
         self.current_note_id: Optional[int] = None
         self.current_folder: str = "Все"  # совпадает с selected_index=0
+        # Карточки текущего списка по id — для точечной перерисовки выделения
+        self._note_cards: Dict[int, ft.Container] = {}
 
     def build(self) -> ft.Row:
         """Построить интерфейс заметок."""
@@ -125,15 +126,9 @@ class NotesModule:
         folder = None if self.current_folder == "Все" else self.current_folder
         notes = self.db.get_notes(folder=folder)
         self.notes_list.controls.clear()
+        self._note_cards = {}
 
         for note in notes:
-            tags = note.get("tags", "[]")
-            if isinstance(tags, str):
-                try:
-                    tags = json.loads(tags)
-                except Exception:
-                    tags = []
-
             pinned_icon = ft.Icon(ft.Icons.PUSH_PIN, size=12, color=ft.Colors.AMBER) if note.get("is_pinned") else None
 
             card = ft.Container(
@@ -191,14 +186,15 @@ class NotesModule:
                 border_radius=8,
                 ink=True,
                 on_click=lambda e, nid=note["id"]: self._on_select_note(nid),
-                bgcolor=(
-                    ft.Colors.with_opacity(0.15, ft.Colors.ON_SURFACE)
-                    if note["id"] == self.current_note_id
-                    else ft.Colors.TRANSPARENT
-                ),
+                bgcolor=self._card_bgcolor(note["id"] == self.current_note_id),
             )
+            self._note_cards[note["id"]] = card
             self.notes_list.controls.append(card)
 
+    @staticmethod
+    def _card_bgcolor(selected: bool) -> str:
+        return ft.Colors.with_opacity(0.15, ft.Colors.ON_SURFACE) if selected else ft.Colors.TRANSPARENT
+
     def _on_folder_change(self, e: ft.ControlEvent):
         """Смена активной вкладки папки."""
         folders = ["Все", "Inbox", "Личное", "Работа", "Проекты", "Архив"]
@@ -210,14 +206,22 @@ class NotesModule:
 
     def _on_select_note(self, note_id: int):
         """Выбрать заметку для редактирования."""
+        previous_id = self.current_note_id
         self.current_note_id = note_id
         note = self.db.get_note(note_id)
         if note:
             self.editor.load_note(note)
             self.right_panel.content = self.editor
             self.right_panel.update()
-        self._load_notes()
-        self.notes_list.update()
+        # Список не пересобираем — перекрашиваем только старую и новую карточки
+        previous_card = self._note_cards.get(previous_id) if previous_id != note_id else None
+        if previous_card is not None:
+            previous_card.bgcolor = self._card_bgcolor(False)
+            previous_card.update()
+        card = self._note_cards.get(note_id)
+        if card is not None:
+            card.bgcolor = self._card_bgcolor(True)
+            card.update()
 
     def _on_create_note(self, e):
         """Создать новую заметку."""
@@ -246,7 +250,7 @@ class NotesModule:
                 is_pinned=data.get("is_pinned", False),
             )
             logger.info(f"Заметка #{note_id} сохранена")
-            event_bus.emit(Events.NOTE_UPDATED, {"id": note_id})
+            event_bus.emit_batched(Events.NOTE_UPDATED, {"id": note_id})
         else:
             note_id = self.db.create_note(
                 title=data["title"],
@@ -3,13 +3,106 @@ Sphere — Модуль уведомлений.
 """
 
 import asyncio
+import heapq
 import platform
-from typing import Optional
+import subprocess
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
 from loguru import logger
 
 from config import AppConfig
 from core.event_bus import event_bus, Events
 
+# Напоминание за REMINDER_LEAD до начала события
+REMINDER_LEAD = timedelta(minutes=15)
+# Страховочная пересборка очереди (события могли появиться в обход календаря — импорт, восстановление)
+REMINDER_RESCAN_INTERVAL = 3600.0
+REMINDER_SEED_LIMIT = 500
+
+_SYSTEM = platform.system()
+
+# Бэкенды уведомлений импортируются один раз и только на своей ОС
+pync = None
+plyer_notification = None
+if _SYSTEM == "Darwin":
+    try:
+        import pync
+    except ImportError:
+        pass
+elif _SYSTEM == "Windows":
+    try:
+        from plyer import notification as plyer_notification
+    except ImportError:
+        logger.warning("plyer не установлен — уведомления Windows недоступны")
+
+# Долгоживущий `osascript -i` — без fork+exec на каждое уведомление.
+# send_local зовут и из цикла событий, и из потоков Flet — процесс под замком
+_osa_process: Optional[subprocess.Popen] = None
+_osa_lock = threading.Lock()
+
+
+def _applescript_string(text: str) -> str:
+    """Строковый литерал AppleScript: экранируются только \\, " и переводы строк
+    (команда `osascript -i` читается построчно, поэтому перевод строки — \\n)."""
+    text = text.replace("\\", "\\\\").replace('"', '\\"')
+    return '"' + "\\n".join(text.splitlines()) + '"'
+
+
+def _osascript_notify(title: str, message: str):
+    """Показать уведомление через постоянный процесс `osascript -i`."""
+    global _osa_process
+    command = (
+        f"display notification {_applescript_string(message)} "
+        f"with title {_applescript_string(title)}\n"
+    )
+    with _osa_lock:
+        for _ in range(2):
+            if _osa_process is None or _osa_process.poll() is not None:
+                _osa_process = subprocess.Popen(
+                    ["osascript", "-i"],
+                    stdin=subprocess.PIPE,
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.DEVNULL,
+                    text=True,
+                )
+            try:
+                _osa_process.stdin.write(command)
+                _osa_process.stdin.flush()
+                return
+            except (BrokenPipeError, OSError):
+                # Процесс умер между вызовами — перезапускаем один раз
+                _osa_process = None
+    subprocess.run(["osascript", "-e", command.strip()], capture_output=True)
+
+
+def _notify_darwin(title: str, message: str):
+    if pync is not None:
+        pync.notify(message, title=title, app_icon="", sound="default")
+    else:
+        _osascript_notify(title, message)
+
+
+def _notify_linux(title: str, message: str):
+    subprocess.run(["notify-send", title, message], capture_output=True)
+
+
+def _notify_windows(title: str, message: str):
+    if plyer_notification is not None:
+        plyer_notification.notify(title=title, message=message, timeout=5)
+
+
+def _notify_noop(title: str, message: str):
+    pass
+
+
+_NOTIFY_IMPL = {
+    "Darwin": _notify_darwin,
+    "Linux": _notify_linux,
+    "Windows": _notify_windows,
+}.get(_SYSTEM, _notify_noop)
+
 
 class NotificationsModule:
     """Модуль уведомлений (локальные + Telegram)."""
@@ -17,6 +110,14 @@ class NotificationsModule:
     def __init__(self, config: AppConfig):
         self.config = config
         self._telegram_bot = None
+        self._telegram_token: Optional[str] = None
+        # Бэкенд уведомлений выбран один раз при импорте модуля
+        self._notify_impl = _NOTIFY_IMPL
+        # Куча (начало, id, событие) ближайших событий и уже отправленные напоминания
+        self._upcoming: List[Tuple[datetime, int, dict]] = []
+        self._reminded: set = set()
+        self._reminder_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._reminders_dirty: Optional[asyncio.Event] = None
         self._setup_listeners()
 
     def _setup_listeners(self):
@@ -24,6 +125,14 @@ class NotificationsModule:
         event_bus.on(Events.TASK_COMPLETED, self._on_task_completed)
         event_bus.on(Events.EVENT_REMINDER, self._on_event_reminder)
         event_bus.on(Events.NOTIFICATION_SEND, self._on_notification_send)
+        for event in (Events.EVENT_CREATED, Events.EVENT_UPDATED, Events.EVENT_DELETED):
+            event_bus.on(event, self._on_calendar_changed)
+
+    def _on_calendar_changed(self, data=None):
+        """Календарь изменился — разбудить планировщик напоминаний (вызов из любого потока)."""
+        loop, wake = self._reminder_loop, self._reminders_dirty
+        if loop is not None and wake is not None:
+            loop.call_soon_threadsafe(wake.set)
 
     def _on_task_completed(self, data):
         if data:
@@ -47,42 +156,22 @@ class NotificationsModule:
             )
 
     def send_local(self, title: str, message: str):
-        """Отправить локальное уведомление macOS."""
-        system = platform.system()
+        """Отправить локальное уведомление ОС."""
         try:
-            if system == "Darwin":
-                try:
-                    import pync
-                    pync.notify(
-                        message,
-                        title=title,
-                        app_icon="",
-                        sound="default",
-                    )
-                    logger.debug(f"Уведомление: {title}")
-                    return
-                except ImportError:
-                    pass
-
-                # Fallback: osascript
-                import subprocess
-                subprocess.run(
-                    ["osascript", "-e",
-                     f'display notification "{message}" with title "{title}"'],
-                    capture_output=True,
-                )
-            elif system == "Linux":
-                import subprocess
-                subprocess.run(["notify-send", title, message], capture_output=True)
-            elif system == "Windows":
-                try:
-                    from plyer import notification
-                    notification.notify(title=title, message=message, timeout=5)
-                except ImportError:
-                    pass
+            self._notify_impl(title, message)
+            logger.debug(f"Уведомление: {title}")
         except Exception as e:
             logger.error(f"Ошибка уведомления: {e}")
 
+    def _get_telegram_bot(self):
+        """Бот создаётся один раз (соединение и TLS переиспользуются); новый — при смене токена."""
+        token = self.config.telegram.bot_token
+        if self._telegram_bot is None or self._telegram_token != token:
+            from telegram import Bot
+            self._telegram_bot = Bot(token=token)
+            self._telegram_token = token
+        return self._telegram_bot
+
     async def send_telegram(self, message: str):
         """Отправить сообщение через Telegram бота."""
         if not self.config.telegram.enabled:
@@ -91,8 +180,7 @@ class NotificationsModule:
             logger.warning("Telegram бот не настроен")
             return
         try:
-            from telegram import Bot
-            bot = Bot(token=self.config.telegram.bot_token)
+            bot = self._get_telegram_bot()
             await bot.send_message(
                 chat_id=self.config.telegram.chat_id,
                 text=message,
@@ -104,9 +192,99 @@ class NotificationsModule:
         except Exception as e:
             logger.error(f"Ошибка Telegram: {e}")
 
+    def _seed_reminders(self, db) -> List[Tuple[datetime, int, dict]]:
+        """Одна выборка будущих событий → куча по времени начала."""
+        now = datetime.now()
+        events = db.get_events(
+            start_from=(now - timedelta(days=1)).strftime("%Y-%m-%d"),
+            limit=REMINDER_SEED_LIMIT,
+        )
+        heap = []
+        keys = set()
+        for ev in events:
+            raw = str(ev.get("start_time"))
+            # События на весь день (в т.ч. «YYYY-MM-DD» без времени) — без напоминания за 15 минут
+            if ev.get("is_all_day") or len(raw) <= 10:
+                continue
+            try:
+                start = datetime.fromisoformat(raw)
+            except ValueError:
+                continue
+            if start.tzinfo is not None:
+                # Время с зоной (например, «…Z» из восстановленного экспорта) — в местное наивное
+                start = start.astimezone().replace(tzinfo=None)
+            if start <= now:
+                continue
+            key = (ev["id"], raw)
+            keys.add(key)
+            if key not in self._reminded:
+                heap.append((start, ev["id"], ev))
+        # Помним только о ещё не начавшихся событиях
+        self._reminded &= keys
+        heapq.heapify(heap)
+        return heap
+
+    async def _reseed_reminders(self, db):
+        try:
+            self._upcoming = await asyncio.to_thread(self._seed_reminders, db)
+        except Exception as e:
+            # Ошибка выборки не должна останавливать планировщик — повтор при следующей пересборке
+            logger.error(f"Ошибка загрузки напоминаний: {e}")
+            self._upcoming = []
+
+    @property
+    def reminders_running(self) -> bool:
+        return self._reminder_loop is not None
+
+    def stop_reminders(self):
+        """Остановить планировщик (настройка выключена): разбудить, чтобы он вышел из цикла."""
+        self._on_calendar_changed()
+
+    async def run_reminder_scheduler(self, db):
+        """Напоминания о событиях без опроса БД: спим до ближайшего напоминания,
+        очередь пересобирается только при изменениях календаря.
+        Работает, пока включена настройка event_reminders.
+        """
+        self._reminder_loop = asyncio.get_running_loop()
+        self._reminders_dirty = wake = asyncio.Event()
+        try:
+            await self._run_reminders(db, wake)
+        finally:
+            self._reminder_loop = None
+            self._reminders_dirty = None
+            self._upcoming = []
+
+    async def _run_reminders(self, db, wake: asyncio.Event):
+        await self._reseed_reminders(db)
+        next_rescan = time.monotonic() + REMINDER_RESCAN_INTERVAL
+        while self.config.event_reminders:
+            now = datetime.now()
+            while self._upcoming and self._upcoming[0][0] - REMINDER_LEAD <= now:
+                start, event_id, ev = heapq.heappop(self._upcoming)
+                self._reminded.add((event_id, str(ev["start_time"])))
+                minutes = max(1, round((start - now).total_seconds() / 60))
+                event_bus.emit(Events.EVENT_REMINDER, {
+                    "title": f"Через {minutes} мин: {ev['title']}",
+                    "event": ev,
+                })
+            timeout = next_rescan - time.monotonic()
+            if self._upcoming:
+                timeout = min(timeout, (self._upcoming[0][0] - REMINDER_LEAD - now).total_seconds())
+            changed = False
+            try:
+                await asyncio.wait_for(wake.wait(), timeout=max(timeout, 0))
+                changed = True
+            except asyncio.TimeoutError:
+                pass
+            if not self.config.event_reminders:
+                break
+            if changed or not self._upcoming or time.monotonic() >= next_rescan:
+                wake.clear()
+                await self._reseed_reminders(db)
+                next_rescan = time.monotonic() + REMINDER_RESCAN_INTERVAL
+
     async def check_upcoming_events(self, db):
-        """Проверить ближайшие события и отправить напоминания."""
-        from datetime import datetime, timedelta
+        """Проверить ближайшие события и отправить напоминания (разовая проверка)."""
         now = datetime.now()
         soon = now + timedelta(minutes=15)
         events = db.get_events(
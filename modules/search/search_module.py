@@ -2,6 +2,9 @@
 Sphere — Модуль нейронного поиска.
 """
 
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
 import flet as ft
 from typing import Optional, List, Dict
 
@@ -10,6 +13,95 @@ from vector_db import VectorDB
 from loguru import logger
 
 
+# Окно (сек) для склейки перерисовок результатов поиска
+UPDATE_DEBOUNCE = 0.05
+
+# Длина сниппетов в карточках (обрезка на стороне БД)
+NOTE_SNIPPET_CHARS = 100
+TASK_SNIPPET_CHARS = 100
+DOC_SNIPPET_CHARS = 120
+
+# Фильтры поиска: (подпись чипа, ключ фильтра)
+SEARCH_FILTERS = (
+    ("Все", "all"),
+    ("Заметки", "notes"),
+    ("Задачи", "tasks"),
+    ("Документы", "knowledge"),
+)
+
+# Общие для всех карточек результатов неизменяемые стили
+_CARD_BORDER = ft.border.all(1, ft.Colors.with_opacity(0.08, ft.Colors.ON_SURFACE))
+_CARD_PADDING = ft.padding.all(12)
+_SNIPPET_COLOR = ft.Colors.with_opacity(0.6, ft.Colors.ON_SURFACE)
+
+# Пул для параллельных подзапросов поиска (заметки, задачи, векторная база)
+_search_pool = ThreadPoolExecutor(max_workers=3, thread_name_prefix="search")
+
+
+def _empty_placeholder() -> ft.Container:
+    """Заглушка списка результатов до первого запроса."""
+    return ft.Container(
+        content=ft.Column(
+            [
+                ft.Icon(ft.Icons.SEARCH, size=64, color=ft.Colors.with_opacity(0.15, ft.Colors.ON_SURFACE)),
+                ft.Text(
+                    "Введите запрос для поиска",
+                    size=16,
+                    color=ft.Colors.with_opacity(0.4, ft.Colors.ON_SURFACE),
+                ),
+                ft.Text(
+                    "Поиск работает по заметкам, задачам и документам",
+                    size=13,
+                    color=ft.Colors.with_opacity(0.3, ft.Colors.ON_SURFACE),
+                ),
+            ],
+            alignment=ft.MainAxisAlignment.CENTER,
+            horizontal_alignment=ft.CrossAxisAlignment.CENTER,
+            spacing=8,
+        ),
+        alignment=ft.Alignment.CENTER,
+        padding=ft.padding.all(60),
+    )
+
+
+def _build_shell(search_field: ft.TextField, search_btn: ft.Control, filter_chips: ft.Row,
+                 results_count: ft.Text, results_list: ft.ListView) -> ft.Column:
+    """Статичный каркас страницы поиска вокруг динамических контролов."""
+    return ft.Column(
+        [
+            ft.Container(
+                content=ft.Column(
+                    [
+                        ft.Container(
+                            content=ft.Row(
+                                [
+                                    ft.Icon(ft.Icons.SEARCH, color=ft.Colors.ON_SURFACE, size=20),
+                                    ft.Text("Поиск", size=16, weight=ft.FontWeight.W_600),
+                                ],
+                                spacing=8,
+                            ),
+                            padding=ft.padding.symmetric(horizontal=24, vertical=8),
+                        ),
+                        ft.Container(
+                            content=ft.Row([search_field, search_btn], spacing=12),
+                            padding=ft.padding.symmetric(horizontal=24, vertical=8),
+                        ),
+                        ft.Container(
+                            content=ft.Row([filter_chips, ft.Container(expand=True), results_count]),
+                            padding=ft.padding.symmetric(horizontal=24),
+                        ),
+                    ],
+                    spacing=0,
+                ),
+            ),
+            ft.Divider(height=1, thickness=0.5),
+            results_list,
+        ],
+        spacing=0,
+        expand=True,
+    )
+
+
 class SearchModule:
     """Модуль единого поиска по всем данным."""
 
@@ -17,9 +109,13 @@ class SearchModule:
         self.db = db
         self.vector_db = vector_db
         self.page = page
+        self._update_timer: Optional[threading.Timer] = None
+        self._view: Optional[ft.Column] = None
 
     def build(self) -> ft.Column:
-        """Построить интерфейс поиска."""
+        """Построить интерфейс поиска (дерево строится один раз на экземпляр)."""
+        if self._view is not None:
+            return self._view
         # Поле поиска
         self.search_field = ft.TextField(
             hint_text="Введите поисковый запрос...",
@@ -39,13 +135,16 @@ class SearchModule:
             height=44,
         )
 
-        # Фильтры
+        # Фильтры — один обработчик на все чипы, ключ фильтра в data
         self.filter_chips = ft.Row(
             [
-                ft.Chip(label=ft.Text("Все"), selected=True, on_select=lambda e: self._set_filter("all")),
-                ft.Chip(label=ft.Text("Заметки"), on_select=lambda e: self._set_filter("notes")),
-                ft.Chip(label=ft.Text("Задачи"), on_select=lambda e: self._set_filter("tasks")),
-                ft.Chip(label=ft.Text("Документы"), on_select=lambda e: self._set_filter("knowledge")),
+                ft.Chip(
+                    label=ft.Text(label),
+                    selected=key == "all",
+                    data=key,
+                    on_select=self._on_filter_select,
+                )
+                for label, key in SEARCH_FILTERS
             ],
             spacing=8,
         )
@@ -66,64 +165,14 @@ class SearchModule:
         )
 
         # Начальное состояние
-        self.results_list.controls.append(
-            ft.Container(
-                content=ft.Column(
-                    [
-                        ft.Icon(ft.Icons.SEARCH, size=64, color=ft.Colors.with_opacity(0.15, ft.Colors.ON_SURFACE)),
-                        ft.Text(
-                            "Введите запрос для поиска",
-                            size=16,
-                            color=ft.Colors.with_opacity(0.4, ft.Colors.ON_SURFACE),
-                        ),
-                        ft.Text(
-                            "Поиск работает по заметкам, задачам и документам",
-                            size=13,
-                            color=ft.Colors.with_opacity(0.3, ft.Colors.ON_SURFACE),
-                        ),
-                    ],
-                    alignment=ft.MainAxisAlignment.CENTER,
-                    horizontal_alignment=ft.CrossAxisAlignment.CENTER,
-                    spacing=8,
-                ),
-                alignment=ft.Alignment.CENTER,
-                padding=ft.padding.all(60),
-            )
-        )
+        self.results_list.controls.append(_empty_placeholder())
 
-        return ft.Column(
-            [
-                ft.Container(
-                    content=ft.Column(
-                        [
-                            ft.Container(
-                                content=ft.Row(
-                                    [
-                                        ft.Icon(ft.Icons.SEARCH, color=ft.Colors.ON_SURFACE, size=20),
-                                        ft.Text("Поиск", size=16, weight=ft.FontWeight.W_600),
-                                    ],
-                                    spacing=8,
-                                ),
-                                padding=ft.padding.symmetric(horizontal=24, vertical=8),
-                            ),
-                            ft.Container(
-                                content=ft.Row([self.search_field, search_btn], spacing=12),
-                                padding=ft.padding.symmetric(horizontal=24, vertical=8),
-                            ),
-                            ft.Container(
-                                content=ft.Row([self.filter_chips, ft.Container(expand=True), self.results_count]),
-                                padding=ft.padding.symmetric(horizontal=24),
-                            ),
-                        ],
-                        spacing=0,
-                    ),
-                ),
-                ft.Divider(height=1, thickness=0.5),
-                self.results_list,
-            ],
-            spacing=0,
-            expand=True,
-        )
+        self._view = _build_shell(self.search_field, search_btn, self.filter_chips,
+                                  self.results_count, self.results_list)
+        return self._view
+
+    def _on_filter_select(self, e):
+        self._set_filter(e.control.data)
 
     def _set_filter(self, filter_type: str):
         self.current_filter = filter_type
@@ -138,47 +187,60 @@ class SearchModule:
             return
 
         query = query.strip()
-        self.results_list.controls.clear()
-        results = []
+        # Сначала собираем сырые параметры карточек, контролы строим одним проходом
+        found: List[Dict] = []
 
-        # Текстовый поиск по БД
+        # Три поиска независимы — запускаем параллельно, ждём самый медленный, а не сумму
+        futures = {}
         if self.current_filter in ("all", "notes"):
-            notes = self.db.search_notes(query)
+            futures["notes"] = _search_pool.submit(self.db.search_notes, query, NOTE_SNIPPET_CHARS)
+        if self.current_filter in ("all", "tasks"):
+            futures["tasks"] = _search_pool.submit(self.db.search_tasks, query, TASK_SNIPPET_CHARS)
+        if self.current_filter in ("all", "knowledge") and self.vector_db.is_available:
+            futures["knowledge"] = _search_pool.submit(
+                self.vector_db.search, query, n_results=5, snippet_chars=DOC_SNIPPET_CHARS
+            )
+
+        # Текстовый поиск по БД
+        if "notes" in futures:
+            notes = futures["notes"].result()
             for n in notes:
-                results.append(self._result_card(
+                found.append(dict(
                     title=n["title"],
-                    snippet=(n.get("content", "") or "")[:100],
+                    snippet=n["snippet"] or "",
                     category="Заметка",
                     icon=ft.Icons.EDIT_NOTE,
                     color=ft.Colors.PRIMARY,
                 ))
 
-        if self.current_filter in ("all", "tasks"):
-            tasks = self.db.search_tasks(query)
+        if "tasks" in futures:
+            tasks = futures["tasks"].result()
             for t in tasks:
-                results.append(self._result_card(
+                found.append(dict(
                     title=t["title"],
-                    snippet=t.get("description", "") or t.get("status", ""),
+                    snippet=t["snippet"] or t["status"] or "",
                     category="Задача",
                     icon=ft.Icons.TASK_ALT,
                     color=ft.Colors.AMBER,
                 ))
 
         # Векторный поиск
-        if self.current_filter in ("all", "knowledge") and self.vector_db.is_available:
-            vector_results = self.vector_db.search(query, n_results=5)
+        if "knowledge" in futures:
+            vector_results = futures["knowledge"].result()
             for vr in vector_results:
-                results.append(self._result_card(
+                found.append(dict(
                     title=f"Документ #{vr.get('metadata', {}).get('doc_id', '?')}",
-                    snippet=vr.get("document", "")[:120],
+                    snippet=vr["document"] or "",
                     category="Документ",
                     icon=ft.Icons.SCHOOL,
                     color=ft.Colors.TERTIARY,
                     distance=vr.get("distance", 0),
                 ))
 
-        if not results:
-            self.results_list.controls.append(
+        if found:
+            self.results_list.controls[:] = [self._result_card(**r) for r in found]
+        else:
+            self.results_list.controls[:] = [
                 ft.Container(
                     content=ft.Text(
                         "Ничего не найдено",
@@ -188,20 +250,23 @@ class SearchModule:
                     padding=ft.padding.all(40),
                     alignment=ft.Alignment.CENTER,
                 )
-            )
+            ]
 
-        for r in results:
-            self.results_list.controls.append(r)
+        self.results_count.value = f"Найдено: {len(found)}"
+        self._schedule_update()
 
-        self.results_count.value = f"Найдено: {len(results)}"
-        self.page.update()
+    def _schedule_update(self):
+        """Отложенный page.update: серия поисков за UPDATE_DEBOUNCE даёт одну перерисовку."""
+        if self._update_timer is not None:
+            self._update_timer.cancel()
+        self._update_timer = threading.Timer(UPDATE_DEBOUNCE, self.page.update)
+        self._update_timer.daemon = True
+        self._update_timer.start()
 
     def _result_card(self, title: str, snippet: str, category: str,
                      icon, color, distance: float = None) -> ft.Container:
         """Карточка результата поиска."""
-        subtitle_parts = [category]
-        if distance is not None:
-            subtitle_parts.append(f"Релевантность: {1 - distance:.0%}")
+        subtitle = category if distance is None else f"{category} • Релевантность: {1 - distance:.0%}"
 
         return ft.Container(
             content=ft.Row(
@@ -213,12 +278,12 @@ class SearchModule:
                             ft.Text(
                                 snippet,
                                 size=12,
-                                color=ft.Colors.with_opacity(0.6, ft.Colors.ON_SURFACE),
+                                color=_SNIPPET_COLOR,
                                 max_lines=2,
                                 overflow=ft.TextOverflow.ELLIPSIS,
                             ),
                             ft.Text(
-                                " • ".join(subtitle_parts),
+                                subtitle,
                                 size=11,
                                 color=color,
                             ),
@@ -229,9 +294,9 @@ class SearchModule:
                 ],
                 spacing=12,
             ),
-            padding=ft.padding.all(12),
+            padding=_CARD_PADDING,
             border_radius=8,
-            border=ft.border.all(1, ft.Colors.with_opacity(0.08, ft.Colors.ON_SURFACE)),
+            border=_CARD_BORDER,
             ink=True,
         )
 
@@ -4,7 +4,7 @@ Sphere — Модуль задач (канбан-доска).
 
 import flet as ft
 from datetime import datetime
-from typing import Optional
+from typing import Optional, Dict, Tuple
 
 from core.event_bus import event_bus, Events
 from database import Database
@@ -12,12 +12,19 @@ from ui.components.task_item import TaskItem
 from loguru import logger
 
 
+# Колонки канбана и лимит карточек в каждой
+KANBAN_STATUSES = ("todo", "in_progress", "done")
+TASKS_PER_COLUMN = 100
+
+
 class TasksModule:
     """Модуль управления задачами в стиле канбан."""
 
     def __init__(self, db: Database, page: ft.Page):
         self.db = db
         self.page = page
+        # id задачи -> (карточка, статус-колонка) для точечных перемещений
+        self._task_index: Dict[int, Tuple[TaskItem, str]] = {}
 
     def build(self) -> ft.Column:
         """Построить интерфейс задач."""
@@ -109,25 +116,71 @@ class TasksModule:
 
     def _load_tasks(self):
         """Загрузить задачи из БД."""
-        for status in ["todo", "in_progress", "done"]:
+        # Один запрос на всю доску, раскладка по колонкам — в Python
+        buckets = {status: [] for status in KANBAN_STATUSES}
+        for task in self.db.get_tasks_board(per_status=TASKS_PER_COLUMN):
+            bucket = buckets.get(task.get("status"))
+            if bucket is not None:
+                bucket.append(task)
+        self._task_index = {}
+        for status, tasks in buckets.items():
             task_list = getattr(self, f"_{status}_list")
             task_list.controls.clear()
-            tasks = self.db.get_tasks(status=status)
             count_text = getattr(self, f"_{status}_count")
             count_text.value = str(len(tasks))
             for task in tasks:
-                item = TaskItem(
-                    task=task,
-                    on_status_change=self._on_status_change,
-                    on_edit=self._on_edit_task,
-                    on_delete=self._on_delete_task,
-                )
+                item = self._make_item(task)
+                self._task_index[task["id"]] = (item, status)
                 task_list.controls.append(item)
 
+    def _make_item(self, task: dict) -> TaskItem:
+        return TaskItem(
+            task=task,
+            on_status_change=self._on_status_change,
+            on_edit=self._on_edit_task,
+            on_delete=self._on_delete_task,
+        )
+
+    @staticmethod
+    def _sort_key(task: dict) -> tuple:
+        """Порядок карточек в колонке — как в SQL: priority ASC, due_date ASC (NULL первыми)."""
+        due = task.get("due_date")
+        return (task.get("priority", 2), due is not None, due or "")
+
+    def _remove_item(self, task_id: int) -> Optional[str]:
+        """Убрать карточку из её колонки; вернуть статус колонки."""
+        entry = self._task_index.pop(task_id, None)
+        if entry is None:
+            return None
+        item, status = entry
+        task_list = getattr(self, f"_{status}_list")
+        if item in task_list.controls:
+            task_list.controls.remove(item)
+        count_text = getattr(self, f"_{status}_count")
+        count_text.value = str(len(task_list.controls))
+        return status
+
     def _on_status_change(self, task_id: int, new_status: str):
         """Изменить статус задачи."""
         self.db.update_task(task_id, status=new_status)
-        self._load_tasks()
+        task = self.db.get_task(task_id)
+        if task is None or task_id not in self._task_index or new_status not in KANBAN_STATUSES:
+            self._load_tasks()
+        else:
+            # Доску не пересобираем: одна карточка уходит из старой колонки и
+            # заново строится в новой (вид карточки зависит от статуса)
+            self._remove_item(task_id)
+            task_list = getattr(self, f"_{new_status}_list")
+            key = self._sort_key(task)
+            pos = len(task_list.controls)
+            for i, other in enumerate(task_list.controls):
+                if key < self._sort_key(other.task):
+                    pos = i
+                    break
+            item = self._make_item(task)
+            task_list.controls.insert(pos, item)
+            self._task_index[task_id] = (item, new_status)
+            getattr(self, f"_{new_status}_count").value = str(len(task_list.controls))
         self.page.update()
         event_bus.emit(Events.TASK_UPDATED, {"id": task_id, "status": new_status})
         if new_status == "done":
@@ -135,11 +188,7 @@ class TasksModule:
 
     def _on_edit_task(self, task_id: int):
         """Открыть диалог редактирования задачи."""
-        task = None
-        for t in self.db.get_tasks():
-            if t["id"] == task_id:
-                task = t
-                break
+        task = self.db.get_task(task_id)
         if not task:
             return
         self._show_task_dialog(task)
@@ -147,7 +196,8 @@ class TasksModule:
     def _on_delete_task(self, task_id: int):
         """Удалить задачу."""
         self.db.delete_task(task_id)
-        self._load_tasks()
+        if self._remove_item(task_id) is None:
+            self._load_tasks()
         self.page.update()
         event_bus.emit(Events.TASK_DELETED, {"id": task_id})
 
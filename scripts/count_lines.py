@@ -4,22 +4,49 @@
 Для вставки в DEVLOG.md.
 """
 
+import codecs
+import mmap
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
 BASE = Path(__file__).resolve().parent.parent
 EXCLUDE = {"venv", "__pycache__", ".git"}
+CHUNK_SIZE = 64 * 1024
+MAP_CHUNKSIZE = 32
+
+
+def count_file(path: Path) -> tuple:
+    """(строки, символы) файла без чтения его целиком в str."""
+    with path.open("rb") as f:
+        size = f.seek(0, 2)
+        if size == 0:
+            return 0, 0
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+            lines = 0 if mm[-1:] == b"\n" else 1
+            chars = 0
+            for start in range(0, size, CHUNK_SIZE):
+                chunk = mm[start:start + CHUNK_SIZE]
+                # bytes.count — memchr в C, без декодирования и списка строк
+                lines += chunk.count(b"\n")
+                # ASCII-блок без незавершённой последовательности: символы = байты
+                if chunk.isascii() and not decoder.getstate()[0]:
+                    chars += len(chunk)
+                else:
+                    chars += len(decoder.decode(chunk))
+            chars += len(decoder.decode(b"", final=True))
+            return lines, chars
 
 
 def main():
+    paths = [p for p in BASE.rglob("*.py") if not any(ex in p.parts for ex in EXCLUDE)]
     total_lines = 0
     total_chars = 0
-    for p in BASE.rglob("*.py"):
-        if any(ex in p.parts for ex in EXCLUDE):
-            continue
-        text = p.read_text(encoding="utf-8", errors="replace")
-        lines = len(text.splitlines())
-        total_lines += lines
-        total_chars += len(text)
+    # Файлы независимы — раскладываем open/stat/подсчёт по ядрам
+    with ProcessPoolExecutor() as ex:
+        for lines, chars in ex.map(count_file, paths, chunksize=MAP_CHUNKSIZE):
+            total_lines += lines
+            total_chars += chars
     print(f"Строк: {total_lines:,} | Символов: {total_chars:,}".replace(",", " "))
     print(f"\n*Строк: {total_lines:,} | Символов: {total_chars:,}*".replace(",", " "))
 
@@ -0,0 +1,57 @@
+"""
+Тесты utils.text_utils.
+"""
+
+import random
+import re
+import unittest
+
+from utils.text_utils import markdown_to_plain
+
+
+def _markdown_to_plain_reference(text: str) -> str:
+    """Исходная реализация markdown_to_plain — эталон вывода."""
+    text = re.sub(r"#{1,6}\s*", "", text)
+    text = re.sub(r"\*{1,3}(.*?)\*{1,3}", r"\1", text)
+    text = re.sub(r"_{1,3}(.*?)_{1,3}", r"\1", text)
+    text = re.sub(r"\[([^\]]+)\]\([^)]+\)", r"\1", text)
+    text = re.sub(r"`{1,3}[^`]*`{1,3}", "", text)
+    text = re.sub(r"^\s*[-*+]\s+", "", text, flags=re.MULTILINE)
+    text = re.sub(r"^\s*\d+\.\s+", "", text, flags=re.MULTILINE)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+class MarkdownToPlainTest(unittest.TestCase):
+    CASES = [
+        "**bold [link](http://x)**",
+        "[**b**](u)",
+        "**bold _it_**",
+        "*a_b*c_",
+        "a **- x**",
+        "# Заголовок\n- пункт **жирный**\n1. один `код` [ссылка](http://x)",
+        "```\nблок * кода\n```\nтекст",
+    ]
+
+    TOKENS = ["слово", "word", "**", "*", "_", "__", "`", "```", "[t](u)", "[", "]", "(u)",
+              "# ", "## ", "\n- ", "\n1. ", "\n* ", " ", "\n"]
+
+    def test_nested_markup(self):
+        self.assertEqual(markdown_to_plain("**bold [link](http://x)**"), "bold link")
+        self.assertEqual(markdown_to_plain("[**b**](u)"), "b")
+        self.assertEqual(markdown_to_plain("**bold _it_**"), "bold it")
+
+    def test_matches_reference(self):
+        for text in self.CASES:
+            with self.subTest(text=text):
+                self.assertEqual(markdown_to_plain(text), _markdown_to_plain_reference(text))
+
+    def test_matches_reference_random(self):
+        rng = random.Random(0)
+        for _ in range(2000):
+            text = "".join(rng.choice(self.TOKENS) for _ in range(rng.randint(1, 12)))
+            with self.subTest(text=text):
+                self.assertEqual(markdown_to_plain(text), _markdown_to_plain_reference(text))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -2,33 +2,37 @@
 Sphere — Компонент сообщения чата.
 """
 
+import functools
+
 import flet as ft
-import uuid
 from datetime import datetime
 
-# Реестр колбэков — Flet не сериализует bound methods, храним вызовы по ключу
-_copy_handlers: dict = {}
-_reply_handlers: dict = {}
-
 
-def _invoke_copy(handler_key: str):
-    if handler_key and handler_key in _copy_handlers:
-        cb, content = _copy_handlers[handler_key]
-        if cb:
-            cb(content)
+@functools.lru_cache(maxsize=2)
+def _get_md_stylesheet(color: str) -> ft.MarkdownStyleSheet:
+    """Общая таблица стилей Markdown для всех сообщений ИИ (создаётся один раз на цвет)."""
+    body_style = ft.TextStyle(color=color, size=14)
+    return ft.MarkdownStyleSheet(
+        p_text_style=body_style,
+        h1_text_style=body_style,
+        h2_text_style=body_style,
+        h3_text_style=body_style,
+        h4_text_style=body_style,
+        h5_text_style=body_style,
+        h6_text_style=body_style,
+        code_text_style=body_style,
+        strong_text_style=body_style,
+        em_text_style=body_style,
+        a_text_style=body_style,
+    )
 
 
-def _invoke_reply(handler_key: str):
-    if handler_key and handler_key in _reply_handlers:
-        cb = _reply_handlers[handler_key]
-        if cb:
-            cb()
+def _do_copy(cb, content: str, e):
+    cb(content)
 
 
-def clear_handlers():
-    """Очистить реестр (вызывать при сбросе чата)."""
-    _copy_handlers.clear()
-    _reply_handlers.clear()
+def _do_reply(cb, e):
+    cb()
 
 
 class ChatMessage(ft.Container):
@@ -46,17 +50,10 @@ class ChatMessage(ft.Container):
     ):
         self.role = role
         self.message_content = content
+        self.message_timestamp = timestamp
         is_user = role == "user"
         self._agent_name = (agent_name or "Sphere AI").strip() or "Sphere AI"
 
-        # Регистрируем колбэки под ключами (избегаем сериализации bound methods)
-        copy_key = str(uuid.uuid4()) if on_copy else None
-        reply_key = str(uuid.uuid4()) if on_reply else None
-        if copy_key:
-            _copy_handlers[copy_key] = (on_copy, content)
-        if reply_key:
-            _reply_handlers[reply_key] = on_reply
-
         # Аватар
         avatar = ft.CircleAvatar(
             content=ft.Icon(
@@ -85,25 +82,12 @@ class ChatMessage(ft.Container):
 
         # Текст сообщения — явный цвет для читаемости
         on_surface = ft.Colors.ON_SURFACE
-        body_style = ft.TextStyle(color=on_surface, size=14)
         message_text = ft.Markdown(
             content,
             selectable=True,
             extension_set=ft.MarkdownExtensionSet.GITHUB_WEB,
             on_tap_link=lambda e: None,  # TODO: handle links
-            md_style_sheet=ft.MarkdownStyleSheet(
-                p_text_style=body_style,
-                h1_text_style=body_style,
-                h2_text_style=body_style,
-                h3_text_style=body_style,
-                h4_text_style=body_style,
-                h5_text_style=body_style,
-                h6_text_style=body_style,
-                code_text_style=body_style,
-                strong_text_style=body_style,
-                em_text_style=body_style,
-                a_text_style=body_style,
-            ),
+            md_style_sheet=_get_md_stylesheet(on_surface),
         ) if not is_user else ft.Text(
             content,
             selectable=True,
@@ -118,8 +102,9 @@ class ChatMessage(ft.Container):
             icon_color=ft.Colors.ON_SURFACE,
             tooltip="Копировать ответ",
             style=ft.ButtonStyle(padding=4),
-            data=copy_key,
-            on_click=lambda e: _invoke_copy(e.control.data) if e.control.data else None,
+            # Колбэк и текст привязаны через partial — без глобального реестра,
+            # ссылки уходят вместе с сообщением
+            on_click=functools.partial(_do_copy, on_copy, content) if on_copy else None,
         )
         reply_btn = ft.IconButton(
             icon=ft.Icons.REPLY_OUTLINED,
@@ -127,8 +112,7 @@ class ChatMessage(ft.Container):
             icon_color=ft.Colors.ON_SURFACE,
             tooltip="Ответить (выделите текст, Ctrl+C, затем нажмите — или скопируйте весь ответ)",
             style=ft.ButtonStyle(padding=4),
-            data=reply_key,
-            on_click=lambda e: _invoke_reply(e.control.data) if e.control.data else None,
+            on_click=functools.partial(_do_reply, on_reply) if on_reply else None,
         )
         actions = ft.Row(
             [copy_btn, reply_btn],
@@ -171,6 +155,8 @@ class TypingIndicator(ft.Container):
     """Индикатор «ИИ печатает...»."""
 
     def __init__(self, **kwargs):
+        # Кольцо анимируется движком каждый кадр — показываем его только во время ответа
+        self._ring = ft.ProgressRing(width=16, height=16, stroke_width=2, visible=kwargs.get("visible", True))
         super().__init__(
             content=ft.Row(
                 [
@@ -189,10 +175,20 @@ class TypingIndicator(ft.Container):
                         italic=True,
                         color=ft.Colors.with_opacity(0.6, ft.Colors.ON_SURFACE),
                     ),
-                    ft.ProgressRing(width=16, height=16, stroke_width=2),
+                    self._ring,
                 ],
                 spacing=8,
             ),
             padding=ft.padding.symmetric(horizontal=28, vertical=8),
             **kwargs,
         )
+
+    def start(self):
+        """Показать индикатор и запустить анимацию кольца."""
+        self._ring.visible = True
+        self.visible = True
+
+    def stop(self):
+        """Скрыть индикатор; кольцо убирается из дерева и перестаёт анимироваться."""
+        self._ring.visible = False
+        self.visible = False
@@ -2,13 +2,34 @@
 Sphere — Заголовок приложения.
 """
 
-import flet as ft
-from typing import Callable, Optional
+import functools
 
+import flet as ft
+from typing import Callable
+
+# Неизменяемые значения стилей — общие для всех экземпляров хедера
+_WHITE_90 = ft.Colors.with_opacity(0.9, ft.Colors.WHITE)
+_WHITE_40 = ft.Colors.with_opacity(0.4, ft.Colors.WHITE)
+_WHITE_20 = ft.Colors.with_opacity(0.2, ft.Colors.WHITE)
+_SEARCH_CONTENT_PAD = ft.padding.only(left=16, right=8, top=0, bottom=0)
+_SEARCH_HINT_STYLE = ft.TextStyle(color=_WHITE_90)
+_MONITOR_PAD = ft.padding.only(left=14, right=20)
+_APPBAR_BG = ft.Colors.with_opacity(0.95, "#0d1117")
+_TITLE_MARGIN = ft.margin.only(left=8)
 
 class Header(ft.AppBar):
     """Заголовок приложения: мониторинг ресурсов, версия, поиск и действия."""
 
+    # Пункты меню «⋮»: (иконка, подпись, атрибут с колбэком); None — разделитель
+    _MENU_SPEC = (
+        (ft.Icons.DOWNLOAD_OUTLINED, "Экспорт данных (JSON)", "_on_export_json"),
+        (ft.Icons.DESCRIPTION_OUTLINED, "Экспорт в Markdown (.md)", "_on_export_md"),
+        (ft.Icons.UPLOAD_FILE_OUTLINED, "Импорт из папки Markdown (.md)", "_on_import_md"),
+        (ft.Icons.BACKUP_OUTLINED, "Резервная копия", "_on_backup"),
+        None,
+        (ft.Icons.INFO_OUTLINED, "О программе Sphere", "_on_about"),
+    )
+
     def __init__(
         self,
         on_search: Callable = None,
@@ -22,6 +43,7 @@ class Header(ft.AppBar):
         on_about: Callable = None,
         version: str = "0.0.0.0",
         sidebar_extended: bool = True,
+        show_monitor: bool = True,
         **kwargs,
     ):
         self._on_search = on_search
@@ -33,26 +55,40 @@ class Header(ft.AppBar):
         self._on_backup = on_backup
         self._on_about = on_about
 
-        self._cpu_text = ft.Text("CPU: —%", size=11, color=ft.Colors.with_opacity(0.9, ft.Colors.WHITE))
-        self._ram_text = ft.Text("RAM: —", size=11, color=ft.Colors.with_opacity(0.9, ft.Colors.WHITE))
-        self._monitor_row = ft.Row(
-            [self._cpu_text, ft.Text("  ", size=11), self._ram_text],
-            spacing=0,
-            tight=True,
-        )
+        self._show_monitor = show_monitor
+        # Мониторинг CPU/RAM строится только если он показывается
+        leading_kwargs = {}
+        # Последние показанные значения — чтобы не перерисовывать одинаковые
+        self._last_cpu: int = -1
+        self._last_ram: tuple = (-1, -1)
+        if show_monitor:
+            self._cpu_text = ft.Text("CPU: —%", size=11, color=_WHITE_90)
+            self._ram_text = ft.Text("RAM: —", size=11, color=_WHITE_90)
+            self._monitor_row = ft.Row(
+                [self._cpu_text, ft.Text("  ", size=11), self._ram_text],
+                spacing=0,
+                tight=True,
+            )
+            leading_kwargs = dict(
+                leading=ft.Container(
+                    content=self._monitor_row,
+                    padding=_MONITOR_PAD,
+                ),
+                leading_width=165,
+            )
 
         self.search_field = ft.TextField(
             hint_text="Спросить ИИ по вашим заметкам...",
             border_radius=20,
             height=38,
             text_size=14,
-            content_padding=ft.padding.only(left=16, right=8, top=0, bottom=0),
-            border_color=ft.Colors.with_opacity(0.4, ft.Colors.WHITE),
+            content_padding=_SEARCH_CONTENT_PAD,
+            border_color=_WHITE_40,
             focused_border_color=ft.Colors.WHITE,
             color=ft.Colors.WHITE,
             cursor_color=ft.Colors.WHITE,
-            hint_style=ft.TextStyle(color=ft.Colors.with_opacity(0.9, ft.Colors.WHITE)),
-            bgcolor=ft.Colors.with_opacity(0.2, ft.Colors.WHITE),
+            hint_style=_SEARCH_HINT_STYLE,
+            bgcolor=_WHITE_20,
             width=320,
             on_submit=self._handle_search,
             prefix_icon=ft.Icons.SEARCH,
@@ -85,48 +121,17 @@ class Header(ft.AppBar):
         self.menu_btn = ft.PopupMenuButton(
             icon=ft.Icons.MORE_VERT,
             icon_color=ft.Colors.WHITE,
-            items=[
-                ft.PopupMenuItem(
-                    icon=ft.Icons.DOWNLOAD_OUTLINED,
-                    content=ft.Text("Экспорт данных (JSON)"),
-                    on_click=lambda e: self._on_export_json(e) if self._on_export_json else None,
-                ),
-                ft.PopupMenuItem(
-                    icon=ft.Icons.DESCRIPTION_OUTLINED,
-                    content=ft.Text("Экспорт в Markdown (.md)"),
-                    on_click=lambda e: self._on_export_md(e) if self._on_export_md else None,
-                ),
-                ft.PopupMenuItem(
-                    icon=ft.Icons.UPLOAD_FILE_OUTLINED,
-                    content=ft.Text("Импорт из папки Markdown (.md)"),
-                    on_click=lambda e: self._on_import_md(e) if self._on_import_md else None,
-                ),
-                ft.PopupMenuItem(
-                    icon=ft.Icons.BACKUP_OUTLINED,
-                    content=ft.Text("Резервная копия"),
-                    on_click=lambda e: self._on_backup(e) if self._on_backup else None,
-                ),
-                ft.PopupMenuItem(),  # разделитель
-                ft.PopupMenuItem(
-                    icon=ft.Icons.INFO_OUTLINED,
-                    content=ft.Text("О программе Sphere"),
-                    on_click=lambda e: self._on_about(e) if self._on_about else None,
-                ),
-            ],
+            items=self._build_menu_items(),
         )
 
         super().__init__(
-            leading=ft.Container(
-                content=self._monitor_row,
-                padding=ft.padding.only(left=14, right=20),
-            ),
-            leading_width=165,
+            **leading_kwargs,
             title=ft.Container(
                 content=ft.Text(version, size=16, weight=ft.FontWeight.W_500, color=ft.Colors.WHITE),
-                margin=ft.margin.only(left=8),
+                margin=_TITLE_MARGIN,
             ),
             center_title=False,
-            bgcolor=ft.Colors.with_opacity(0.95, "#0d1117"),
+            bgcolor=_APPBAR_BG,
             toolbar_height=52,
             actions=[
                 self.search_field,
@@ -139,10 +144,32 @@ class Header(ft.AppBar):
             **kwargs,
         )
 
+    def _build_menu_items(self) -> list:
+        """Пункты меню «⋮» по _MENU_SPEC — один набор на экземпляр хедера."""
+        items = []
+        for spec in self._MENU_SPEC:
+            if spec is None:
+                items.append(ft.PopupMenuItem())  # разделитель
+                continue
+            icon, label, attr = spec
+            items.append(ft.PopupMenuItem(
+                icon=icon,
+                content=ft.Text(label),
+                on_click=functools.partial(self._dispatch, attr),
+            ))
+        return items
+
+    def _dispatch(self, attr: str, e):
+        """Вызвать колбэк по имени атрибута (partial хранит строку, а не замыкание на self)."""
+        cb = getattr(self, attr, None)
+        if cb:
+            cb(e)
+
     def _handle_search(self, e):
         if self._on_search and e.control.value:
             self._on_search(e.control.value)
             e.control.value = ""
+            # Обновляем только поле поиска — AppBar целиком не пересылается
             e.control.update()
 
     def _handle_theme_toggle(self, e):
@@ -155,16 +182,35 @@ class Header(ft.AppBar):
 
     def set_sidebar_extended(self, extended: bool):
         """Обновить иконку переключателя сайдбара."""
-        self.sidebar_btn.icon = ft.Icons.CHEVRON_LEFT if extended else ft.Icons.CHEVRON_RIGHT
+        icon = ft.Icons.CHEVRON_LEFT if extended else ft.Icons.CHEVRON_RIGHT
+        if self.sidebar_btn.icon == icon:
+            return
+        self.sidebar_btn.icon = icon
         self.sidebar_btn.tooltip = "Свернуть сайдбар" if extended else "Развернуть сайдбар"
 
     def set_theme_icon(self, is_dark: bool):
         """Обновить иконку темы."""
-        self.theme_btn.icon = (
-            ft.Icons.LIGHT_MODE_OUTLINED if is_dark else ft.Icons.DARK_MODE_OUTLINED
-        )
-
-    def update_resources(self, cpu_percent: float, ram_used_gb: float, ram_total_gb: float):
-        """Обновить отображение CPU и RAM в хедере."""
-        self._cpu_text.value = f"CPU: {cpu_percent:.0f}%"
-        self._ram_text.value = f"RAM: {ram_used_gb:.1f}/{ram_total_gb:.1f} GB"
+        icon = ft.Icons.LIGHT_MODE_OUTLINED if is_dark else ft.Icons.DARK_MODE_OUTLINED
+        # Без изменений не трогаем контрол — он не попадёт в следующий diff
+        if self.theme_btn.icon != icon:
+            self.theme_btn.icon = icon
+
+    def update_resources(self, cpu_percent: float, ram_used_gb: float, ram_total_gb: float) -> bool:
+        """Обновить отображение CPU и RAM в хедере. True — если что-то изменилось и перерисовано."""
+        if not self._show_monitor:
+            return False
+        cpu = round(cpu_percent)
+        ram = (round(ram_used_gb, 1), round(ram_total_gb, 1))
+        changed = False
+        if cpu != self._last_cpu:
+            self._last_cpu = cpu
+            self._cpu_text.value = f"CPU: {cpu}%"
+            changed = True
+        if ram != self._last_ram:
+            self._last_ram = ram
+            self._ram_text.value = f"RAM: {ram[0]:.1f}/{ram[1]:.1f} GB"
+            changed = True
+        if changed:
+            # Обновляем только строку мониторинга, а не весь AppBar
+            self._monitor_row.update()
+        return changed
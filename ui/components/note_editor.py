@@ -2,9 +2,31 @@
 Sphere — Компонент редактора заметок с Markdown.
 """
 
+import json
+import threading
+
 import flet as ft
 from typing import Callable, Optional
 
+# Задержка (сек) перерисовки предпросмотра после последнего нажатия клавиши
+PREVIEW_DEBOUNCE = 0.15
+
+# Неизменяемые значения стилей — общие для всех экземпляров редактора
+_TITLE_STYLE = ft.TextStyle(weight=ft.FontWeight.BOLD)
+_TITLE_PAD = ft.padding.only(left=16, right=16, bottom=8)
+_TAGS_PAD = ft.padding.only(left=8, right=16)
+_AREA_PAD = ft.padding.all(16)
+_TOOLBAR_PAD = ft.padding.symmetric(horizontal=8, vertical=4)
+_MUTED_ICON_COLOR = ft.Colors.with_opacity(0.6, ft.Colors.ON_SURFACE)
+
+
+def _parse_tags(raw: str):
+    """Теги из строки «a, b, c» — каждый фрагмент strip-ится один раз, пустые пропускаются."""
+    for part in raw.split(","):
+        tag = part.strip()
+        if tag:
+            yield tag
+
 
 class NoteEditor(ft.Column):
     """Редактор заметки с поддержкой Markdown и live-предпросмотром."""
@@ -20,14 +42,15 @@ class NoteEditor(ft.Column):
         self._note_id: Optional[int] = None
         self._show_preview = False
         self._is_pinned: bool = False
+        self._preview_timer: Optional[threading.Timer] = None
 
         # Поле заголовка
         self.title_field = ft.TextField(
             hint_text="Заголовок заметки",
             border=ft.InputBorder.NONE,
             text_size=22,
-            text_style=ft.TextStyle(weight=ft.FontWeight.BOLD),
-            content_padding=ft.padding.only(left=16, right=16, bottom=8),
+            text_style=_TITLE_STYLE,
+            content_padding=_TITLE_PAD,
         )
 
         # Поле тегов
@@ -36,7 +59,7 @@ class NoteEditor(ft.Column):
             border=ft.InputBorder.UNDERLINE,
             text_size=13,
             prefix_icon=ft.Icons.TAG,
-            content_padding=ft.padding.only(left=8, right=16),
+            content_padding=_TAGS_PAD,
             height=36,
         )
 
@@ -65,21 +88,12 @@ class NoteEditor(ft.Column):
             expand=True,
             border=ft.InputBorder.NONE,
             text_size=14,
-            content_padding=ft.padding.all(16),
+            content_padding=_AREA_PAD,
             on_change=self._on_content_change,
         )
 
-        # Область предпросмотра Markdown
-        self.preview_area = ft.Container(
-            content=ft.Markdown(
-                "",
-                selectable=True,
-                extension_set=ft.MarkdownExtensionSet.GITHUB_WEB,
-            ),
-            padding=ft.padding.all(16),
-            visible=False,
-            expand=True,
-        )
+        # Область предпросмотра Markdown — создаётся при первом включении предпросмотра
+        self.preview_area: Optional[ft.Container] = None
 
         # Панель инструментов
         self.pin_button = ft.IconButton(
@@ -112,7 +126,7 @@ class NoteEditor(ft.Column):
                     tooltip="Удалить",
                     on_click=self._handle_delete,
                     icon_size=18,
-                    icon_color=ft.Colors.with_opacity(0.6, ft.Colors.ON_SURFACE),
+                    icon_color=_MUTED_ICON_COLOR,
                 ),
             ],
             alignment=ft.MainAxisAlignment.START,
@@ -122,10 +136,7 @@ class NoteEditor(ft.Column):
 
         # Область контента (редактор + предпросмотр)
         self.content_area = ft.Row(
-            [
-                ft.Container(content=self.content_field, expand=True),
-                self.preview_area,
-            ],
+            [ft.Container(content=self.content_field, expand=True)],
             expand=True,
             spacing=0,
         )
@@ -134,7 +145,7 @@ class NoteEditor(ft.Column):
             controls=[
                 self.title_field,
                 ft.Divider(height=1, thickness=0.5),
-                ft.Container(content=toolbar, padding=ft.padding.symmetric(horizontal=8, vertical=4)),
+                ft.Container(content=toolbar, padding=_TOOLBAR_PAD),
                 ft.Divider(height=1, thickness=0.5),
                 self.content_area,
             ],
@@ -154,17 +165,18 @@ class NoteEditor(ft.Column):
         self.pin_button.icon = (
             ft.Icons.PUSH_PIN if self._is_pinned else ft.Icons.PUSH_PIN_OUTLINED
         )
-        tags = note.get("tags", "[]")
+        # Database отдаёт теги уже списком; строка JSON — только у сторонних источников
+        tags = note.get("tags") or []
         if isinstance(tags, str):
-            import json
             try:
-                tags = json.loads(tags)
-            except Exception:
+                tags = json.loads(tags) or []
+            except ValueError:
                 tags = []
-        self.tags_field.value = ", ".join(tags) if isinstance(tags, list) else str(tags)
+        self.tags_field.value = ", ".join(tags) if isinstance(tags, list) else ""
 
     def clear(self):
         """Очистить редактор."""
+        self._cancel_preview_timer()
         self._note_id = None
         self.title_field.value = ""
         self.content_field.value = ""
@@ -175,8 +187,7 @@ class NoteEditor(ft.Column):
 
     def get_data(self) -> dict:
         """Получить данные из редактора."""
-        tags_raw = self.tags_field.value or ""
-        tags = [t.strip() for t in tags_raw.split(",") if t.strip()]
+        tags = list(_parse_tags(self.tags_field.value or ""))
         return {
             "id": self._note_id,
             "title": self.title_field.value or "Без заголовка",
@@ -186,19 +197,53 @@ class NoteEditor(ft.Column):
             "is_pinned": self._is_pinned,
         }
 
+    def _build_preview_area(self) -> ft.Container:
+        return ft.Container(
+            content=ft.Markdown(
+                "",
+                selectable=True,
+                extension_set=ft.MarkdownExtensionSet.GITHUB_WEB,
+            ),
+            padding=_AREA_PAD,
+            visible=False,
+            expand=True,
+        )
+
     def _toggle_preview(self, e):
+        if self.preview_area is None:
+            self.preview_area = self._build_preview_area()
+            self.content_area.controls.append(self.preview_area)
         self._show_preview = not self._show_preview
         self.preview_area.visible = self._show_preview
         if self._show_preview:
             md = self.preview_area.content
             md.value = self.content_field.value or "*Пустая заметка*"
-        self.update()
+        else:
+            self._cancel_preview_timer()
+        # Меняется только строка редактор+предпросмотр — диффим её, а не весь редактор
+        self.content_area.update()
 
     def _on_content_change(self, e):
-        if self._show_preview:
-            md = self.preview_area.content
-            md.value = self.content_field.value or "*Пустая заметка*"
-            self.preview_area.update()
+        if self._show_preview and self.preview_area is not None:
+            # Markdown целиком перепарсивается при каждой отрисовке — обновляем
+            # предпросмотр не чаще раза в PREVIEW_DEBOUNCE
+            self._cancel_preview_timer()
+            self._preview_timer = threading.Timer(PREVIEW_DEBOUNCE, self._flush_preview)
+            self._preview_timer.daemon = True
+            self._preview_timer.start()
+
+    def _flush_preview(self):
+        self._preview_timer = None
+        if not self._show_preview or self.preview_area is None:
+            return
+        md = self.preview_area.content
+        md.value = self.content_field.value or "*Пустая заметка*"
+        self.preview_area.update()
+
+    def _cancel_preview_timer(self):
+        if self._preview_timer is not None:
+            self._preview_timer.cancel()
+            self._preview_timer = None
 
     def _toggle_pin(self, e):
         """Переключить флаг закрепления заметки."""
@@ -3,7 +3,22 @@ Sphere — Боковая панель навигации.
 """
 
 import flet as ft
-from typing import Callable, Optional
+from typing import Callable
+
+# Неизменяемые значения стилей (не контролы) — общие для всех экземпляров
+_DESTINATION_PADDING = ft.padding.symmetric(vertical=4)
+_WHITE_30 = ft.Colors.with_opacity(0.3, ft.Colors.WHITE)
+_WHITE_25 = ft.Colors.with_opacity(0.25, ft.Colors.WHITE)
+_UNSELECTED_LABEL_STYLE = ft.TextStyle(color=ft.Colors.with_opacity(0.75, ft.Colors.WHITE))
+_SELECTED_LABEL_STYLE = ft.TextStyle(color=ft.Colors.WHITE, weight=ft.FontWeight.W_600)
+_LEADING_PAD_EXTENDED = ft.padding.only(top=12, bottom=8, left=12, right=12)
+_LEADING_PAD_COMPACT = ft.padding.only(top=12, bottom=8, left=8, right=8)
+
+# Параметры рейла по режиму: extended -> значения свойств
+_RAIL_MODES = {
+    True: {"label_type": ft.NavigationRailLabelType.ALL, "min_extended_width": 220},
+    False: {"label_type": ft.NavigationRailLabelType.NONE, "min_extended_width": 72},
+}
 
 
 class Sidebar(ft.NavigationRail):
@@ -19,30 +34,57 @@ class Sidebar(ft.NavigationRail):
         ("profile", ft.Icons.PERSON_OUTLINE, ft.Icons.PERSON, "Личный кабинет"),
         ("about", ft.Icons.INFO_OUTLINE, ft.Icons.INFO, "О проекте"),
     ]
+    # Ключ модуля -> индекс пункта (для select_module без перебора)
+    _MODULE_INDEX = {key: i for i, (key, *_) in enumerate(MODULE_ICONS)}
 
     def __init__(self, on_module_change: Callable = None, on_toggle_compact: Callable = None, extended: bool = True, **kwargs):
         self._on_module_change = on_module_change
         self._on_toggle_compact = on_toggle_compact
         self._extended = extended
 
+        # Пункты — контролы Flet с собственным родителем, поэтому на каждый рейл свои;
+        # общие только неизменяемые параметры
         destinations = [
             ft.NavigationRailDestination(
                 icon=icon,
                 selected_icon=selected_icon,
                 label=label,
-                padding=ft.padding.symmetric(vertical=4),
+                padding=_DESTINATION_PADDING,
             )
             for _, icon, selected_icon, label in self.MODULE_ICONS
         ]
 
-        self._collapse_btn = ft.IconButton(
+        # Оба варианта шапки строятся один раз; set_compact только переключает ссылку
+        self._leading_extended = self._build_leading(extended=True)
+        self._leading_compact = self._build_leading(extended=False)
+        self._collapse_btn = self._leading_extended.data if extended else self._leading_compact.data
+
+        super().__init__(
+            selected_index=0,
+            label_type=_RAIL_MODES[extended]["label_type"],
+            min_width=72,
+            min_extended_width=_RAIL_MODES[extended]["min_extended_width"],
+            extended=extended,
+            group_alignment=-0.9,
+            leading=self._leading_extended if extended else self._leading_compact,
+            destinations=destinations,
+            on_change=self._handle_change,
+            bgcolor=ft.Colors.PRIMARY,
+            indicator_color=_WHITE_25,
+            unselected_label_text_style=_UNSELECTED_LABEL_STYLE,
+            selected_label_text_style=_SELECTED_LABEL_STYLE,
+            **kwargs,
+        )
+
+    def _build_leading(self, extended: bool) -> ft.Container:
+        """Шапка рейла для режима; своя кнопка сворачивания лежит в data контейнера."""
+        collapse_btn = ft.IconButton(
             icon=ft.Icons.CHEVRON_LEFT if extended else ft.Icons.CHEVRON_RIGHT,
             icon_size=20,
             icon_color=ft.Colors.WHITE,
             tooltip="Свернуть сайдбар" if extended else "Развернуть сайдбар",
             on_click=self._on_collapse_click,
         )
-
         if extended:
             leading_content = ft.Column(
                 [
@@ -54,41 +96,25 @@ class Sidebar(ft.NavigationRail):
                         alignment=ft.MainAxisAlignment.CENTER,
                         spacing=6,
                     ),
-                    ft.Divider(height=1, thickness=0.5, color=ft.Colors.with_opacity(0.3, ft.Colors.WHITE)),
-                    self._collapse_btn,
+                    ft.Divider(height=1, thickness=0.5, color=_WHITE_30),
+                    collapse_btn,
                 ],
                 spacing=8,
                 horizontal_alignment=ft.CrossAxisAlignment.CENTER,
             )
-            leading_padding = ft.padding.only(top=12, bottom=8, left=12, right=12)
+            leading_padding = _LEADING_PAD_EXTENDED
         else:
             leading_content = ft.Column(
                 [
                     ft.Icon(ft.Icons.BLUR_CIRCULAR, color=ft.Colors.WHITE, size=22),
                     ft.Divider(height=8, thickness=0),
-                    self._collapse_btn,
+                    collapse_btn,
                 ],
                 spacing=4,
                 horizontal_alignment=ft.CrossAxisAlignment.CENTER,
             )
-            leading_padding = ft.padding.only(top=12, bottom=8, left=8, right=8)
-
-        super().__init__(
-            selected_index=0,
-            label_type=ft.NavigationRailLabelType.ALL if extended else ft.NavigationRailLabelType.NONE,
-            min_width=72,
-            min_extended_width=220 if extended else 72,
-            extended=extended,
-            group_alignment=-0.9,
-            leading=ft.Container(content=leading_content, padding=leading_padding),
-            destinations=destinations,
-            on_change=self._handle_change,
-            bgcolor=ft.Colors.PRIMARY,
-            indicator_color=ft.Colors.with_opacity(0.25, ft.Colors.WHITE),
-            unselected_label_text_style=ft.TextStyle(color=ft.Colors.with_opacity(0.75, ft.Colors.WHITE)),
-            selected_label_text_style=ft.TextStyle(color=ft.Colors.WHITE, weight=ft.FontWeight.W_600),
-            **kwargs,
-        )
+            leading_padding = _LEADING_PAD_COMPACT
+        return ft.Container(content=leading_content, padding=leading_padding, data=collapse_btn)
 
     def _handle_change(self, e):
         if self._on_module_change:
@@ -101,16 +127,18 @@ class Sidebar(ft.NavigationRail):
 
     def select_module(self, module_key: str):
         """Выбрать модуль программно."""
-        for i, (key, *_) in enumerate(self.MODULE_ICONS):
-            if key == module_key:
-                self.selected_index = i
-                break
+        index = self._MODULE_INDEX.get(module_key)
+        if index is not None:
+            self.selected_index = index
 
     def set_compact(self, compact: bool):
-        """Переключить компактный режим (только иконки)."""
-        self._extended = not compact
-        self.extended = not compact
-        self.label_type = ft.NavigationRailLabelType.NONE if compact else ft.NavigationRailLabelType.ALL
-        self.min_extended_width = 72 if compact else 220
-        self._collapse_btn.icon = ft.Icons.CHEVRON_RIGHT if compact else ft.Icons.CHEVRON_LEFT
-        self._collapse_btn.tooltip = "Развернуть сайдбар" if compact else "Свернуть сайдбар"
+        """Переключить компактный режим (только иконки) — без пересоздания контролов."""
+        extended = not compact
+        if extended == self._extended:
+            return
+        self._extended = extended
+        self.extended = extended
+        self.label_type = _RAIL_MODES[extended]["label_type"]
+        self.min_extended_width = _RAIL_MODES[extended]["min_extended_width"]
+        self.leading = self._leading_extended if extended else self._leading_compact
+        self._collapse_btn = self.leading.data
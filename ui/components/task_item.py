@@ -2,9 +2,11 @@
 Sphere — Компонент элемента задачи.
 """
 
+import functools
+
 import flet as ft
 from typing import Callable, Optional
-from ui.themes.colors import SphereColors
+from ui.themes.colors import SphereColors, tinted
 
 
 PRIORITY_LABELS = {1: "Высокий", 2: "Средний", 3: "Низкий"}
@@ -19,6 +21,25 @@ STATUS_COLORS = {
     "in_progress": SphereColors.STATUS_IN_PROGRESS,
     "done": SphereColors.STATUS_DONE,
 }
+# Приоритет -> (подпись, цвет чипа): одна выборка на карточку
+_PRIORITY = {p: (PRIORITY_LABELS[p], PRIORITY_COLORS[p]) for p in PRIORITY_LABELS}
+_PRIORITY_DEFAULT = ("", ft.Colors.GREY)
+
+# Неизменяемые значения стилей — одни на все карточки доски
+_CHIP_PADDING = ft.padding.symmetric(horizontal=6, vertical=2)
+_CARD_PADDING = ft.padding.all(12)
+_BORDER = ft.border.all(1, tinted(0.1))
+_BG_IDLE = tinted(0.06)
+_BG_HOVER = tinted(0.12)
+_HOVER_ANIM = ft.animation.Animation(200, ft.AnimationCurve.EASE_IN_OUT)
+_DONE_COLOR = tinted(0.5)
+_META_COLOR = tinted(0.6)
+_PROJECT_COLOR = tinted(0.7)
+
+
+def _truncate(s: str, n: int = 80) -> str:
+    """Обрезать строку до n символов с многоточием; короткие возвращаются как есть."""
+    return s if len(s) <= n else s[:n] + "…"
 
 
 class TaskItem(ft.Container):
@@ -39,10 +60,10 @@ class TaskItem(ft.Container):
 
         task_id = task.get("id", 0)
         title = task.get("title", "")
-        description = task.get("description", "")
+        description = task.get("description") or ""
         status = task.get("status", "todo")
         priority = task.get("priority", 2)
-        due_date = task.get("due_date", "")
+        due_date = task.get("due_date") or ""
         project = task.get("project", "")
 
         # Чекбокс
@@ -60,48 +81,45 @@ class TaskItem(ft.Container):
                 ft.TextDecoration.LINE_THROUGH if status == "done" else None
             ),
             color=(
-                ft.Colors.with_opacity(0.5, ft.Colors.ON_SURFACE) if status == "done" else None
+                _DONE_COLOR if status == "done" else None
             ),
             expand=True,
         )
 
         # Приоритет
+        priority_label, priority_color = _PRIORITY.get(priority, _PRIORITY_DEFAULT)
         priority_chip = ft.Container(
             content=ft.Text(
-                PRIORITY_LABELS.get(priority, ""),
+                priority_label,
                 size=10,
                 color=ft.Colors.WHITE,
             ),
-            bgcolor=PRIORITY_COLORS.get(priority, ft.Colors.GREY),
+            bgcolor=priority_color,
             border_radius=4,
-            padding=ft.padding.symmetric(horizontal=6, vertical=2),
+            padding=_CHIP_PADDING,
         )
 
-        # Дедлайн
+        # Дедлайн и проект — пустые поля не создаём (скрытые контролы всё равно уходят клиенту)
         due_text = ft.Text(
-            due_date[:10] if due_date else "",
+            due_date[:10],
             size=11,
-            color=ft.Colors.with_opacity(0.6, ft.Colors.ON_SURFACE),
-            visible=bool(due_date),
-        )
+            color=_META_COLOR,
+        ) if due_date else None
 
-        # Проект
         project_text = ft.Text(
             project,
             size=11,
-            color=ft.Colors.with_opacity(0.7, ft.Colors.ON_SURFACE),
-            visible=bool(project),
-        )
+            color=_PROJECT_COLOR,
+        ) if project else None
 
-        # Описание
+        # Описание — пустое не создаём вовсе (а не прячем через visible)
         desc_text = ft.Text(
-            description[:80] + "..." if len(description) > 80 else description,
+            _truncate(description),
             size=12,
-            color=ft.Colors.with_opacity(0.6, ft.Colors.ON_SURFACE),
-            visible=bool(description),
-        )
+            color=_META_COLOR,
+        ) if description else None
 
-        # Меню действий
+        # Меню действий: пункты нужны сразу — с пустым списком Flutter меню не открывает
         menu = ft.PopupMenuButton(
             icon=ft.Icons.MORE_HORIZ,
             icon_size=16,
@@ -109,54 +127,54 @@ class TaskItem(ft.Container):
                 ft.PopupMenuItem(
                     icon=ft.Icons.EDIT_OUTLINED,
                     content=ft.Text("Редактировать"),
-                    on_click=lambda e: self._handle_edit(task_id),
+                    on_click=functools.partial(self._handle_edit, task_id),
                 ),
                 ft.PopupMenuItem(
                     icon=ft.Icons.ARROW_FORWARD,
                     content=ft.Text("В работу" if status == "todo" else "Готово"),
-                    on_click=lambda e: self._handle_next_status(task_id, status),
+                    on_click=functools.partial(self._handle_next_status, task_id, status),
                 ),
                 ft.PopupMenuItem(),
                 ft.PopupMenuItem(
                     icon=ft.Icons.DELETE_OUTLINED,
                     content=ft.Text("Удалить"),
-                    on_click=lambda e: self._handle_delete(task_id),
+                    on_click=functools.partial(self._handle_delete, task_id),
                 ),
             ],
         )
 
+        rows = [
+            ft.Row(
+                [checkbox, title_text, priority_chip, menu],
+                alignment=ft.MainAxisAlignment.START,
+                vertical_alignment=ft.CrossAxisAlignment.CENTER,
+                spacing=4,
+            ),
+        ]
+        if desc_text is not None:
+            rows.append(desc_text)
+        if project_text is not None or due_text is not None:
+            footer = [project_text] if project_text is not None else []
+            if due_text is not None:
+                footer += [ft.Container(expand=True), due_text]
+            rows.append(ft.Row(footer))
+
         super().__init__(
             content=ft.Column(
-                [
-                    ft.Row(
-                        [checkbox, title_text, priority_chip, menu],
-                        alignment=ft.MainAxisAlignment.START,
-                        vertical_alignment=ft.CrossAxisAlignment.CENTER,
-                        spacing=4,
-                    ),
-                    desc_text,
-                    ft.Row(
-                        [project_text, ft.Container(expand=True), due_text],
-                        visible=bool(project or due_date),
-                    ),
-                ],
+                rows,
                 spacing=4,
             ),
-            padding=ft.padding.all(12),
+            padding=_CARD_PADDING,
             border_radius=8,
-            border=ft.border.all(1, ft.Colors.with_opacity(0.1, ft.Colors.ON_SURFACE)),
-            bgcolor=ft.Colors.with_opacity(0.06, ft.Colors.ON_SURFACE),
-            animate=ft.animation.Animation(200, ft.AnimationCurve.EASE_IN_OUT),
+            border=_BORDER,
+            bgcolor=_BG_IDLE,
+            animate=_HOVER_ANIM,
             on_hover=self._on_hover,
             **kwargs,
         )
 
     def _on_hover(self, e):
-        self.bgcolor = (
-            ft.Colors.with_opacity(0.12, ft.Colors.ON_SURFACE)
-            if e.data == "true"
-            else ft.Colors.with_opacity(0.06, ft.Colors.ON_SURFACE)
-        )
+        self.bgcolor = _BG_HOVER if e.data == "true" else _BG_IDLE
         self.update()
 
     def _handle_toggle(self, e, task_id):
@@ -164,15 +182,15 @@ class TaskItem(ft.Container):
         if self._on_status_change:
             self._on_status_change(task_id, new_status)
 
-    def _handle_next_status(self, task_id, current):
+    def _handle_next_status(self, task_id, current, e=None):
         next_map = {"todo": "in_progress", "in_progress": "done", "done": "todo"}
         if self._on_status_change:
             self._on_status_change(task_id, next_map.get(current, "todo"))
 
-    def _handle_edit(self, task_id):
+    def _handle_edit(self, task_id, e=None):
         if self._on_edit:
             self._on_edit(task_id)
 
-    def _handle_delete(self, task_id):
+    def _handle_delete(self, task_id, e=None):
         if self._on_delete:
             self._on_delete(task_id)
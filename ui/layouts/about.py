@@ -4,6 +4,32 @@ Sphere — Страница «О проекте».
 
 import flet as ft
 from pathlib import Path
+from typing import Optional, Tuple
+
+from ui.themes.colors import tinted
+
+DEVLOG_PATH = Path("DEVLOG.md")
+DEVLOG_MISSING = "*Файл DEVLOG.md не найден.*"
+
+# (mtime, текст) последнего прочитанного DEVLOG — перечитываем только при изменении файла
+_DEVLOG_CACHE: Optional[Tuple[float, str]] = None
+
+
+def _load_devlog(path: Path = DEVLOG_PATH) -> str:
+    """Текст DEVLOG.md с кешем по mtime."""
+    global _DEVLOG_CACHE
+    try:
+        mtime = path.stat().st_mtime
+    except OSError:
+        return DEVLOG_MISSING
+    if _DEVLOG_CACHE is not None and _DEVLOG_CACHE[0] == mtime:
+        return _DEVLOG_CACHE[1]
+    try:
+        text = path.read_text(encoding="utf-8")
+    except Exception:
+        return DEVLOG_MISSING
+    _DEVLOG_CACHE = (mtime, text)
+    return text
 
 
 class AboutLayout(ft.Column):
@@ -40,37 +66,29 @@ class AboutLayout(ft.Column):
             ),
             padding=ft.padding.all(16),
             border_radius=8,
-            bgcolor=ft.Colors.with_opacity(0.08, ft.Colors.ON_SURFACE),
+            bgcolor=tinted(0.08),
             margin=ft.margin.symmetric(horizontal=16, vertical=8),
         )
 
-        devlog_text = "*Файл DEVLOG.md не найден.*"
-        devlog_path = Path("DEVLOG.md")
-        if devlog_path.exists():
-            try:
-                devlog_text = devlog_path.read_text(encoding="utf-8")
-            except Exception:
-                pass
+        # Markdown DEVLOG строится после монтирования страницы: сначала
+        # показываем лёгкую заглушку, тяжёлый разбор — уже на экране
+        self._devlog_built = False
+        self._devlog_column = ft.Column(
+            [
+                ft.Text("Dev Log", size=16, weight=ft.FontWeight.W_600),
+                ft.Divider(height=8, thickness=0.5),
+                ft.Text("Загрузка…", size=13, color=ft.Colors.OUTLINE),
+            ],
+            spacing=8,
+            expand=True,
+        )
 
         devlog_block = ft.Container(
-            content=ft.Column(
-                [
-                    ft.Text("Dev Log", size=16, weight=ft.FontWeight.W_600),
-                    ft.Divider(height=8, thickness=0.5),
-                    ft.Markdown(
-                        devlog_text,
-                        extension_set=ft.MarkdownExtensionSet.GITHUB_WEB,
-                        selectable=True,
-                        expand=True,
-                    ),
-                ],
-                spacing=8,
-                expand=True,
-            ),
+            content=self._devlog_column,
             padding=ft.padding.all(16),
             margin=ft.margin.symmetric(horizontal=16, vertical=8),
             border_radius=8,
-            bgcolor=ft.Colors.with_opacity(0.08, ft.Colors.ON_SURFACE),
+            bgcolor=tinted(0.08),
             expand=True,
         )
 
@@ -82,3 +100,15 @@ class AboutLayout(ft.Column):
         ]
         self.scroll = ft.ScrollMode.AUTO
 
+    def did_mount(self):
+        """Подставить Markdown DEVLOG вместо заглушки (один раз)."""
+        if self._devlog_built:
+            return
+        self._devlog_built = True
+        self._devlog_column.controls[-1] = ft.Markdown(
+            _load_devlog(),
+            extension_set=ft.MarkdownExtensionSet.GITHUB_WEB,
+            selectable=True,
+            expand=True,
+        )
+        self._devlog_column.update()
@@ -4,10 +4,25 @@ Sphere — Макет чата с ИИ.
 
 import flet as ft
 import asyncio
-from typing import Callable, Optional
+from collections import OrderedDict
+from typing import Callable, List, Optional, Tuple
 from datetime import datetime
 
-from ui.components.chat_message import ChatMessage, TypingIndicator, clear_handlers
+from ui.components.chat_message import ChatMessage, TypingIndicator
+
+# Сколько последних сообщений держим отрисованными; старые — только в истории
+MAX_RENDERED_MESSAGES = 200
+# Сколько сообщений подгружает «Показать предыдущие»
+LOAD_EARLIER_STEP = 50
+# Сколько снятых с экрана ChatMessage держим для повторного показа (смена сессии туда-обратно)
+MSG_CACHE_SIZE = 500
+
+
+def _session_label(sid: str) -> str:
+    """Подпись сессии в выпадающем списке."""
+    if sid == "default":
+        return "Основной чат"
+    return sid
 
 
 class ChatLayout(ft.Column):
@@ -30,6 +45,11 @@ class ChatLayout(ft.Column):
         self._on_session_select = on_session_select
         self._on_ai_mode_change = on_ai_mode_change
         self._agent_name = (agent_name or "").strip() or "Sphere AI"
+        # Последний показанный список сессий — для пропуска повторных set_sessions
+        self._last_sessions: Tuple[str, ...] = ()
+        # (role, timestamp, hash(content)) -> снятый с экрана ChatMessage. Контрол в кеше
+        # никогда не отрисован: при выдаче он изымается, при снятии — возвращается
+        self._msg_cache: "OrderedDict[Tuple[str, Optional[str], int], ChatMessage]" = OrderedDict()
 
         # Режим общения с ИИ
         self.mode_dropdown = ft.Dropdown(
@@ -53,6 +73,11 @@ class ChatLayout(ft.Column):
             padding=ft.padding.only(top=8, bottom=8),
         )
 
+        # Вся история сессии (role, content, timestamp); в ListView — только окно с хвоста
+        self._history: List[Tuple[str, str, Optional[str]]] = []
+        self._first_rendered = 0
+        self._load_earlier_btn = ft.TextButton(on_click=self._load_earlier)
+
         # Индикатор загрузки
         self.typing_indicator = TypingIndicator(visible=False)
 
@@ -153,7 +178,24 @@ class ChatLayout(ft.Column):
 
     def add_message(self, role: str, content: str, timestamp: str = None):
         """Добавить сообщение в список."""
-        msg = ChatMessage(
+        self._history.append((role, content, timestamp))
+        controls = self.messages_list.controls
+        controls.append(self._make_message(role, content, timestamp))
+        # Окно переполнено — самое старое сообщение остаётся только в истории
+        rendered = len(self._history) - self._first_rendered
+        if rendered > MAX_RENDERED_MESSAGES:
+            offset = 1 if self._first_rendered else 0
+            self._release_message(controls.pop(offset))
+            self._first_rendered += 1
+            if not offset:
+                controls.insert(0, self._load_earlier_btn)
+            self._refresh_load_earlier()
+
+    def _make_message(self, role: str, content: str, timestamp: Optional[str]) -> ChatMessage:
+        cached = self._msg_cache.pop((role, timestamp, hash(content)), None)
+        if cached is not None and cached.message_content == content:
+            return cached
+        return ChatMessage(
             role=role,
             content=content,
             timestamp=timestamp,
@@ -161,16 +203,51 @@ class ChatLayout(ft.Column):
             on_reply=self._on_reply_to_message if role == "assistant" else None,
             agent_name=self._agent_name if role == "assistant" else None,
         )
-        self.messages_list.controls.append(msg)
+
+    def _release_message(self, control: ft.Control):
+        """Вернуть снятое с экрана сообщение в кеш для повторного показа."""
+        if not isinstance(control, ChatMessage):
+            return
+        key = (control.role, control.message_timestamp, hash(control.message_content))
+        self._msg_cache[key] = control
+        self._msg_cache.move_to_end(key)
+        while len(self._msg_cache) > MSG_CACHE_SIZE:
+            self._msg_cache.popitem(last=False)
+
+    def _refresh_load_earlier(self):
+        self._load_earlier_btn.content = ft.Text(
+            f"Показать предыдущие (скрыто: {self._first_rendered})", size=12,
+        )
+
+    def _load_earlier(self, e):
+        """Отрисовать ещё LOAD_EARLIER_STEP более ранних сообщений из истории."""
+        start = max(0, self._first_rendered - LOAD_EARLIER_STEP)
+        older = [self._make_message(*item) for item in self._history[start:self._first_rendered]]
+        self._first_rendered = start
+        controls = self.messages_list.controls
+        controls[1:1] = older
+        if start == 0:
+            controls.pop(0)
+        else:
+            self._refresh_load_earlier()
+        self.messages_list.update()
 
     def _on_copy_message(self, content: str):
         """Скопировать сообщение или выделенный фрагмент в буфер."""
         if self._page and content:
-            self._page.set_clipboard_text(content)
+            # Отклик сразу, запись в буфер (на длинных ответах — десятки мс) — в фоне
             self._page.show_dialog(
                 ft.SnackBar(content=ft.Text("Скопировано"), duration=1500)
             )
             self._page.update()
+            self._page.run_task(self._copy_to_clipboard, content)
+
+    async def _copy_to_clipboard(self, content: str):
+        set_async = getattr(self._page, "set_clipboard_text_async", None)
+        if set_async is not None:
+            await set_async(content)
+        else:
+            await asyncio.to_thread(self._page.set_clipboard_text, content)
 
     def _on_reply_to_message(self):
         """Ответить: вставить из буфера (выделенный текст) или весь ответ."""
@@ -183,32 +260,50 @@ class ChatLayout(ft.Column):
         prefix = f'По поводу «{text}»: ' if text else ""
         self.message_input.value = prefix + (self.message_input.value or "")
         self.message_input.focus()
-        self.update()
+        # Меняется только поле ввода — диффим его, а не всё дерево чата
+        self.message_input.update()
 
     def show_typing(self, show: bool = True):
         """Показать/скрыть индикатор набора текста."""
-        self.typing_indicator.visible = show
+        if show:
+            self.typing_indicator.start()
+        else:
+            self.typing_indicator.stop()
 
     def clear_messages(self):
-        """Очистить все сообщения."""
-        clear_handlers()
+        """Очистить все сообщения (контролы уходят в кеш, а не в мусор)."""
+        for control in self.messages_list.controls:
+            self._release_message(control)
         self.messages_list.controls.clear()
+        self._history.clear()
+        self._first_rendered = 0
+
+    def set_sessions(self, sessions: list) -> bool:
+        """Обновить список сессий. Отображение: default → Основной чат, остальные — как есть (dd.mm.yyyy или dd.mm.yyyy.N).
 
-    def set_sessions(self, sessions: list):
-        """Обновить список сессий. Отображение: default → Основной чат, остальные — как есть (dd.mm.yyyy или dd.mm.yyyy.N)."""
-        def _label(sid: str) -> str:
-            if sid == "default":
-                return "Основной чат"
-            return sid
-        self.sessions_dropdown.options = [ft.dropdown.Option(s, _label(s)) for s in sessions]
+        Возвращает False, если список не изменился. Добавленные в конец сессии
+        дописываются к существующим опциям без пересборки.
+        """
+        new = tuple(sessions)
+        old = self._last_sessions
+        if new == old:
+            return False
+        options = self.sessions_dropdown.options
+        if old and options is not None and new[:len(old)] == old:
+            options.extend(ft.dropdown.Option(s, _session_label(s)) for s in new[len(old):])
+        else:
+            self.sessions_dropdown.options = [ft.dropdown.Option(s, _session_label(s)) for s in new]
+        self._last_sessions = new
+        return True
 
     def _handle_send(self, e):
-        message = self.message_input.value
-        if message and message.strip():
-            self.message_input.value = ""
-            self.message_input.update()
-            if self._on_send:
-                self._on_send(message.strip())
+        message = (self.message_input.value or "").strip()
+        if not message:
+            return
+        self.message_input.value = ""
+        self.message_input.update()
+        if self._on_send:
+            self._on_send(message)
 
     def _handle_new_session(self, e):
         if self._on_new_session:
@@ -220,4 +315,4 @@ class ChatLayout(ft.Column):
 
     def _handle_clear(self, e):
         self.clear_messages()
-        self.update()
+        self.messages_list.update()
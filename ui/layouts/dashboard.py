@@ -2,10 +2,28 @@
 Sphere — Главная панель (дашборд).
 """
 
+import functools
+import types
+
 import flet as ft
 from typing import Callable
 
-from ui.themes.colors import SphereColors
+from ui.themes.colors import SphereColors, tinted
+
+# Нулевая статистика, когда состояние приложения не передано
+_DEFAULT_STATS = types.SimpleNamespace(
+    notes_count=0, tasks_todo_count=0,
+    tasks_done_count=0, events_today_count=0, documents_count=0,
+)
+
+# Карточки статистики: (подпись, иконка, модуль для перехода, атрибут состояния)
+_STAT_SPECS = (
+    ("Заметки", ft.Icons.EDIT_NOTE, "notes", "notes_count"),
+    ("Задачи", ft.Icons.TASK_ALT, "tasks", "tasks_todo_count"),
+    ("Выполнено", ft.Icons.CHECK_CIRCLE, "tasks", "tasks_done_count"),
+    ("Сегодня", ft.Icons.CALENDAR_TODAY, "calendar", "events_today_count"),
+    ("Документы", ft.Icons.SCHOOL, "knowledge", "documents_count"),
+)
 
 
 class DashboardLayout(ft.Column):
@@ -27,7 +45,7 @@ class DashboardLayout(ft.Column):
                     ft.Text(
                         "Ваш персональный AI-ассистент для продуктивности",
                         size=14,
-                        color=ft.Colors.with_opacity(0.6, ft.Colors.ON_SURFACE),
+                        color=tinted(0.6),
                     ),
                 ],
                 spacing=4,
@@ -36,18 +54,12 @@ class DashboardLayout(ft.Column):
         )
 
         # Статистические карточки
-        stats = state or type("S", (), {
-            "notes_count": 0, "tasks_todo_count": 0,
-            "tasks_done_count": 0, "events_today_count": 0, "documents_count": 0
-        })()
+        stats = state or _DEFAULT_STATS
 
         stats_row = ft.Row(
             [
-                self._stat_card("Заметки", str(stats.notes_count), ft.Icons.EDIT_NOTE, ft.Colors.ON_SURFACE, "notes"),
-                self._stat_card("Задачи", str(stats.tasks_todo_count), ft.Icons.TASK_ALT, ft.Colors.ON_SURFACE, "tasks"),
-                self._stat_card("Выполнено", str(stats.tasks_done_count), ft.Icons.CHECK_CIRCLE, ft.Colors.ON_SURFACE, "tasks"),
-                self._stat_card("Сегодня", str(stats.events_today_count), ft.Icons.CALENDAR_TODAY, ft.Colors.ON_SURFACE, "calendar"),
-                self._stat_card("Документы", str(stats.documents_count), ft.Icons.SCHOOL, ft.Colors.ON_SURFACE, "knowledge"),
+                self._stat_card(label, str(getattr(stats, attr)), icon, ft.Colors.ON_SURFACE, module)
+                for label, icon, module, attr in _STAT_SPECS
             ],
             wrap=True,
             spacing=12,
@@ -64,22 +76,22 @@ class DashboardLayout(ft.Column):
                             ft.FilledButton(
                                 content=ft.Text("Новый чат"),
                                 icon=ft.Icons.CHAT_BUBBLE_OUTLINE,
-                                on_click=lambda e: self._navigate("chat"),
+                                on_click=functools.partial(self._navigate, "chat"),
                             ),
                             ft.FilledButton(
                                 content=ft.Text("Новая заметка"),
                                 icon=ft.Icons.ADD_OUTLINED,
-                                on_click=lambda e: self._navigate("notes"),
+                                on_click=functools.partial(self._navigate, "notes"),
                             ),
                             ft.FilledButton(
                                 content=ft.Text("Новая задача"),
                                 icon=ft.Icons.ADD_TASK,
-                                on_click=lambda e: self._navigate("tasks"),
+                                on_click=functools.partial(self._navigate, "tasks"),
                             ),
                             ft.FilledButton(
                                 content=ft.Text("Спросить ИИ"),
                                 icon=ft.Icons.AUTO_AWESOME,
-                                on_click=lambda e: self._navigate("chat"),
+                                on_click=functools.partial(self._navigate, "chat"),
                             ),
                         ],
                         wrap=True,
@@ -103,7 +115,7 @@ class DashboardLayout(ft.Column):
                                 "Попробуйте задать вопрос в чате, например: «Какие задачи у меня на сегодня?» "
                                 "или «Составь план на неделю»",
                                 size=13,
-                                color=ft.Colors.with_opacity(0.7, ft.Colors.ON_SURFACE),
+                                color=tinted(0.7),
                             ),
                         ],
                         spacing=4,
@@ -114,7 +126,7 @@ class DashboardLayout(ft.Column):
             ),
             padding=ft.padding.all(16),
             border_radius=12,
-            bgcolor=ft.Colors.with_opacity(0.1, ft.Colors.ON_SURFACE),
+            bgcolor=tinted(0.1),
             margin=ft.margin.symmetric(horizontal=24),
         )
 
@@ -141,7 +153,7 @@ class DashboardLayout(ft.Column):
                         alignment=ft.MainAxisAlignment.END,
                     ),
                     ft.Text(value, size=28, weight=ft.FontWeight.BOLD),
-                    ft.Text(label, size=13, color=ft.Colors.with_opacity(0.6, ft.Colors.ON_SURFACE)),
+                    ft.Text(label, size=13, color=tinted(0.6)),
                 ],
                 spacing=4,
             ),
@@ -149,12 +161,12 @@ class DashboardLayout(ft.Column):
             height=110,
             padding=ft.padding.all(16),
             border_radius=12,
-            bgcolor=ft.Colors.with_opacity(0.08, ft.Colors.ON_SURFACE),
-            border=ft.border.all(1, ft.Colors.with_opacity(0.15, ft.Colors.ON_SURFACE)),
-            on_click=lambda e: self._navigate(module),
+            bgcolor=tinted(0.08),
+            border=ft.border.all(1, tinted(0.15)),
+            on_click=functools.partial(self._navigate, module),
             ink=True,
         )
 
-    def _navigate(self, module: str):
+    def _navigate(self, module: str, e=None):
         if self._on_navigate:
             self._on_navigate(module)
@@ -2,9 +2,30 @@
 Sphere — Макет базы знаний.
 """
 
+import functools
+
 import flet as ft
 from typing import Callable, List, Dict
 
+from ui.themes.colors import tinted
+
+# Тип файла -> (иконка, подпись в карточке)
+_FILETYPE = {
+    "pdf": (ft.Icons.PICTURE_AS_PDF, "PDF"),
+    "docx": (ft.Icons.DESCRIPTION, "DOCX"),
+    "md": (ft.Icons.ARTICLE, "MD"),
+    "html": (ft.Icons.WEB, "HTML"),
+    "txt": (ft.Icons.TEXT_SNIPPET, "TXT"),
+}
+
+
+def _filetype_info(filetype: str):
+    """(иконка, подпись) для типа файла; неизвестные типы — общая иконка."""
+    info = _FILETYPE.get(filetype)
+    if info is None:
+        return ft.Icons.INSERT_DRIVE_FILE, filetype.upper()
+    return info
+
 
 class KnowledgeLayout(ft.Column):
     """Макет страницы базы знаний."""
@@ -19,6 +40,11 @@ class KnowledgeLayout(ft.Column):
         self._on_upload = on_upload
         self._on_ask = on_ask
         self._on_delete = on_delete
+        # Отображаемые документы и их строки подписи по id — для точечного обновления
+        self._documents: Dict[int, Dict] = {}
+        self._subtitles: Dict[int, ft.Text] = {}
+        # Карточки по id — переиспользуются при повторном set_documents
+        self._doc_cards: Dict[int, ft.Container] = {}
 
         # Заголовок
         header = ft.Container(
@@ -72,7 +98,7 @@ class KnowledgeLayout(ft.Column):
             ),
             padding=ft.padding.all(16),
             border_radius=12,
-            bgcolor=ft.Colors.with_opacity(0.08, ft.Colors.ON_SURFACE),
+            bgcolor=tinted(0.08),
             margin=ft.margin.symmetric(horizontal=16),
         )
 
@@ -87,9 +113,12 @@ class KnowledgeLayout(ft.Column):
         self.stats_text = ft.Text(
             "Документов: 0 | Фрагментов: 0",
             size=12,
-            color=ft.Colors.with_opacity(0.5, ft.Colors.ON_SURFACE),
+            color=tinted(0.5),
         )
 
+        # Прогресс индексации загружаемого документа
+        self.progress_bar = ft.ProgressBar(value=0, visible=False)
+
         super().__init__(
             controls=[
                 header,
@@ -107,6 +136,7 @@ class KnowledgeLayout(ft.Column):
                     ),
                     padding=ft.padding.symmetric(horizontal=16),
                 ),
+                ft.Container(content=self.progress_bar, padding=ft.padding.symmetric(horizontal=16, vertical=4)),
                 self.documents_list,
             ],
             spacing=0,
@@ -115,30 +145,85 @@ class KnowledgeLayout(ft.Column):
         )
 
     def set_documents(self, documents: List[Dict]):
-        """Обновить список документов."""
-        self.documents_list.controls.clear()
+        """Обновить список документов.
+
+        Карточки уже показанных документов переиспользуются (правятся только
+        тексты), поэтому Flet отправляет дифф изменившихся строк, а не весь список.
+        """
+        old_cards, old_subtitles = self._doc_cards, self._subtitles
+        self._documents = {}
+        self._subtitles = {}
+        self._doc_cards = {}
+        controls = []
+        total_chunks = 0
         for doc in documents:
-            self.documents_list.controls.append(
-                self._document_card(doc)
-            )
-        total_chunks = sum(d.get("chunk_count", 0) for d in documents)
-        self.stats_text.value = f"Документов: {len(documents)} | Фрагментов: {total_chunks}"
+            doc_id = doc.get("id")
+            card = old_cards.get(doc_id) if doc_id is not None else None
+            if card is None:
+                card = self._document_card(doc)
+            else:
+                doc = dict(doc)
+                card.data.value = self._title(doc)
+                subtitle = old_subtitles[doc_id]
+                subtitle.value = self._subtitle(doc)
+                self._documents[doc_id] = doc
+                self._subtitles[doc_id] = subtitle
+            if doc_id is not None:
+                self._doc_cards[doc_id] = card
+            controls.append(card)
+            total_chunks += doc.get("chunk_count", 0) or 0
+        self.documents_list.controls[:] = controls
+        self._set_stats(len(self._documents), total_chunks)
+
+    def update_document_row(self, doc_id: int, **fields) -> bool:
+        """Обновить поля одного документа без пересборки списка. False — строки нет."""
+        doc = self._documents.get(doc_id)
+        if doc is None:
+            return False
+        doc.update(fields)
+        self._subtitles[doc_id].value = self._subtitle(doc)
+        self._update_stats()
+        return True
+
+    def _update_stats(self):
+        docs = self._documents.values()
+        self._set_stats(len(self._documents), sum(d.get("chunk_count", 0) or 0 for d in docs))
+
+    def _set_stats(self, doc_count: int, total_chunks: int):
+        self.stats_text.value = f"Документов: {doc_count} | Фрагментов: {total_chunks}"
+
+    @staticmethod
+    def _title(doc: dict) -> str:
+        return doc.get("title", doc.get("filename", ""))
+
+    @staticmethod
+    def _subtitle(doc: dict) -> str:
+        return (
+            f"{_filetype_info(doc.get('filetype', ''))[1]} • {doc.get('chunk_count', 0)} фрагментов"
+            + (" • Обработан" if doc.get("processed", False) else " • Ожидает обработки")
+        )
+
+    def set_progress(self, value: float = None):
+        """Показать прогресс индексации (0..1); None — скрыть."""
+        self.progress_bar.visible = value is not None
+        self.progress_bar.value = value or 0
 
     def set_answer(self, text: str):
         """Установить ответ ИИ."""
         self.answer_area.content.value = text
 
     def _document_card(self, doc: dict) -> ft.Container:
-        filetype = doc.get("filetype", "")
-        icon_map = {
-            "pdf": ft.Icons.PICTURE_AS_PDF,
-            "docx": ft.Icons.DESCRIPTION,
-            "md": ft.Icons.ARTICLE,
-            "html": ft.Icons.WEB,
-            "txt": ft.Icons.TEXT_SNIPPET,
-        }
-        icon = icon_map.get(filetype, ft.Icons.INSERT_DRIVE_FILE)
-        processed = doc.get("processed", False)
+        icon = _filetype_info(doc.get("filetype", ""))[0]
+        doc = dict(doc)
+        subtitle = ft.Text(
+            self._subtitle(doc),
+            size=11,
+            color=tinted(0.5),
+        )
+        title = ft.Text(self._title(doc), size=14, weight=ft.FontWeight.W_500)
+        if doc.get("id") is not None:
+            self._documents[doc["id"]] = doc
+            self._subtitles[doc["id"]] = subtitle
 
         return ft.Container(
             content=ft.Row(
@@ -146,13 +231,8 @@ class KnowledgeLayout(ft.Column):
                     ft.Icon(icon, size=20, color=ft.Colors.ON_SURFACE),
                     ft.Column(
                         [
-                            ft.Text(doc.get("title", doc.get("filename", "")), size=14, weight=ft.FontWeight.W_500),
-                            ft.Text(
-                                f"{filetype.upper()} • {doc.get('chunk_count', 0)} фрагментов"
-                                + (" • Обработан" if processed else " • Ожидает обработки"),
-                                size=11,
-                                color=ft.Colors.with_opacity(0.5, ft.Colors.ON_SURFACE),
-                            ),
+                            title,
+                            subtitle,
                         ],
                         spacing=2,
                         expand=True,
@@ -161,14 +241,15 @@ class KnowledgeLayout(ft.Column):
                         icon=ft.Icons.DELETE_OUTLINE,
                         icon_size=16,
                         tooltip="Удалить",
-                        on_click=lambda e, d=doc: self._handle_delete(d.get("id")),
+                        on_click=functools.partial(self._handle_delete, doc.get("id")),
                     ),
                 ],
                 spacing=8,
             ),
             padding=ft.padding.all(10),
             border_radius=8,
-            border=ft.border.all(1, ft.Colors.with_opacity(0.1, ft.Colors.ON_SURFACE)),
+            border=ft.border.all(1, tinted(0.1)),
+            data=title,
         )
 
     def _handle_upload(self, e):
@@ -180,6 +261,6 @@ class KnowledgeLayout(ft.Column):
         if question and question.strip() and self._on_ask:
             self._on_ask(question.strip())
 
-    def _handle_delete(self, doc_id):
+    def _handle_delete(self, doc_id, e=None):
         if self._on_delete and doc_id:
             self._on_delete(doc_id)
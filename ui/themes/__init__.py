@@ -1 +1,12 @@
 """Sphere UI Themes."""
+
+import flet as ft
+
+# Типографика общая для светлой и тёмной темы — один экземпляр на обе
+TEXT_THEME = ft.TextTheme(
+    body_large=ft.TextStyle(size=15),
+    body_medium=ft.TextStyle(size=14),
+    body_small=ft.TextStyle(size=12),
+    title_large=ft.TextStyle(size=22, weight=ft.FontWeight.W_600),
+    title_medium=ft.TextStyle(size=18, weight=ft.FontWeight.W_500),
+)
@@ -2,6 +2,8 @@
 Sphere — Цветовая палитра приложения.
 """
 
+import functools
+
 import flet as ft
 
 
@@ -55,3 +57,9 @@ class SphereColors:
     USER_BUBBLE = "#4D5466"  # PRIMARY_DARK
     AI_BUBBLE = "#2D333B"
     AI_BUBBLE_LIGHT = "#F0F2F5"
+
+
+@functools.lru_cache(maxsize=64)
+def tinted(alpha: float, base: str = ft.Colors.ON_SURFACE) -> str:
+    """Полупрозрачный цвет (по умолчанию ON_SURFACE) — повторные пары берутся из кеша."""
+    return ft.Colors.with_opacity(alpha, base)
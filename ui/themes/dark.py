@@ -4,8 +4,11 @@ Sphere — Тёмная тема.
 
 import flet as ft
 
+from ui.themes import TEXT_THEME
+from ui.themes.colors import tinted
 
-def get_dark_theme() -> ft.Theme:
+
+def _build_dark_theme() -> ft.Theme:
     """Создать тёмную тему для Sphere."""
     return ft.Theme(
         color_scheme_seed="#626880",
@@ -22,22 +25,25 @@ def get_dark_theme() -> ft.Theme:
             on_tertiary=ft.Colors.BLACK,
             tertiary_container=ft.Colors.PURPLE_900,
             on_tertiary_container=ft.Colors.PURPLE_100,
-            surface=ft.Colors.with_opacity(1.0, "#161B22"),
-            on_surface=ft.Colors.with_opacity(1.0, "#E6EDF3"),
-            surface_container=ft.Colors.with_opacity(1.0, "#1C2128"),
-            surface_container_low=ft.Colors.with_opacity(1.0, "#21262D"),
-            surface_container_high=ft.Colors.with_opacity(1.0, "#30363D"),
-            outline=ft.Colors.with_opacity(1.0, "#8B949E"),
-            outline_variant=ft.Colors.with_opacity(0.5, "#8B949E"),
-            on_surface_variant=ft.Colors.with_opacity(0.9, "#E6EDF3"),
+            surface=tinted(1.0, "#161B22"),
+            on_surface=tinted(1.0, "#E6EDF3"),
+            surface_container=tinted(1.0, "#1C2128"),
+            surface_container_low=tinted(1.0, "#21262D"),
+            surface_container_high=tinted(1.0, "#30363D"),
+            outline=tinted(1.0, "#8B949E"),
+            outline_variant=tinted(0.5, "#8B949E"),
+            on_surface_variant=tinted(0.9, "#E6EDF3"),
         ),
         use_material3=True,
         visual_density=ft.VisualDensity.COMFORTABLE,
-        text_theme=ft.TextTheme(
-            body_large=ft.TextStyle(size=15),
-            body_medium=ft.TextStyle(size=14),
-            body_small=ft.TextStyle(size=12),
-            title_large=ft.TextStyle(size=22, weight=ft.FontWeight.W_600),
-            title_medium=ft.TextStyle(size=18, weight=ft.FontWeight.W_500),
-        ),
+        text_theme=TEXT_THEME,
     )
+
+
+# Тема неизменна — строится один раз при импорте
+_DARK_THEME = _build_dark_theme()
+
+
+def get_dark_theme() -> ft.Theme:
+    """Тёмная тема Sphere (общий экземпляр; не изменять на месте)."""
+    return _DARK_THEME
@@ -4,8 +4,11 @@ Sphere — Светлая тема.
 
 import flet as ft
 
+from ui.themes import TEXT_THEME
+from ui.themes.colors import tinted
 
-def get_light_theme() -> ft.Theme:
+
+def _build_light_theme() -> ft.Theme:
     """Создать светлую тему для Sphere."""
     return ft.Theme(
         color_scheme_seed="#C6D0F5",
@@ -21,23 +24,26 @@ def get_light_theme() -> ft.Theme:
             tertiary=ft.Colors.PURPLE_700,
             on_tertiary=ft.Colors.WHITE,
             tertiary_container=ft.Colors.PURPLE_200,
-            on_tertiary_container=ft.Colors.with_opacity(1.0, "#24292F"),
+            on_tertiary_container=tinted(1.0, "#24292F"),
             surface=ft.Colors.WHITE,
-            on_surface=ft.Colors.with_opacity(1.0, "#24292F"),
-            surface_container=ft.Colors.with_opacity(1.0, "#F6F8FA"),
-            surface_container_low=ft.Colors.with_opacity(1.0, "#FAFBFC"),
-            surface_container_high=ft.Colors.with_opacity(1.0, "#D0D7DE"),
-            outline=ft.Colors.with_opacity(1.0, "#57606A"),
-            outline_variant=ft.Colors.with_opacity(0.5, "#57606A"),
-            on_surface_variant=ft.Colors.with_opacity(0.8, "#24292F"),
+            on_surface=tinted(1.0, "#24292F"),
+            surface_container=tinted(1.0, "#F6F8FA"),
+            surface_container_low=tinted(1.0, "#FAFBFC"),
+            surface_container_high=tinted(1.0, "#D0D7DE"),
+            outline=tinted(1.0, "#57606A"),
+            outline_variant=tinted(0.5, "#57606A"),
+            on_surface_variant=tinted(0.8, "#24292F"),
         ),
         use_material3=True,
         visual_density=ft.VisualDensity.COMFORTABLE,
-        text_theme=ft.TextTheme(
-            body_large=ft.TextStyle(size=15),
-            body_medium=ft.TextStyle(size=14),
-            body_small=ft.TextStyle(size=12),
-            title_large=ft.TextStyle(size=22, weight=ft.FontWeight.W_600),
-            title_medium=ft.TextStyle(size=18, weight=ft.FontWeight.W_500),
-        ),
+        text_theme=TEXT_THEME,
     )
+
+
+# Тема неизменна — строится один раз при импорте
+_LIGHT_THEME = _build_light_theme()
+
+
+def get_light_theme() -> ft.Theme:
+    """Светлая тема Sphere (общий экземпляр; не изменять на месте)."""
+    return _LIGHT_THEME
@@ -2,36 +2,62 @@
 Sphere — Утилиты для работы с датами.
 """
 
+import calendar
+import re
+import threading
+from bisect import bisect_right
 from datetime import datetime, date, timedelta
-from typing import Optional
-
-
-def format_relative(dt: datetime) -> str:
-    """Форматировать дату относительно текущего времени."""
-    now = datetime.now()
-    diff = now - dt
-
-    if diff.days == 0:
-        hours = diff.seconds // 3600
-        minutes = (diff.seconds % 3600) // 60
-        if hours > 0:
-            return f"{hours} ч. назад"
-        elif minutes > 0:
-            return f"{minutes} мин. назад"
-        else:
-            return "только что"
-    elif diff.days == 1:
-        return "вчера"
-    elif diff.days < 7:
-        return f"{diff.days} дн. назад"
-    elif diff.days < 30:
-        weeks = diff.days // 7
-        return f"{weeks} нед. назад"
-    elif diff.days < 365:
-        months = diff.days // 30
-        return f"{months} мес. назад"
-    else:
-        return dt.strftime("%d.%m.%Y")
+from typing import Iterable, List, Optional
+
+
+# Строки, которые datetime.fromisoformat (C-парсер) разбирает так же, как strptime
+_ISO_RE = re.compile(r"\d{4}-\d{2}-\d{2}(?: \d{2}:\d{2}(?::\d{2})?)?")
+
+# Поддерживаемые форматы parse_date с дешёвым regex-фильтром: strptime вызывается
+# только для формата, под который строка подходит по виду. Фильтры взаимоисключающие,
+# поэтому порядок — по частоте: ручной ввод «дд.мм.гггг» впереди, ISO-вид сюда
+# доходит редко (его забирает fromisoformat). CPython держит скомпилированные
+# регулярки strptime в кеше всего на 5 форматов и при переполнении сбрасывает его
+# целиком — благодаря fast path и фильтрам в strptime реально попадает меньше 5
+_DATE_FORMATS = tuple(
+    (re.compile(pattern), fmt)
+    for pattern, fmt in (
+        (r"\d{1,2}\.\d{1,2}\.\d{1,4}", "%d.%m.%Y"),
+        (r"\d{1,2}\.\d{1,2}\.\d{1,4}\s+\d{1,2}:\d{1,2}", "%d.%m.%Y %H:%M"),
+        (r"\d{1,4}-\d{1,2}-\d{1,2}", "%Y-%m-%d"),
+        (r"\d{1,4}-\d{1,2}-\d{1,2}\s+\d{1,2}:\d{1,2}", "%Y-%m-%d %H:%M"),
+        (r"\d{1,4}-\d{1,2}-\d{1,2}\s+\d{1,2}:\d{1,2}:\d{1,2}", "%Y-%m-%d %H:%M:%S"),
+        (r"\d{1,2}/\d{1,2}/\d{1,4}", "%d/%m/%Y"),
+    )
+)
+
+# Границы (сек, нижние включительно) корзин format_relative и форматтер каждой корзины;
+# отрицательная разница (дата в будущем) попадает в «дн.», как и раньше
+_RELATIVE_THRESHOLDS = (0, 60, 3600, 86400, 2 * 86400, 7 * 86400, 30 * 86400, 365 * 86400)
+_RELATIVE_FORMATTERS = (
+    lambda secs, dt: f"{int(secs // 86400)} дн. назад",
+    lambda secs, dt: "только что",
+    lambda secs, dt: f"{int(secs // 60)} мин. назад",
+    lambda secs, dt: f"{int(secs // 3600)} ч. назад",
+    lambda secs, dt: "вчера",
+    lambda secs, dt: f"{int(secs // 86400)} дн. назад",
+    lambda secs, dt: f"{int(secs // (7 * 86400))} нед. назад",
+    lambda secs, dt: f"{int(secs // (30 * 86400))} мес. назад",
+    lambda secs, dt: dt.strftime("%d.%m.%Y"),
+)
+
+# Последний сработавший формат (в своём потоке): строки одного импорта почти
+# всегда в одном формате, его пробуем первым
+_last_format = threading.local()
+
+
+def format_relative(dt: datetime, now: Optional[datetime] = None) -> str:
+    """Форматировать дату относительно текущего времени.
+
+    now можно передать один на весь список, чтобы не вызывать datetime.now() на каждый элемент.
+    """
+    secs = ((now or datetime.now()) - dt).total_seconds()
+    return _RELATIVE_FORMATTERS[bisect_right(_RELATIVE_THRESHOLDS, secs)](secs, dt)
 
 
 def format_date_ru(d: date) -> str:
@@ -50,30 +76,46 @@ def format_time(dt: datetime) -> str:
 
 def parse_date(text: str) -> Optional[datetime]:
     """Попробовать распарсить дату из строки."""
-    formats = [
-        "%Y-%m-%d %H:%M:%S",
-        "%Y-%m-%d %H:%M",
-        "%Y-%m-%d",
-        "%d.%m.%Y %H:%M",
-        "%d.%m.%Y",
-        "%d/%m/%Y",
-    ]
-    for fmt in formats:
+    s = text.strip()
+    if _ISO_RE.fullmatch(s):
+        try:
+            return datetime.fromisoformat(s)
+        except ValueError:
+            pass
+    last = getattr(_last_format, "entry", None)
+    if last is not None and last[0].fullmatch(s):
         try:
-            return datetime.strptime(text.strip(), fmt)
+            return datetime.strptime(s, last[1])
         except ValueError:
-            continue
+            pass
+    for entry in _DATE_FORMATS:
+        if entry is not last and entry[0].fullmatch(s):
+            try:
+                result = datetime.strptime(s, entry[1])
+            except ValueError:
+                continue
+            _last_format.entry = entry
+            return result
     return None
 
 
-def is_overdue(due_date_str: str) -> bool:
-    """Проверить, просрочена ли дата."""
+def is_overdue(due_date_str: str, now: Optional[datetime] = None) -> bool:
+    """Проверить, просрочена ли дата.
+
+    now можно передать один на весь список, чтобы не вызывать datetime.now() на каждый элемент.
+    """
     dt = parse_date(due_date_str)
     if dt:
-        return dt < datetime.now()
+        return dt < (now or datetime.now())
     return False
 
 
+def filter_overdue(due_date_strs: Iterable[str]) -> List[str]:
+    """Оставить только просроченные даты; текущее время читается один раз на весь список."""
+    now = datetime.now()
+    return [s for s in due_date_strs if is_overdue(s, now)]
+
+
 def get_week_range(d: date = None) -> tuple:
     """Получить начало и конец недели."""
     if d is None:
@@ -87,9 +129,6 @@ def get_month_range(d: date = None) -> tuple:
     """Получить начало и конец месяца."""
     if d is None:
         d = date.today()
-    start = d.replace(day=1)
-    if d.month == 12:
-        end = d.replace(year=d.year + 1, month=1, day=1) - timedelta(days=1)
-    else:
-        end = d.replace(month=d.month + 1, day=1) - timedelta(days=1)
-    return start, end
+    # Последний день месяца — из таблицы calendar, без арифметики через следующий месяц
+    last_day = calendar.monthrange(d.year, d.month)[1]
+    return d.replace(day=1), d.replace(day=last_day)
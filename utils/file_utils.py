@@ -3,8 +3,12 @@ Sphere — Утилиты для работы с файлами.
 """
 
 import os
+import sys
 import shutil
 import json
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from pathlib import Path
 from datetime import datetime
 from typing import Optional
@@ -12,6 +16,32 @@ from typing import Optional
 from config import DATA_DIR, BACKUPS_DIR, NOTES_DIR, EXPORTS_DIR
 from loguru import logger
 
+# Потоков на запись .md при экспорте (GIL отпускается на файловом I/O)
+EXPORT_WRITE_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+_SIZE_UNITS = ("Б", "КБ", "МБ", "ГБ", "ТБ")
+# Символы, недопустимые в именах файлов (разделители путей и запрещённые в Windows),
+# -> «_» за один проход translate
+_FILENAME_TRANS = str.maketrans(dict.fromkeys('/\\:*?"<>|', "_"))
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+    logger.warning("orjson не установлен — экспорт JSON через стандартный json")
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+    logger.warning("ijson не установлен — JSON при импорте читается в память целиком")
+
+
+def _dumps_json(obj) -> bytes:
+    """JSON в UTF-8 с отступом 2: orjson (C), иначе стандартный json."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2, default=str)
+    return json.dumps(obj, ensure_ascii=False, indent=2, default=str).encode("utf-8")
+
 
 def ensure_dir(path: Path):
     """Создать директорию если не существует."""
@@ -20,11 +50,63 @@ def ensure_dir(path: Path):
 
 def get_file_size_str(size_bytes: int) -> str:
     """Человекочитаемый размер файла."""
-    for unit in ["Б", "КБ", "МБ", "ГБ"]:
-        if size_bytes < 1024:
-            return f"{size_bytes:.1f} {unit}"
-        size_bytes /= 1024
-    return f"{size_bytes:.1f} ТБ"
+    if size_bytes < 1024:
+        return f"{size_bytes:.1f} Б"
+    # Единица — сразу по числу бит: каждые 10 бит = ×1024
+    i = min((int(size_bytes).bit_length() - 1) // 10, 4)
+    return f"{size_bytes / (1 << (i * 10)):.1f} {_SIZE_UNITS[i]}"
+
+
+def file_sha256(path, chunk_size: int = 64 * 1024) -> str:
+    """SHA-256 содержимого файла (читается блоками, без загрузки целиком)."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(chunk_size), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def iter_json_items(path, prefix: str):
+    """Потоково отдать элементы массива по ijson-префиксу ('notes.item', 'item').
+
+    Файл открывается лениво, при первой итерации. Нужен установленный ijson.
+    """
+    with open(path, "rb") as f:
+        yield from ijson.items(f, prefix, use_float=True)
+
+
+def _export_sections(path: Path, keys) -> dict:
+    """Коллекции JSON-экспорта: через ijson — ленивые потоки, иначе списки из json.load."""
+    if ijson is not None:
+        return {key: iter_json_items(path, f"{key}.item") for key in keys}
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return {key: data.get(key, []) for key in keys}
+
+
+# ioctl FICLONE (Linux: Btrfs, XFS с reflink) — CoW-клон файла без копирования данных
+_FICLONE = 0x40049409
+
+
+def _clone_file(src: Path, dst: Path) -> bool:
+    """Клонировать файл copy-on-write (метаданные ФС, O(1)). False — ФС/ОС не умеет."""
+    try:
+        if sys.platform.startswith("linux"):
+            import fcntl
+            with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+                fcntl.ioctl(fdst.fileno(), _FICLONE, fsrc.fileno())
+            return True
+        if sys.platform == "darwin":
+            import ctypes
+            libc = ctypes.CDLL(None, use_errno=True)
+            return libc.clonefile(os.fsencode(src), os.fsencode(dst), 0) == 0
+    except (OSError, AttributeError):
+        # Частично созданный приёмник не оставляем — дальше обычное копирование
+        try:
+            os.unlink(dst)
+        except OSError:
+            pass
+    return False
 
 
 def create_backup(db_path: Path) -> Optional[str]:
@@ -34,7 +116,10 @@ def create_backup(db_path: Path) -> Optional[str]:
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         backup_name = f"sphere_backup_{timestamp}.db"
         backup_path = BACKUPS_DIR / backup_name
-        shutil.copy2(db_path, backup_path)
+        if _clone_file(db_path, backup_path):
+            shutil.copystat(db_path, backup_path)
+        else:
+            shutil.copy2(db_path, backup_path)
         logger.info(f"Бэкап создан: {backup_path}")
         return str(backup_path)
     except Exception as e:
@@ -42,6 +127,14 @@ def create_backup(db_path: Path) -> Optional[str]:
         return None
 
 
+def _write_note(export_dir: Path, filename: str, note: dict):
+    """Записать одну заметку в Markdown-файл."""
+    content = note.get("content", "")
+    with open(export_dir / filename, "w", encoding="utf-8") as f:
+        f.write(f"# {note.get('title', '')}\n\n")
+        f.write(content)
+
+
 def export_notes_to_files(db) -> str:
     """Экспортировать все заметки в Markdown файлы."""
     ensure_dir(EXPORTS_DIR)
@@ -50,13 +143,22 @@ def export_notes_to_files(db) -> str:
     export_dir.mkdir(parents=True, exist_ok=True)
 
     notes = db.get_notes(limit=10000)
+    # Имя файла -> заметка. Одинаковые заголовки получают суффикс _1, _2, ...,
+    # поэтому заметки не затирают друг друга и два потока не пишут в один файл.
+    # Повтор ищется без учёта регистра: на APFS (macOS) и NTFS «Plan» и «plan» — один файл
+    by_filename = {}
+    taken = set()
     for note in notes:
-        title = note.get("title", "untitled").replace("/", "_").replace("\\", "_")
-        content = note.get("content", "")
-        filename = f"{title}.md"
-        with open(export_dir / filename, "w", encoding="utf-8") as f:
-            f.write(f"# {note.get('title', '')}\n\n")
-            f.write(content)
+        stem = (note.get("title") or "untitled").translate(_FILENAME_TRANS)
+        filename, n = f"{stem}.md", 0
+        while filename.casefold() in taken:
+            n += 1
+            filename = f"{stem}_{n}.md"
+        taken.add(filename.casefold())
+        by_filename[filename] = note
+    with ThreadPoolExecutor(max_workers=EXPORT_WRITE_WORKERS, thread_name_prefix="export") as pool:
+        # list() — дождаться всех записей и пробросить первую ошибку
+        list(pool.map(partial(_write_note, export_dir), by_filename, by_filename.values()))
 
     logger.info(f"Экспортировано {len(notes)} заметок в {export_dir}")
     return str(export_dir)
@@ -68,16 +170,21 @@ def export_data_to_json(db) -> str:
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     export_path = EXPORTS_DIR / f"sphere_export_{timestamp}.json"
 
-    data = {
-        "notes": db.get_notes(limit=10000),
-        "tasks": db.get_tasks(limit=10000),
-        "events": db.get_events(limit=10000),
-        "documents": db.get_documents(limit=10000),
-        "exported_at": datetime.now().isoformat(),
-    }
-
-    with open(export_path, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2, default=str)
+    # Коллекции пишутся в файл по очереди: в памяти одновременно одна коллекция
+    # и её закодированный буфер, а не весь экспорт целиком
+    collections = (
+        ("notes", db.get_notes),
+        ("tasks", db.get_tasks),
+        ("events", db.get_events),
+        ("documents", db.get_documents),
+    )
+    with open(export_path, "wb") as f:
+        f.write(b"{")
+        for key, load in collections:
+            f.write(b'\n"' + key.encode() + b'": ')
+            f.write(_dumps_json(load(limit=10000)))
+            f.write(b",")
+        f.write(b'\n"exported_at": ' + _dumps_json(datetime.now().isoformat()) + b"\n}\n")
 
     logger.info(f"Данные экспортированы: {export_path}")
     return str(export_path)
@@ -87,13 +194,21 @@ def list_backups() -> list:
     """Получить список бэкапов."""
     if not BACKUPS_DIR.exists():
         return []
+    # scandir: имя без лишних syscalls, размер и mtime — из одного stat на файл
+    with os.scandir(BACKUPS_DIR) as it:
+        entries = [
+            e for e in it
+            if e.name.startswith("sphere_backup_") and e.name.endswith(".db")
+        ]
+    entries.sort(key=lambda e: e.name, reverse=True)
     backups = []
-    for f in sorted(BACKUPS_DIR.glob("sphere_backup_*.db"), reverse=True):
+    for e in entries:
+        st = e.stat()
         backups.append({
-            "filename": f.name,
-            "path": str(f),
-            "size": get_file_size_str(f.stat().st_size),
-            "created": datetime.fromtimestamp(f.stat().st_mtime).isoformat(),
+            "filename": e.name,
+            "path": e.path,
+            "size": get_file_size_str(st.st_size),
+            "created": datetime.fromtimestamp(st.st_mtime).isoformat(),
         })
     return backups
 
@@ -106,56 +221,66 @@ def restore_from_export(db, export_path) -> None:
     path = Path(export_path)
     if not path.exists():
         raise FileNotFoundError(export_path)
-    with open(path, "r", encoding="utf-8") as f:
-        data = json.load(f)
-    notes = data.get("notes", [])
-    tasks = data.get("tasks", [])
-    events = data.get("events", [])
-    documents = data.get("documents", [])
-
-    for n in notes:
-        tags = n.get("tags")
-        if isinstance(tags, str):
-            try:
-                tags = json.loads(tags)
-            except Exception:
-                tags = []
-        db.create_note(
-            title=n.get("title", ""),
-            content=n.get("content", ""),
-            folder=n.get("folder", "Inbox"),
-            tags=tags or [],
-        )
-    logger.info(f"Восстановлено заметок: {len(notes)}")
-
-    for t in tasks:
-        db.create_task(
-            title=t.get("title", ""),
-            description=t.get("description", ""),
-            status=t.get("status", "todo"),
-            priority=int(t.get("priority", 2)),
-            due_date=t.get("due_date"),
-            project=t.get("project", ""),
-        )
-    logger.info(f"Восстановлено задач: {len(tasks)}")
-
-    for ev in events:
-        db.create_event(
-            title=ev.get("title", ""),
-            start_time=ev.get("start_time", ""),
-            end_time=ev.get("end_time"),
-            description=ev.get("description", ""),
-            location=ev.get("location", ""),
-            is_all_day=bool(ev.get("is_all_day", False)),
-            color=ev.get("color", ""),
-        )
-    logger.info(f"Восстановлено событий: {len(events)}")
-
-    for d in documents:
-        db.add_document(
-            filename=d.get("filename", ""),
-            filepath=d.get("filepath", ""),
-            filetype=d.get("filetype", ""),
-            title=d.get("title", ""),
-        )
-    logger.info(f"Восстановлено документов (метаданные): {len(documents)}")
+    # С ijson записи идут из файла прямо в executemany — память не зависит от размера экспорта
+    sections = _export_sections(path, ("notes", "tasks", "events", "documents"))
+    notes = sections["notes"]
+    tasks = sections["tasks"]
+    events = sections["events"]
+    documents = sections["documents"]
+
+    # Каждая коллекция — одной транзакцией (executemany), а не commit на запись
+    def _note_rows():
+        for n in notes:
+            tags = n.get("tags")
+            if isinstance(tags, str):
+                try:
+                    tags = json.loads(tags)
+                except Exception:
+                    tags = []
+            yield {
+                "title": n.get("title", ""),
+                "content": n.get("content", ""),
+                "folder": n.get("folder", "Inbox"),
+                "tags": tags or [],
+            }
+
+    count = db.create_notes_bulk(_note_rows())
+    logger.info(f"Восстановлено заметок: {count}")
+
+    count = db.create_tasks_bulk(
+        {
+            "title": t.get("title", ""),
+            "description": t.get("description", ""),
+            "status": t.get("status", "todo"),
+            "priority": int(t.get("priority", 2)),
+            "due_date": t.get("due_date"),
+            "project": t.get("project", ""),
+        }
+        for t in tasks
+    )
+    logger.info(f"Восстановлено задач: {count}")
+
+    count = db.create_events_bulk(
+        {
+            "title": ev.get("title", ""),
+            "start_time": ev.get("start_time", ""),
+            "end_time": ev.get("end_time"),
+            "description": ev.get("description", ""),
+            "location": ev.get("location", ""),
+            "is_all_day": bool(ev.get("is_all_day", False)),
+            "color": ev.get("color", ""),
+        }
+        for ev in events
+    )
+    logger.info(f"Восстановлено событий: {count}")
+
+    count = db.add_documents_bulk(
+        {
+            "filename": d.get("filename", ""),
+            "filepath": d.get("filepath", ""),
+            "filetype": d.get("filetype", ""),
+            "title": d.get("title", ""),
+        }
+        for d in documents
+    )
+    logger.info(f"Восстановлено документов (метаданные): {count}")
@@ -2,29 +2,47 @@
 Sphere — Импорт данных из других форматов.
 """
 
+import os
 import json
 import csv
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import List, Dict
 from loguru import logger
 
+from utils.file_utils import ijson, iter_json_items
 
-def import_notes_from_json(filepath: str, db) -> int:
-    """Импортировать заметки из JSON файла."""
-    try:
+# Потоков чтения при импорте папки Markdown: чтение мелких файлов упирается
+# в задержку диска, а не в CPU, поэтому запросы выгодно перекрывать
+IMPORT_READ_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+
+
+def _iter_notes_json(filepath: str):
+    """Заметки из JSON: корень — массив заметок или объект с ключом notes."""
+    if ijson is None:
         with open(filepath, "r", encoding="utf-8") as f:
             data = json.load(f)
+        return data if isinstance(data, list) else data.get("notes", [])
+    # Вид корня по первому значащему байту — дальше потоковый разбор без загрузки файла
+    with open(filepath, "rb") as f:
+        head = f.read(64).lstrip(b"\xef\xbb\xbf \t\r\n")
+    return iter_json_items(filepath, "item" if head.startswith(b"[") else "notes.item")
 
-        notes = data if isinstance(data, list) else data.get("notes", [])
-        count = 0
-        for note in notes:
-            db.create_note(
-                title=note.get("title", "Импортированная заметка"),
-                content=note.get("content", ""),
-                folder=note.get("folder", "Inbox"),
-                tags=note.get("tags", []),
-            )
-            count += 1
+
+def import_notes_from_json(filepath: str, db) -> int:
+    """Импортировать заметки из JSON файла."""
+    try:
+        notes = _iter_notes_json(filepath)
+        # Одна транзакция на весь файл вместо commit на каждую заметку
+        count = db.create_notes_bulk(
+            {
+                "title": note.get("title", "Импортированная заметка"),
+                "content": note.get("content", ""),
+                "folder": note.get("folder", "Inbox"),
+                "tags": note.get("tags", []),
+            }
+            for note in notes
+        )
         logger.info(f"Импортировано {count} заметок из {filepath}")
         return count
     except Exception as e:
@@ -35,19 +53,33 @@ def import_notes_from_json(filepath: str, db) -> int:
 def import_tasks_from_csv(filepath: str, db) -> int:
     """Импортировать задачи из CSV файла."""
     try:
-        count = 0
         with open(filepath, "r", encoding="utf-8") as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                db.create_task(
-                    title=row.get("title", row.get("name", "")),
-                    description=row.get("description", ""),
-                    status=row.get("status", "todo"),
-                    priority=int(row.get("priority", 2)),
-                    project=row.get("project", ""),
-                    due_date=row.get("due_date", None),
-                )
-                count += 1
+            # csv.reader + индексы колонок из заголовка: без dict на каждую строку
+            reader = csv.reader(f)
+            header = next(reader, [])
+            col = {name: i for i, name in enumerate(header)}
+            title_i = col.get("title", col.get("name"))
+            desc_i = col.get("description")
+            status_i = col.get("status")
+            priority_i = col.get("priority")
+            project_i = col.get("project")
+            due_i = col.get("due_date")
+
+            def _cell(row, i, default):
+                return row[i] if i is not None and i < len(row) else default
+
+            count = db.create_tasks_bulk(
+                {
+                    "title": _cell(row, title_i, ""),
+                    "description": _cell(row, desc_i, ""),
+                    "status": _cell(row, status_i, "todo"),
+                    "priority": int(_cell(row, priority_i, 2)),
+                    "project": _cell(row, project_i, ""),
+                    "due_date": _cell(row, due_i, None),
+                }
+                for row in reader
+                if row  # пустые строки DictReader тоже пропускал
+            )
         logger.info(f"Импортировано {count} задач из {filepath}")
         return count
     except Exception as e:
@@ -55,20 +87,25 @@ def import_tasks_from_csv(filepath: str, db) -> int:
         return 0
 
 
+def _read_markdown_note(path: str) -> dict:
+    """Прочитать один .md файл в заметку."""
+    with open(path, "r", encoding="utf-8") as f:
+        content = f.read()
+    return {"title": Path(path).stem, "content": content, "folder": "Импорт"}
+
+
 def import_markdown_files(directory: str, db) -> int:
     """Импортировать все .md файлы из директории."""
     try:
-        dir_path = Path(directory)
-        count = 0
-        for md_file in dir_path.glob("**/*.md"):
-            title = md_file.stem
-            content = md_file.read_text(encoding="utf-8")
-            db.create_note(
-                title=title,
-                content=content,
-                folder="Импорт",
-            )
-            count += 1
+        paths = [
+            os.path.join(root, name)
+            for root, _dirs, files in os.walk(directory)
+            for name in files
+            if name.endswith(".md")
+        ]
+        # Файлы читаются параллельно, запись в БД — одной транзакцией в этом потоке
+        with ThreadPoolExecutor(max_workers=IMPORT_READ_WORKERS, thread_name_prefix="import") as pool:
+            count = db.create_notes_bulk(pool.map(_read_markdown_note, paths))
         logger.info(f"Импортировано {count} Markdown файлов из {directory}")
         return count
     except Exception as e:
@@ -3,7 +3,11 @@ Sphere — мониторинг ресурсов (CPU, RAM) и оценка со
 """
 
 from typing import Tuple
+import functools
+import math
 import platform
+import time
+from bisect import bisect_right
 
 try:
     import psutil
@@ -31,25 +35,49 @@ def get_memory_info() -> Tuple[float, float]:
         return 0.0, 0.0
 
 
+# Как часто (сек) перечитывать свободное место на диске
+DISK_USAGE_TTL = 30.0
+
+_disk_free_cache: Tuple[float, float] = (0.0, 0.0)  # (monotonic-время замера, ГБ)
+
+
+@functools.lru_cache(maxsize=1)
+def _static_system_info() -> dict:
+    """Неизменные за время жизни процесса параметры: ядра, ОС, архитектура."""
+    system = platform.system()
+    machine = platform.machine() or ""
+    return {
+        "cpu_count": psutil.cpu_count(logical=True) or 0,
+        "system": system,
+        "machine": machine,
+        # Apple Silicon: macOS + arm64 (M1/M2/M3, включая Air/Pro/Max)
+        "is_apple_silicon": system == "Darwin" and "arm" in machine.lower(),
+    }
+
+
+def _disk_free_gb() -> float:
+    """Свободное место на / (ГБ), не чаще раза в DISK_USAGE_TTL."""
+    global _disk_free_cache
+    now = time.monotonic()
+    measured_at, free_gb = _disk_free_cache
+    if measured_at and now - measured_at < DISK_USAGE_TTL:
+        return free_gb
+    free_gb = round(psutil.disk_usage("/").free / (1024 ** 3), 1)
+    _disk_free_cache = (now, free_gb)
+    return free_gb
+
+
 def get_system_info() -> dict:
     """Сбор информации о системе для теста совместимости с ИИ."""
     if psutil is None:
         return {"error": "Установите psutil: pip install psutil"}
     try:
         v = psutil.virtual_memory()
-        system = platform.system()
-        machine = platform.machine() or ""
-        # Apple Silicon: macOS + arm64 (M1/M2/M3, включая Air/Pro/Max)
-        is_apple_silicon = system == "Darwin" and "arm" in machine.lower()
-        return {
-            "cpu_count": psutil.cpu_count(logical=True) or 0,
-            "ram_total_gb": round(v.total / (1024 ** 3), 1),
-            "ram_available_gb": round(v.available / (1024 ** 3), 1),
-            "disk_free_gb": round(psutil.disk_usage("/").free / (1024 ** 3), 1),
-            "system": system,
-            "machine": machine,
-            "is_apple_silicon": is_apple_silicon,
-        }
+        info = dict(_static_system_info())
+        info["ram_total_gb"] = round(v.total / (1024 ** 3), 1)
+        info["ram_available_gb"] = round(v.available / (1024 ** 3), 1)
+        info["disk_free_gb"] = _disk_free_gb()
+        return info
     except Exception as e:
         return {"error": str(e)}
 
@@ -61,74 +89,78 @@ def get_recommended_models(system_info: dict) -> list:
     """
     if "error" in system_info:
         return []
-    ram_gb = system_info.get("ram_total_gb", 0)
-    cpu_count = system_info.get("cpu_count", 0)
-    is_apple = bool(system_info.get("is_apple_silicon"))
+    return list(_recommended_models(
+        system_info.get("ram_total_gb", 0),
+        system_info.get("cpu_count", 0),
+        bool(system_info.get("is_apple_silicon")),
+    ))
 
-    # Ниже 4 ГБ RAM — честно предупреждаем, что комфортной работы не будет.
-    if ram_gb < 4:
-        return [
-            "Устройство с <4 GB RAM — ИИ будет работать очень медленно.",
-            "Рекомендуется минимум 4–6 GB RAM даже для самых маленьких моделей.",
-        ]
 
-    # 4–6 GB — только самые лёгкие модели.
-    if ram_gb < 6:
-        base = [
-            "llama3.2:1b — очень лёгкая, подойдёт для слабых ПК / ноутбуков",
-            "phi3:mini — компактная модель от Microsoft",
-            "qwen2:0.5b — минимальные требования по памяти",
-        ]
-        if is_apple:
-            base.append("На MacBook Air M1/M2 8 GB можно попробовать 3B‑модели, но с просадками скорости.")
-        return base
+# Верхние границы RAM (ГБ, не включительно) для уровней рекомендаций;
+# 64 ГБ ещё относятся к уровню «24–64», поэтому граница — следующее за 64 число
+_TIER_THRESHOLDS = (4, 6, 8, 12, 24, math.nextafter(64, math.inf))
 
+_TIER_MODELS = (
+    # Ниже 4 ГБ RAM — честно предупреждаем, что комфортной работы не будет.
+    (
+        "Устройство с <4 GB RAM — ИИ будет работать очень медленно.",
+        "Рекомендуется минимум 4–6 GB RAM даже для самых маленьких моделей.",
+    ),
+    # 4–6 GB — только самые лёгкие модели.
+    (
+        "llama3.2:1b — очень лёгкая, подойдёт для слабых ПК / ноутбуков",
+        "phi3:mini — компактная модель от Microsoft",
+        "qwen2:0.5b — минимальные требования по памяти",
+    ),
     # 6–8 GB — уже можно 3B‑класс, но аккуратно.
-    if ram_gb < 8:
-        return [
-            "llama3.2:1b — максимально отзывчивая",
-            "llama3.2:3b — рабочий компромисс при 6–8 GB RAM",
-            "phi3:medium — средний размер, но следите за нагрузкой",
-        ]
-
+    (
+        "llama3.2:1b — максимально отзывчивая",
+        "llama3.2:3b — рабочий компромисс при 6–8 GB RAM",
+        "phi3:medium — средний размер, но следите за нагрузкой",
+    ),
     # 8–12 GB — комфортные 3B/7B.
-    if ram_gb < 12:
-        rec = [
-            "llama3.2:3b — хороший баланс качества и скорости",
-            "mistral:7b — качество при умеренной нагрузке (8–12 GB RAM)",
-            "phi3:medium — универсальная модель",
-        ]
-        if is_apple:
-            rec.append("MacBook Air/Pro M1/M2 8–16 GB: оптимальны модели до ~7B параметров.")
-        return rec
-
+    (
+        "llama3.2:3b — хороший баланс качества и скорости",
+        "mistral:7b — качество при умеренной нагрузке (8–12 GB RAM)",
+        "phi3:medium — универсальная модель",
+    ),
     # 12–24 GB — 7–8B как основная рабочая лошадка.
-    if ram_gb < 24:
-        rec = [
-            "llama3.1:8b — рекомендуемая по умолчанию для 16–24 GB RAM",
-            "mistral:7b — быстрая и умная",
-            "qwen2:7b — сильная универсальная модель",
-            "deepseek-r1:7b — рассуждения и chain-of-thought",
-        ]
-        if is_apple:
-            rec.append("Mac с 16–24 GB (M‑серия): можно стабильно использовать 7–8B модели.")
-        return rec
-
+    (
+        "llama3.1:8b — рекомендуемая по умолчанию для 16–24 GB RAM",
+        "mistral:7b — быстрая и умная",
+        "qwen2:7b — сильная универсальная модель",
+        "deepseek-r1:7b — рассуждения и chain-of-thought",
+    ),
     # 24–64 GB — можно думать о больших 30–70B, но с оглядкой на формат квантования.
-    if ram_gb <= 64:
-        rec = [
-            "llama3.1:8b — быстрая и достаточная для большинства задач",
-            "mistral:7b — рабочая лошадка",
-            "qwen2:7b / 14b — больше качества при достаточном объёме RAM",
-            "llama3.1:70b — возможна в квантованном виде, но требует аккуратной настройки (лучше 48–64 GB RAM)",
-        ]
-        if is_apple:
-            rec.append("Mac Studio / MacBook Pro 32–64 GB: можно экспериментировать с 30–70B квантованными моделями.")
-        return rec
-
+    (
+        "llama3.1:8b — быстрая и достаточная для большинства задач",
+        "mistral:7b — рабочая лошадка",
+        "qwen2:7b / 14b — больше качества при достаточном объёме RAM",
+        "llama3.1:70b — возможна в квантованном виде, но требует аккуратной настройки (лучше 48–64 GB RAM)",
+    ),
     # >64 GB — хай‑энд стенд.
-    return [
+    (
         "llama3.1:70b — максимальное качество (64+ GB RAM, лучше 80+)",
         "qwen2:72b — топ‑модель при большом объёме памяти",
         "llama3.1:8b и mistral:7b — быстрые модели для повседневной работы параллельно с тяжёлыми.",
-    ]
+    ),
+)
+
+# Дополнительная подсказка для Apple Silicon по уровню (None — без подсказки)
+_APPLE_NOTES = (
+    None,
+    "На MacBook Air M1/M2 8 GB можно попробовать 3B‑модели, но с просадками скорости.",
+    None,
+    "MacBook Air/Pro M1/M2 8–16 GB: оптимальны модели до ~7B параметров.",
+    "Mac с 16–24 GB (M‑серия): можно стабильно использовать 7–8B модели.",
+    "Mac Studio / MacBook Pro 32–64 GB: можно экспериментировать с 30–70B квантованными моделями.",
+    None,
+)
+
+
+@functools.lru_cache(maxsize=16)
+def _recommended_models(ram_gb: float, cpu_count: int, is_apple: bool) -> Tuple[str, ...]:
+    """Рекомендации по (RAM, ядра, Apple Silicon) — чистая функция, кешируется."""
+    tier = bisect_right(_TIER_THRESHOLDS, ram_gb)
+    note = _APPLE_NOTES[tier] if is_apple else None
+    return _TIER_MODELS[tier] if note is None else _TIER_MODELS[tier] + (note,)
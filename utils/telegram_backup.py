@@ -5,12 +5,20 @@ Sphere — выгрузка и скачивание бекапа через Tele
 """
 
 import asyncio
+import functools
 from pathlib import Path
 from typing import Tuple, Optional
 
 from loguru import logger
 
 
+@functools.lru_cache(maxsize=4)
+def _bot(token: str):
+    """Bot на токен — один на процесс: HTTP-клиент и TLS-сессия переиспользуются."""
+    from telegram import Bot
+    return Bot(token=token)
+
+
 async def send_backup_to_telegram(
     bot_token: str,
     chat_id: str,
@@ -23,16 +31,17 @@ async def send_backup_to_telegram(
     if not path.exists():
         return None, "Файл не найден"
     try:
-        from telegram import Bot
-        bot = Bot(token=bot_token)
-        with open(path, "rb") as f:
-            msg = await bot.send_document(
-                chat_id=chat_id,
-                document=f,
-                filename=path.name,
-                read_timeout=60,
-                write_timeout=60,
-            )
+        bot = _bot(bot_token)
+        # Чтение файла — в пуле потоков, чтобы не блокировать цикл событий UI;
+        # бекап — текстовый JSON, байты целиком уходят одним multipart-запросом
+        data = await asyncio.to_thread(path.read_bytes)
+        msg = await bot.send_document(
+            chat_id=chat_id,
+            document=data,
+            filename=path.name,
+            read_timeout=60,
+            write_timeout=60,
+        )
         file_id = msg.document.file_id if msg.document else None
         if not file_id:
             return None, "Не удалось получить file_id"
@@ -53,8 +62,7 @@ async def get_backup_from_telegram(
     Скачать файл из Telegram по file_id. Возвращает (True, None) или (False, error_message).
     """
     try:
-        from telegram import Bot
-        bot = Bot(token=bot_token)
+        bot = _bot(bot_token)
         file = await bot.get_file(file_id)
         dest = Path(dest_path)
         dest.parent.mkdir(parents=True, exist_ok=True)
@@ -6,10 +6,31 @@ import re
 from typing import List
 
 
+_WS_RE = re.compile(r"\s+")
+
+# Проходы markdown_to_plain, скомпилированные один раз. Порядок важен: каждый проход
+# видит результат предыдущего (выделение внутри ссылки, ссылка внутри выделения,
+# маркер списка, открывшийся после снятия выделения), поэтому одной альтернацией
+# их не заменить без расхождений в выводе
+_MD_PASSES = (
+    # Заголовки
+    (re.compile(r"#{1,6}\s*"), ""),
+    # Жирный/курсив
+    (re.compile(r"\*{1,3}(.*?)\*{1,3}"), r"\1"),
+    (re.compile(r"_{1,3}(.*?)_{1,3}"), r"\1"),
+    # Ссылки
+    (re.compile(r"\[([^\]]+)\]\([^)]+\)"), r"\1"),
+    # Код
+    (re.compile(r"`{1,3}[^`]*`{1,3}"), ""),
+    # Списки
+    (re.compile(r"^\s*[-*+]\s+", re.MULTILINE), ""),
+    (re.compile(r"^\s*\d+\.\s+", re.MULTILINE), ""),
+)
+
+
 def clean_text(text: str) -> str:
     """Очистить текст от лишних пробелов и спецсимволов."""
-    text = re.sub(r"\s+", " ", text)
-    return text.strip()
+    return _WS_RE.sub(" ", text).strip()
 
 
 def truncate(text: str, max_length: int = 100, suffix: str = "...") -> str:
@@ -26,18 +47,8 @@ def extract_tags(text: str) -> List[str]:
 
 def markdown_to_plain(text: str) -> str:
     """Простое преобразование Markdown в plain text."""
-    # Убираем заголовки
-    text = re.sub(r"#{1,6}\s*", "", text)
-    # Убираем жирный/курсив
-    text = re.sub(r"\*{1,3}(.*?)\*{1,3}", r"\1", text)
-    text = re.sub(r"_{1,3}(.*?)_{1,3}", r"\1", text)
-    # Убираем ссылки
-    text = re.sub(r"\[([^\]]+)\]\([^)]+\)", r"\1", text)
-    # Убираем код
-    text = re.sub(r"`{1,3}[^`]*`{1,3}", "", text)
-    # Убираем списки
-    text = re.sub(r"^\s*[-*+]\s+", "", text, flags=re.MULTILINE)
-    text = re.sub(r"^\s*\d+\.\s+", "", text, flags=re.MULTILINE)
+    for pattern, repl in _MD_PASSES:
+        text = pattern.sub(repl, text)
     return clean_text(text)
 
 
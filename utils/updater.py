@@ -4,55 +4,175 @@ Sphere — Обновления через Git.
 Проверка новых коммитов в remote, установка по согласию пользователя.
 """
 
+import functools
+import os
+import re
+import shutil
 import subprocess
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import Callable, Dict, Optional, Tuple
 
 from loguru import logger
 
 # Корень репозитория (родитель utils/)
 REPO_ROOT = Path(__file__).resolve().parent.parent
+# Время последнего удачного git fetch (mtime файла) и минимальный интервал между fetch
+FETCH_STAMP = REPO_ROOT / ".git" / ".sphere_last_fetch"
+MIN_FETCH_INTERVAL = 60
 
+# Команда перезапуска: тот же интерпретатор, скрипт и аргументы, что при старте
+_RESTART_ARGV = (sys.executable, sys.argv[0], *sys.argv[1:])
 
+# Полный путь к git: с ним (и без cwd/close_fds) subprocess запускает процесс через
+# posix_spawn, а не fork + exec с закрытием всех дескрипторов
+_GIT = shutil.which("git") or "git"
+
+# Хеш коммита: SHA-1 (40) или SHA-256 (64) в hex
+_SHA_RE = re.compile(r"[0-9a-f]{40}(?:[0-9a-f]{24})?")
+
+# (время, ответ) последнего ls-remote — повторные проверки из UI не ходят в сеть чаще MIN_FETCH_INTERVAL
+_ls_remote_cache: Tuple[float, Dict[str, str]] = (float("-inf"), {})
+
+
+def _run_git(*args: str, timeout: float = 5, stdout=subprocess.PIPE) -> subprocess.CompletedProcess:
+    """Запустить git в REPO_ROOT; stdout — байты, stderr отбрасывается.
+
+    Каталог задаётся через -C, а не cwd, и close_fds=False: иначе CPython не берёт
+    posix_spawn. Дескрипторы Python по умолчанию ненаследуемые, в git они не утекут.
+    """
+    return subprocess.run(
+        [_GIT, "-C", str(REPO_ROOT), *args],
+        stdout=stdout,
+        stderr=subprocess.DEVNULL,
+        timeout=timeout,
+        close_fds=False,
+    )
+
+
+@functools.cache
 def is_git_repo() -> bool:
-    """Проверить, что проект в Git-репозитории."""
+    """Проверить, что проект в Git-репозитории (ответ за время работы процесса не меняется)."""
     return (REPO_ROOT / ".git").exists()
 
 
-def get_current_commit() -> Optional[str]:
-    """Получить хеш текущего коммита."""
+def _read_head_sha() -> Optional[str]:
+    """Хеш HEAD прямо из файлов .git (HEAD, refs/heads/*, packed-refs) — без запуска git.
+
+    None, если так прочитать не вышло (worktree, где .git — файл, и прочие особые случаи).
+    """
+    git_dir = REPO_ROOT / ".git"
     try:
-        result = subprocess.run(
-            ["git", "rev-parse", "HEAD"],
-            cwd=REPO_ROOT,
-            capture_output=True,
-            text=True,
-            timeout=5,
-        )
+        head = (git_dir / "HEAD").read_text(encoding="utf-8").strip()
+        if not head.startswith("ref: "):
+            return head if _SHA_RE.fullmatch(head) else None
+        ref = head[5:]
+        ref_path = git_dir / ref
+        if ref_path.is_file():
+            sha = ref_path.read_text(encoding="utf-8").strip()
+            return sha if _SHA_RE.fullmatch(sha) else None
+        # Ссылка упакована (git gc / pack-refs): строки «<хеш> <ссылка>»
+        suffix = " " + ref
+        for line in (git_dir / "packed-refs").read_text(encoding="utf-8").splitlines():
+            if line.endswith(suffix) and _SHA_RE.fullmatch(line[:-len(suffix)]):
+                return line[:-len(suffix)]
+    except OSError:
+        pass
+    return None
+
+
+def _head_sha() -> Optional[str]:
+    """Полный хеш HEAD: из файлов .git, иначе через git rev-parse."""
+    sha = _read_head_sha()
+    if sha is not None:
+        return sha
+    try:
+        result = _run_git("rev-parse", "HEAD")
         if result.returncode == 0:
-            return result.stdout.strip()[:8]
+            return result.stdout.decode("ascii").strip()
     except Exception as e:
         logger.debug(f"get_current_commit: {e}")
     return None
 
 
-def fetch_remote() -> bool:
-    """Получить изменения с remote (без merge)."""
+def get_current_commit() -> Optional[str]:
+    """Получить хеш текущего коммита."""
+    sha = _head_sha()
+    return sha[:8] if sha else None
+
+
+def fetch_remote(force: bool = False, branches: Tuple[str, ...] = ()) -> bool:
+    """Получить изменения с remote (без merge).
+
+    Повторный вызов в течение MIN_FETCH_INTERVAL секунд после удачного fetch
+    не ходит в сеть: origin/* и так свежие. force=True — fetch всегда.
+    Теги не качаются: для проверки обновлений нужны только вершины веток.
+    branches — обновить только эти ветки origin (иначе все из refspec remote).
+    """
     try:
-        result = subprocess.run(
-            ["git", "fetch", "origin"],
-            cwd=REPO_ROOT,
-            capture_output=True,
-            text=True,
-            timeout=30,
-        )
-        return result.returncode == 0
+        if not force and time.time() - FETCH_STAMP.stat().st_mtime < MIN_FETCH_INTERVAL:
+            return True
+    except OSError:
+        pass
+    try:
+        refspecs = [f"+refs/heads/{b}:refs/remotes/origin/{b}" for b in branches]
+        result = _run_git("fetch", "--no-tags", "origin", *refspecs, timeout=30, stdout=subprocess.DEVNULL)
+        if result.returncode != 0:
+            return False
+        if not branches:
+            try:
+                FETCH_STAMP.touch()
+            except OSError as e:
+                logger.debug(f"fetch_remote stamp: {e}")
+        return True
     except Exception as e:
         logger.warning(f"fetch_remote: {e}")
     return False
 
 
+def _ls_remote_shas() -> Optional[Dict[str, str]]:
+    """Хеши main и master на самом remote — один сетевой запрос без загрузки объектов."""
+    global _ls_remote_cache
+    checked_at, cached = _ls_remote_cache
+    if time.monotonic() - checked_at < MIN_FETCH_INTERVAL:
+        return cached
+    try:
+        result = _run_git("ls-remote", "origin", "refs/heads/main", "refs/heads/master", timeout=30)
+    except Exception as e:
+        logger.warning(f"ls_remote: {e}")
+        return None
+    if result.returncode != 0:
+        return None
+    shas = {}
+    for line in result.stdout.decode("ascii").splitlines():
+        sha, _, ref = line.partition("\t")
+        shas[ref.rpartition("/")[2]] = sha
+    _ls_remote_cache = (time.monotonic(), shas)
+    return shas
+
+
+def _remote_branch_shas() -> Dict[str, str]:
+    """Хеши origin/main и origin/master одним вызовом git (отсутствующие ветки не попадают)."""
+    result = _run_git(
+        "for-each-ref", "--format=%(objectname) %(refname:lstrip=3)",
+        "refs/remotes/origin/main", "refs/remotes/origin/master",
+    )
+    if result.returncode != 0:
+        return {}
+    lines = result.stdout.decode("ascii").splitlines()
+    return {branch: sha for sha, branch in (line.split(" ", 1) for line in lines)}
+
+
+def _commits_ahead(sha: str) -> int:
+    """Сколько коммитов в sha, которых нет в HEAD (0 при ошибке)."""
+    result = _run_git("rev-list", "--count", f"HEAD..{sha}")
+    if result.returncode == 0 and result.stdout.strip():
+        return int(result.stdout)
+    return 0
+
+
 def check_for_updates() -> Tuple[bool, Optional[str], Optional[str]]:
     """
     Проверить наличие обновлений.
@@ -64,32 +184,41 @@ def check_for_updates() -> Tuple[bool, Optional[str], Optional[str]]:
     if not is_git_repo():
         return False, get_current_commit(), None
 
-    current = get_current_commit()
-    if not fetch_remote():
+    head = _head_sha()
+    current = head[:8] if head else None
+    # Сначала только сравнить вершины веток на remote с HEAD: в частом случае
+    # «обновлений нет» ничего не скачивается
+    remote = _ls_remote_shas()
+    if remote is None:
         return False, current, None
 
     try:
-        # Сколько коммитов впереди на origin/main или origin/master?
-        for branch in ["main", "master"]:
-            result = subprocess.run(
-                ["git", "rev-list", "--count", f"HEAD..origin/{branch}"],
-                cwd=REPO_ROOT,
-                capture_output=True,
-                text=True,
-                timeout=5,
-            )
-            if result.returncode == 0 and result.stdout.strip():
-                count = int(result.stdout.strip())
-                if count > 0:
-                    r2 = subprocess.run(
-                        ["git", "rev-parse", f"origin/{branch}"],
-                        cwd=REPO_ROOT,
-                        capture_output=True,
-                        text=True,
-                        timeout=5,
-                    )
-                    new_commit = r2.stdout.strip()[:8] if r2.returncode == 0 else None
-                    return True, current, new_commit
+        # Сколько коммитов впереди на origin/main или origin/master? Ветку, совпадающую
+        # с HEAD, не проверяем — rev-list нужен только там, где хеши различаются
+        changed = {b: remote[b] for b in ("main", "master") if b in remote and remote[b] != head}
+        if not changed:
+            return False, current, None
+        # Скачиваем только ветки, чьи вершины ещё не лежат в origin/* локально
+        local = _remote_branch_shas()
+        stale = tuple(b for b, sha in changed.items() if local.get(b) != sha)
+        if stale and not fetch_remote(force=True, branches=stale):
+            return False, current, None
+        candidates = list(changed.values())
+        if len(candidates) == 1:
+            if _commits_ahead(candidates[0]) > 0:
+                return True, current, candidates[0][:8]
+        else:
+            # Обе ветки ушли вперёд — считаем параллельно, но ответ проверяем в порядке
+            # main, master: при новых коммитах в обеих выигрывает main, как и раньше
+            pool = ThreadPoolExecutor(max_workers=2)
+            try:
+                futures = [(pool.submit(_commits_ahead, sha), sha) for sha in candidates]
+                for future, sha in futures:
+                    if future.result() > 0:
+                        return True, current, sha[:8]
+            finally:
+                # Ненужный уже rev-list master не ждём — он доработает в фоне и завершится сам
+                pool.shutdown(wait=False)
     except (ValueError, Exception) as e:
         logger.debug(f"check_for_updates: {e}")
 
@@ -108,11 +237,11 @@ def apply_update() -> Tuple[bool, str]:
 
     try:
         result = subprocess.run(
-            ["git", "pull", "origin"],
-            cwd=REPO_ROOT,
+            [_GIT, "-C", str(REPO_ROOT), "pull", "origin"],
             capture_output=True,
             text=True,
             timeout=60,
+            close_fds=False,
         )
         if result.returncode == 0:
             return True, result.stdout.strip() or "Обновление применено."
@@ -124,9 +253,20 @@ def apply_update() -> Tuple[bool, str]:
         return False, str(e)
 
 
-def restart_app():
-    """Перезапустить приложение (для применения обновлений)."""
-    import os
-    python = sys.executable
-    script = sys.argv[0]
-    os.execv(python, [python, script] + sys.argv[1:])
+def restart_app(shutdown: Optional[Callable[[], None]] = None):
+    """Перезапустить приложение (для применения обновлений).
+
+    execv заменяет процесс без atexit и finally, поэтому штатное завершение
+    (фоновая запись векторной базы, сохранение индекса, закрытие БД) передаётся в shutdown.
+    """
+    if shutdown is not None:
+        try:
+            shutdown()
+        except Exception as e:
+            logger.error(f"Ошибка завершения перед перезапуском: {e}")
+    logger.complete()
+    # В оконных сборках sys.stdout / sys.stderr — None
+    for stream in (sys.stdout, sys.stderr):
+        if stream is not None:
+            stream.flush()
+    os.execv(_RESTART_ARGV[0], list(_RESTART_ARGV))
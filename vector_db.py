@@ -2,37 +2,255 @@
 Sphere — Инициализация и управление ChromaDB (векторная база данных).
 """
 
+import functools
+import importlib.util
+import itertools
+import json
+import os
+import threading
+import time
 import warnings
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Dict, Optional
+from urllib.parse import urlparse
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
 from loguru import logger
 
-from config import CHROMA_DIR
+from config import CHROMA_DIR, CHROMA_URL, FAISS_DIR, FAISS_QUANTIZE, VECTOR_BACKEND
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+    logger.warning("numpy не установлен — кэш похожих запросов отключён")
+
+# LRU эмбеддингов запросов: повторный запрос не гоняет модель заново
+QUERY_EMBED_CACHE_SIZE = 128
+# Документов в одном collection.add: одна транзакция SQLite и одна пачка эмбеддингов
+ADD_BATCH_SIZE = 200
+# Потоков фоновой записи: пока одна пачка пишется в SQLite/HNSW, следующая считает эмбеддинги
+ADD_WORKERS = 2
+# bulk_load: документов в пачке и сколько пачек держим в очереди записи одновременно
+BULK_LOAD_CHUNK = 250
+BULK_LOAD_IN_FLIGHT = ADD_WORKERS * 2
+# Модель эмбеддингов, считаемых на стороне приложения (та же, что у Chroma по умолчанию),
+# и размер пачки одного прохода модели
+EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+EMBEDDING_BATCH_SIZE = 64
+# Кэш результатов поиска: сколько запросов и сколько секунд живёт ответ
+SEARCH_CACHE_SIZE = 512
+SEARCH_CACHE_TTL = 300
+# Кэш похожих запросов: сколько последних векторов запросов держим на набор параметров
+# и с какого косинусного сходства чужой ответ считается ответом на этот запрос
+SIMILAR_CACHE_SIZE = 256
+SIMILAR_CACHE_THRESHOLD = 0.95
+
+
+class QueryCache:
+    """Потокобезопасный LRU с TTL для результатов поиска."""
+
+    def __init__(self, max_size: int = SEARCH_CACHE_SIZE, ttl: float = SEARCH_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        # Растёт при каждом сбросе: ответ, посчитанный до записи, в кэш уже не попадёт
+        self.generation = 0
+        self._items: "OrderedDict[Tuple, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.RLock()
+
+    def get(self, key: Tuple) -> Optional[Any]:
+        with self._lock:
+            item = self._items.get(key)
+            if item is not None and time.monotonic() - item[0] < self.ttl:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return item[1]
+            if item is not None:
+                del self._items[key]
+            self.misses += 1
+            return None
+
+    def put(self, key: Tuple, value: Any, generation: int):
+        with self._lock:
+            if generation != self.generation:
+                return
+            self._items[key] = (time.monotonic(), value)
+            self._items.move_to_end(key)
+            if len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def invalidate(self, *_):
+        """Сбросить весь кэш (после записи в базу). Принимает и игнорирует аргументы колбэков."""
+        with self._lock:
+            self.generation += 1
+            self._items.clear()
+
+
+class SimilarityCache:
+    """Ответы на недавние запросы, находимые по косинусной близости эмбеддинга запроса.
+
+    На каждый набор параметров поиска — матрица нормированных векторов запросов
+    (новые снизу, старые вытесняются сверху) и параллельный список ответов.
+    """
+
+    def __init__(self, max_size: int = SIMILAR_CACHE_SIZE, threshold: float = SIMILAR_CACHE_THRESHOLD):
+        self.max_size = max_size
+        self.threshold = threshold
+        self.generation = 0
+        self._groups: Dict[Tuple, Tuple[Any, List[Any]]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _normalize(embedding):
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def get(self, embedding, params: Tuple) -> Optional[Any]:
+        with self._lock:
+            group = self._groups.get(params)
+            if group is None:
+                return None
+            matrix, results = group
+            scores = matrix @ self._normalize(embedding)
+            best = int(scores.argmax())
+            return results[best] if scores[best] >= self.threshold else None
+
+    def put(self, embedding, params: Tuple, value: Any, generation: int):
+        vector = self._normalize(embedding)
+        with self._lock:
+            if generation != self.generation:
+                return
+            group = self._groups.get(params)
+            if group is None:
+                self._groups[params] = (vector[None, :], [value])
+                return
+            matrix, results = group
+            drop = max(0, len(results) + 1 - self.max_size)
+            self._groups[params] = (np.vstack((matrix[drop:], vector)), results[drop:] + [value])
+
+    def invalidate(self, *_):
+        with self._lock:
+            self.generation += 1
+            self._groups.clear()
+
+
+class SentenceTransformerEmbedder:
+    """Эмбеддинги sentence-transformers пачками, на GPU, если он есть. Модель грузится при первом вызове."""
+
+    def __init__(self, model_name: str = EMBEDDING_MODEL, batch_size: int = EMBEDDING_BATCH_SIZE):
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self._model = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        with self._lock:
+            if self._model is None:
+                try:
+                    import torch
+                    device = "cuda" if torch.cuda.is_available() else "cpu"
+                except ImportError:
+                    device = "cpu"
+                from sentence_transformers import SentenceTransformer
+                self._model = SentenceTransformer(self.model_name, device=device)
+                logger.info(f"Модель эмбеддингов {self.model_name} загружена ({device})")
+        return self._model
+
+    def __call__(self, texts: List[str]):
+        model = self._model or self._load()
+        return model.encode(
+            list(texts), batch_size=self.batch_size, normalize_embeddings=True, convert_to_numpy=True,
+        )
+
+
+def _default_embedder() -> Optional[SentenceTransformerEmbedder]:
+    """sentence-transformers, если установлен (модель не грузится до первого вызова)."""
+    if importlib.util.find_spec("sentence_transformers") is None:
+        return None
+    return SentenceTransformerEmbedder()
+
+
+def _chroma_embedding_fn():
+    """Стандартная функция эмбеддингов Chroma (ONNX на CPU) или None."""
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", UserWarning)
+            from chromadb.utils import embedding_functions
+        return embedding_functions.DefaultEmbeddingFunction()
+    except Exception:
+        return None
+
+
+def _as_float_lists(vectors) -> List[List[float]]:
+    """Матрица эмбеддингов -> списки float (Chroma не принимает float32-скаляры numpy)."""
+    if hasattr(vectors, "tolist"):
+        return vectors.tolist()
+    return [[float(x) for x in v] for v in vectors]
 
 
 class VectorDB:
-    """Обёртка над ChromaDB для семантического поиска."""
+    """Обёртка над векторной базой (ChromaDB или FAISS) для семантического поиска."""
 
-    def __init__(self, persist_dir: Path = CHROMA_DIR):
+    def __init__(self, persist_dir: Path = CHROMA_DIR, backend: str = VECTOR_BACKEND,
+                 faiss_dir: Path = FAISS_DIR, embedder: Optional[Callable[[List[str]], Any]] = None):
         self.persist_dir = persist_dir
+        self.backend = backend
+        self.faiss_dir = faiss_dir
+        # Своя функция эмбеддингов; по умолчанию — sentence-transformers, иначе функция Chroma
+        self._embedder = embedder
         self._client = None
         self._collection = None
+        self._embedding_fn = None
+        self._query_embeddings: OrderedDict = OrderedDict()
+        self._embed_lock = threading.Lock()
+        # Следующий номер для автоматических ID — count() читается один раз при инициализации
+        self._next_id = 0
+        self._id_lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._cache = QueryCache()
+        self._similar = SimilarityCache() if np is not None else None
 
     def initialize(self):
-        """Инициализировать ChromaDB."""
+        """Инициализировать векторную базу (FAISS, если выбран и доступен, иначе ChromaDB)."""
+        if self.backend == "faiss" and self._initialize_faiss():
+            self._start_writer()
+            return
         try:
             with warnings.catch_warnings():
                 warnings.simplefilter("ignore", UserWarning)
                 import chromadb
 
-            self.persist_dir.mkdir(parents=True, exist_ok=True)
-            # Без Settings — обход несовместимости ChromaDB с Python 3.14 (Pydantic v1)
-            self._client = chromadb.PersistentClient(path=str(self.persist_dir))
+            # Телеметрия Chroma шлёт событие на каждый add/query; отключаем через окружение,
+            # а не Settings (см. ниже про Python 3.14). Явно заданное значение не трогаем
+            os.environ.setdefault("ANONYMIZED_TELEMETRY", "False")
+            if CHROMA_URL:
+                # Индекс живёт в отдельном долгоживущем сервере: приложение не держит
+                # HNSW в своей памяти и не ждёт его загрузки и сброса на диск
+                url = urlparse(CHROMA_URL)
+                self._client = chromadb.HttpClient(
+                    host=url.hostname or "localhost",
+                    port=url.port or 8000,
+                    ssl=url.scheme == "https",
+                )
+            else:
+                self.persist_dir.mkdir(parents=True, exist_ok=True)
+                # Без Settings — обход несовместимости ChromaDB с Python 3.14 (Pydantic v1)
+                self._client = chromadb.PersistentClient(path=str(self.persist_dir))
+            # У коллекции остаётся стандартная функция Chroma, но эмбеддинги документов
+            # и запросов считаем сами — пачками и на GPU, если есть, — и отдаём готовыми
+            chroma_fn = _chroma_embedding_fn()
+            self._embedding_fn = self._embedder or _default_embedder() or chroma_fn
+            collection_kwargs = {"embedding_function": chroma_fn} if chroma_fn else {}
             self._collection = self._client.get_or_create_collection(
                 name="sphere_main",
                 metadata={"hnsw:space": "cosine"},
+                **collection_kwargs,
             )
-            logger.info(f"ChromaDB инициализирована: {self.persist_dir}")
+            self._start_writer()
+            logger.info(f"ChromaDB инициализирована: {CHROMA_URL or self.persist_dir}")
         except ImportError:
             logger.warning("ChromaDB не установлена. Векторный поиск недоступен.")
         except Exception as e:
@@ -43,54 +261,268 @@ class VectorDB:
             self._client = None
             self._collection = None
 
+    def _initialize_faiss(self) -> bool:
+        """Открыть FAISS-хранилище; False — остаёмся на ChromaDB."""
+        try:
+            from faiss_backend import FAISSBackend
+        except ImportError:
+            logger.warning("faiss не установлен — используется ChromaDB")
+            return False
+        embedding_fn = self._embedder or _default_embedder() or _chroma_embedding_fn()
+        if embedding_fn is None:
+            logger.warning("Нет модели эмбеддингов для FAISS (chromadb или sentence-transformers) — используется ChromaDB")
+            return False
+        try:
+            self._collection = FAISSBackend(self.faiss_dir, embedding_fn, quantize=FAISS_QUANTIZE)
+        except Exception as e:
+            logger.warning(f"FAISS недоступен: {e}. Используется ChromaDB")
+            return False
+        self._embedding_fn = embedding_fn
+        logger.info(f"FAISS инициализирован: {self.faiss_dir}")
+        return True
+
+    def _start_writer(self):
+        """Счётчик автоматических ID и пул фоновой записи — после открытия коллекции."""
+        self._next_id = self._collection.count()
+        self._executor = ThreadPoolExecutor(max_workers=ADD_WORKERS, thread_name_prefix="vector-add")
+
     @property
     def is_available(self) -> bool:
         return self._collection is not None
 
+    def _auto_ids(self, n: int) -> List[str]:
+        with self._id_lock:
+            start = self._next_id
+            self._next_id += n
+        return [f"doc_{start + i}" for i in range(n)]
+
+    def _add_batch(self, texts: List[str], metadatas: List[Dict], ids: List[str]):
+        """Записать одну пачку; эмбеддинги считаются здесь, если есть своя функция."""
+        if self._embedding_fn is None:
+            self._collection.add(documents=texts, metadatas=metadatas, ids=ids)
+            return
+        embeddings = _as_float_lists(self._embedding_fn(texts))
+        self._collection.add(documents=texts, metadatas=metadatas, ids=ids, embeddings=embeddings)
+
     def add_texts(self, texts: List[str], metadatas: List[Dict] = None,
-                  ids: List[str] = None):
-        """Добавить тексты в векторную базу."""
+                  ids: List[str] = None, batch_size: int = ADD_BATCH_SIZE):
+        """Добавить тексты в векторную базу (пачками по batch_size)."""
         if not self.is_available:
             return
-        if not ids:
-            existing = self._collection.count()
-            ids = [f"doc_{existing + i}" for i in range(len(texts))]
-        self._collection.add(
-            documents=texts,
-            metadatas=metadatas or [{}] * len(texts),
-            ids=ids,
-        )
+        ids = ids or self._auto_ids(len(texts))
+        metadatas = metadatas or [{}] * len(texts)
+        for i in range(0, len(texts), batch_size):
+            j = i + batch_size
+            self._add_batch(texts[i:j], metadatas[i:j], ids[i:j])
+        self._invalidate_caches()
         logger.debug(f"Добавлено {len(texts)} документов в ChromaDB")
 
+    def add_texts_async(self, texts: List[str], metadatas: List[Dict] = None,
+                        ids: List[str] = None, batch_size: int = ADD_BATCH_SIZE) -> List[Future]:
+        """Поставить пачки текстов в фоновую запись; возвращает Future на каждую пачку по порядку."""
+        if not self.is_available or self._executor is None:
+            return []
+        ids = ids or self._auto_ids(len(texts))
+        metadatas = metadatas or [{}] * len(texts)
+        futures = [
+            self._executor.submit(
+                self._add_batch,
+                texts[i:i + batch_size],
+                metadatas[i:i + batch_size],
+                ids[i:i + batch_size],
+            )
+            for i in range(0, len(texts), batch_size)
+        ]
+        # Кэш сбрасывается по завершении каждой пачки: поиск, попавший между
+        # постановкой и записью, не должен надолго закрепить устаревший ответ
+        for future in futures:
+            future.add_done_callback(self._invalidate_caches)
+        return futures
+
+    def _invalidate_caches(self, *_):
+        """Сбросить кэши поиска после записи в коллекцию."""
+        self._cache.invalidate()
+        if self._similar is not None:
+            self._similar.invalidate()
+
+    def bulk_load(self, texts: Iterable[str], metadatas: Optional[Iterable[Dict]] = None,
+                  chunk: int = BULK_LOAD_CHUNK) -> int:
+        """Загрузить большой поток текстов (например, импорт); возвращает число записанных.
+
+        Тексты читаются из итератора пачками по chunk и пишутся в фоновом пуле, в очереди —
+        не больше BULK_LOAD_IN_FLIGHT пачек. Кэши поиска сбрасываются и индекс сохраняется
+        один раз в конце, а не после каждой пачки.
+        """
+        if not self.is_available or self._executor is None:
+            return 0
+        pairs = zip(texts, metadatas if metadatas is not None else itertools.repeat(None))
+        pending: deque = deque()
+        total = 0
+        try:
+            while True:
+                batch = list(itertools.islice(pairs, chunk))
+                if not batch:
+                    break
+                docs = [text for text, _ in batch]
+                metas = [meta or {} for _, meta in batch]
+                pending.append(self._executor.submit(self._add_batch, docs, metas, self._auto_ids(len(docs))))
+                total += len(docs)
+                if len(pending) >= BULK_LOAD_IN_FLIGHT:
+                    pending.popleft().result()
+            while pending:
+                pending.popleft().result()
+        finally:
+            self._invalidate_caches()
+            # FAISS-хранилище сохраняет индекс по таймеру — после загрузки пишем сразу
+            persist = getattr(self._collection, "persist", None)
+            if persist is not None:
+                persist()
+        logger.debug(f"Загружено {total} документов в векторную базу")
+        return total
+
+    def _embed_query(self, query: str) -> Optional[list]:
+        """Эмбеддинг запроса из LRU-кэша; None — считать силами Chroma."""
+        return self._embed_queries([query])[0]
+
+    def _embed_queries(self, queries: List[str]) -> List[Optional[list]]:
+        """Эмбеддинги запросов из LRU-кэша; недостающие считаются одним вызовом модели."""
+        if self._embedding_fn is None:
+            return [None] * len(queries)
+        embeddings: Dict[str, list] = {}
+        with self._embed_lock:
+            for query in queries:
+                cached = self._query_embeddings.get(query)
+                if cached is not None:
+                    self._query_embeddings.move_to_end(query)
+                    embeddings[query] = cached
+        missing = [q for q in dict.fromkeys(queries) if q not in embeddings]
+        if missing:
+            computed = _as_float_lists(self._embedding_fn(missing))
+            with self._embed_lock:
+                for query, embedding in zip(missing, computed):
+                    embeddings[query] = embedding
+                    self._query_embeddings[query] = embedding
+                while len(self._query_embeddings) > QUERY_EMBED_CACHE_SIZE:
+                    self._query_embeddings.popitem(last=False)
+        return [embeddings[q] for q in queries]
+
+    @staticmethod
+    def _unpack_results(results: Dict, row: int, snippet_chars: Optional[int]) -> List[Dict]:
+        """Ответ collection.query для запроса с номером row -> список словарей."""
+        ids = results["ids"][row]
+        docs = results["documents"][row]
+        if snippet_chars:
+            docs = [d[:snippet_chars] for d in docs]
+        # Проверки наличия полей — один раз на ответ, а не на каждое попадание
+        metas = results["metadatas"][row] if results["metadatas"] else [{} for _ in ids]
+        dists = results["distances"][row] if results["distances"] else [0] * len(ids)
+        return [
+            {"id": i, "document": d, "metadata": m, "distance": s}
+            for i, d, m, s in zip(ids, docs, metas, dists)
+        ]
+
     def search(self, query: str, n_results: int = 5,
-               where: Dict = None) -> List[Dict]:
-        """Семантический поиск по векторной базе."""
+               where: Dict = None, snippet_chars: Optional[int] = None) -> List[Dict]:
+        """Семантический поиск по векторной базе. snippet_chars — обрезать document до N символов."""
         if not self.is_available:
             return []
+        key = (query, n_results, json.dumps(where, sort_keys=True), snippet_chars)
+        cached = self._cache.get(key)
+        if cached is not None:
+            return list(cached)
+        generation = self._cache.generation
         try:
+            embedding = self._embed_query(query)
+            # Перефразированный недавний запрос — ответ без обхода коллекции
+            similar = self._similar if embedding is not None else None
+            if similar is not None:
+                params = key[1:]
+                similar_generation = similar.generation
+                cached = similar.get(embedding, params)
+                if cached is not None:
+                    self._cache.put(key, cached, generation)
+                    return list(cached)
+            target = {"query_embeddings": [embedding]} if embedding is not None else {"query_texts": [query]}
             results = self._collection.query(
-                query_texts=[query],
                 n_results=n_results,
                 where=where,
+                # Только нужные поля — без векторов в ответе
+                include=["documents", "metadatas", "distances"],
+                **target,
             )
-            output = []
-            for i in range(len(results["ids"][0])):
-                output.append({
-                    "id": results["ids"][0][i],
-                    "document": results["documents"][0][i],
-                    "metadata": results["metadatas"][0][i] if results["metadatas"] else {},
-                    "distance": results["distances"][0][i] if results["distances"] else 0,
-                })
-            return output
+            output = self._unpack_results(results, 0, snippet_chars)
+            self._cache.put(key, output, generation)
+            if similar is not None:
+                similar.put(embedding, params, output, similar_generation)
+            return list(output)
         except Exception as e:
             logger.error(f"Ошибка поиска в ChromaDB: {e}")
             return []
 
+    def search_batch(self, queries: List[str], n_results: int = 5,
+                     where: Dict = None, snippet_chars: Optional[int] = None) -> List[List[Dict]]:
+        """Поиск по нескольким запросам одним collection.query; ответы — в порядке queries.
+
+        Запросы из кэшей отдаются сразу, в Chroma уходят только промахи.
+        """
+        if not self.is_available:
+            return [[] for _ in queries]
+        where_key = json.dumps(where, sort_keys=True)
+        params = (n_results, where_key, snippet_chars)
+        generation = self._cache.generation
+        outputs: List[Optional[List[Dict]]] = []
+        misses: List[int] = []
+        for query in queries:
+            cached = self._cache.get((query,) + params)
+            outputs.append(list(cached) if cached is not None else None)
+            if cached is None:
+                misses.append(len(outputs) - 1)
+        if not misses:
+            return outputs
+        try:
+            similar = self._similar if self._embedding_fn is not None else None
+            similar_generation = similar.generation if similar is not None else 0
+            embeddings = self._embed_queries([queries[i] for i in misses])
+            if similar is not None:
+                remaining = []
+                for i, embedding in zip(misses, embeddings):
+                    cached = similar.get(embedding, params)
+                    if cached is not None:
+                        self._cache.put((queries[i],) + params, cached, generation)
+                        outputs[i] = list(cached)
+                    else:
+                        remaining.append((i, embedding))
+                if not remaining:
+                    return outputs
+                misses = [i for i, _ in remaining]
+                embeddings = [e for _, e in remaining]
+            target = (
+                {"query_embeddings": embeddings} if embeddings[0] is not None
+                else {"query_texts": [queries[i] for i in misses]}
+            )
+            results = self._collection.query(
+                n_results=n_results,
+                where=where,
+                include=["documents", "metadatas", "distances"],
+                **target,
+            )
+            for row, (i, embedding) in enumerate(zip(misses, embeddings)):
+                output = self._unpack_results(results, row, snippet_chars)
+                self._cache.put((queries[i],) + params, output, generation)
+                if similar is not None:
+                    similar.put(embedding, params, output, similar_generation)
+                outputs[i] = list(output)
+            return outputs
+        except Exception as e:
+            logger.error(f"Ошибка пакетного поиска в ChromaDB: {e}")
+            return [o if o is not None else [] for o in outputs]
+
     def delete(self, ids: List[str]):
         """Удалить документы по ID."""
         if not self.is_available:
             return
         self._collection.delete(ids=ids)
+        self._invalidate_caches()
 
     def count(self) -> int:
         """Количество документов в базе."""
@@ -98,6 +530,20 @@ class VectorDB:
             return 0
         return self._collection.count()
 
+    def close(self):
+        """Дождаться фоновой записи и остановить пул."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        # У FAISS-хранилища есть несохранённый индекс; коллекция Chroma пишет сама
+        close = getattr(self._collection, "close", None)
+        if close is not None:
+            close()
+
 
-# Глобальный экземпляр
-vector_db = VectorDB()
+@functools.cache
+def get_vector_db() -> VectorDB:
+    """Общий экземпляр векторной базы: создаётся и открывается при первом обращении."""
+    db = VectorDB()
+    db.initialize()
+    return db